@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activitystream', '0001_initial'),
+    ]
+
+    operations = [
+        # Partial index on the activity stream keyset, covering only the
+        # verification rows the stream shows. As with 0001, this is raw SQL
+        # because field_history_fieldhistory belongs to a 3rd party app
+        migrations.RunSQL(
+            'CREATE INDEX manual__fieldhistory__verification_date_created_id ON '
+            'field_history_fieldhistory(date_created, id) WHERE field_name IN ('
+            "'verified_with_preverified_enrolment', 'verified_with_code', 'verified_with_companies_house_oauth2')",
+            'DROP INDEX manual__fieldhistory__verification_date_created_id',
+        ),
+    ]
@@ -144,17 +144,7 @@ def test_if_never_verified_not_in_stream(api_client, activities_url):
         HTTP_X_FORWARDED_FOR='1.2.3.4, 123.123.123.123',
     )
     assert response.status_code == status.HTTP_200_OK
-    assert response.json() == {
-        '@context': [
-            'https://www.w3.org/ns/activitystreams',
-            {
-                'dit': 'https://www.trade.gov.uk/ns/activitystreams/v1',
-            },
-        ],
-        'type': 'Collection',
-        'orderedItems': [],
-        'next': 'http://testserver/activity-stream/?after=1326542402.0_3',
-    }
+    assert response.json() == _empty_collection()
 
 
 @pytest.mark.django_db
@@ -282,7 +272,9 @@ def test_pagination(api_client, django_assert_num_queries, activities_url):
     next_url = activities_url
     num_pages = 0
 
-    with django_assert_num_queries(9):
+    # Unverified field history is filtered out in the database, so only full pages and a final empty page are
+    # returned, with one query each
+    with django_assert_num_queries(3):
         while next_url:
             num_pages += 1
             sender = _auth_sender(next_url)
@@ -292,11 +284,12 @@ def test_pagination(api_client, django_assert_num_queries, activities_url):
                 HTTP_AUTHORIZATION=sender.request_header,
                 HTTP_X_FORWARDED_FOR='1.2.3.4, 123.123.123.123',
             )
+            assert response['Server-Timing'].startswith('db;desc="1 queries"')
             response_json = response.json()
             items += response_json['orderedItems']
             next_url = response_json['next'] if 'next' in response_json else None
 
-    assert num_pages == 5
+    assert num_pages == 3
     assert len(items) == 501
     assert len(set([item['id'] for item in items])) == 501
     assert get_companies_house_number(items[500]) == '10000249'
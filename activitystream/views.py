@@ -1,10 +1,14 @@
 import logging
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
 import django_filters.rest_framework
 from django.conf import settings
 from django.core.cache import cache
-from django.db.models import Q
+from django.db import connection
+from django.db.models import Exists, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Cast
 from django.utils.crypto import constant_time_compare
 from django.utils.decorators import decorator_from_middleware
 from drf_spectacular.types import OpenApiTypes
@@ -29,6 +33,11 @@ logger = logging.getLogger(__name__)
 NO_CREDENTIALS_MESSAGE = 'Authentication credentials were not provided.'
 INCORRECT_CREDENTIALS_MESSAGE = 'Incorrect authentication credentials.'
 MAX_PER_PAGE = 500
+VERIFICATION_FIELDS = [
+    'verified_with_code',
+    'verified_with_companies_house_oauth2',
+    'verified_with_preverified_enrolment',
+]
 
 
 def lookup_credentials(access_key_id):
@@ -153,6 +162,29 @@ class BaseActivityStreamViewSet(ViewSet):
     def _build_after(request, after_ts, after_id):
         return f'{request.build_absolute_uri(request.path)}?after={after_ts.timestamp()}_{after_id}'
 
+    @staticmethod
+    @contextmanager
+    def _page_stats(name):
+        """Count the queries and time taken to build a page. The caller sets
+        stats['items'] and adds stats['header'] to the response as Server-Timing
+        """
+        stats = {'queries': 0, 'items': 0}
+
+        def count_query(execute, sql, params, many, context):
+            stats['queries'] += 1
+            return execute(sql, params, many, context)
+
+        started = time.monotonic()
+        with connection.execute_wrapper(count_query):
+            yield stats
+        duration = (time.monotonic() - started) * 1000
+        stats['header'] = f'db;desc="{stats["queries"]} queries";dur={duration:.1f}'
+        logger.info(
+            'Activity stream {name} page: {items} items, {queries} queries, {duration:.1f}ms'.format(
+                name=name, items=stats['items'], queries=stats['queries'], duration=duration
+            )
+        )
+
     @staticmethod
     def _generate_response(items, next_page_url):
         """Put together a response in the format required by activity stream"""
@@ -176,16 +208,35 @@ class ActivityStreamViewSet(BaseActivityStreamViewSet):
     """List-only view set for the activity stream"""
 
     @staticmethod
-    def _company_in_db(companies_by_id, item):
-        return int(item.object_id) in companies_by_id
+    def _verified_history(after_ts, after_id):
+        """Verification history of companies that still exist, after the given
+        keyset position, with the company number and name joined in.
 
-    @staticmethod
-    def _was_company_verified(item):
-        return item.field_value and item.field_name in [
-            'verified_with_code',
-            'verified_with_companies_house_oauth2',
-            'verified_with_preverified_enrolment',
-        ]
+        FieldHistory stores the new value of the field as a serialized
+        instance, so a field being set to true is matched in its text rather
+        than by deserializing each row
+        """
+        was_verified = Q()
+        for field_name in VERIFICATION_FIELDS:
+            was_verified |= Q(field_name=field_name, serialized_data__contains=f'"{field_name}": true')
+        company = Company.objects.filter(pk=Cast(OuterRef('object_id'), IntegerField()))
+        return (
+            FieldHistory.objects.filter(
+                Q(date_created=after_ts, id__gt=after_id) | Q(date_created__gt=after_ts),
+                was_verified,
+                Exists(company),
+                date_created__gte=after_ts,
+                content_type__app_label=Company._meta.app_label,
+                content_type__model=Company._meta.model_name,
+                field_name__in=VERIFICATION_FIELDS,
+            )
+            .annotate(
+                company_number=Subquery(company.values('number')[:1]),
+                company_name=Subquery(company.values('name')[:1]),
+            )
+            .order_by('date_created', 'id')
+            .values('id', 'object_id', 'date_created', 'company_number', 'company_name')
+        )
 
     @decorator_from_middleware(ActivityStreamHawkResponseMiddleware)
     @extend_schema(
@@ -232,69 +283,48 @@ class ActivityStreamViewSet(BaseActivityStreamViewSet):
     )
     def list(self, request):
         """A single page of activities
-        The last page is the page without a 'next' key. A page can be empty,
-        but still have a 'next' key for the next page: The activity stream
-        allows this.
-
-        This is to allow post-db filtering of results, without blocking the
-        request while a "full" page of results is found, which would take a
-        non-constant number of queries. Ideally all filtering would be in the
-        database, but it might be extremely awkward (.e.g. having to query on
-        contents of a json field). Fields are only in FieldHistory because we
-        then show them in the activity stream, so the amount of rows returned
-        from the db that we then don't show in the activity _won't_ increase
-        with unreleated development/fields added to models
-
-        The db query is also kept as simple as possible to make it more likely
-        that the db will use an index
+        The last page is the page without a 'next' key.
+
+        Only verifications of companies that still exist are returned, and the
+        filtering is done in the database against a partial index on the
+        keyset (see migration 0002), so each page is a single query
         """
         after_ts, after_id = self._parse_after(request)
-        history_qs_all = (
-            FieldHistory.objects.all()
-            .filter(Q(date_created=after_ts, id__gt=after_id) | Q(date_created__gt=after_ts))
-            .order_by('date_created', 'id')
-        )
-        history_qs = history_qs_all[:MAX_PER_PAGE]
-        history = list(history_qs)
-
-        # prefetch_related / prefetch_related_objects fetches _all_ the fields
-        # from the related table if using a GenericForeignKey, which Field
-        # History uses. To only fetch the fields needed, we do our own join
-        # in-code. This is what prefetch_related does anyway under the hood,
-        # so is likely not worse.
-
-        company_ids = [item.object_id for item in history]
-        companies = Company.objects.all().filter(id__in=company_ids).values('id', 'number', 'name')
-        companies_by_id = dict((company['id'], company) for company in companies)
+        with self._page_stats('activities') as stats:
+            history = list(self._verified_history(after_ts, after_id)[:MAX_PER_PAGE])
+            stats['items'] = len(history)
 
         items = [
             {
-                'id': ('dit:directory:CompanyVerification:' + str(item.id) + ':Create'),
+                'id': ('dit:directory:CompanyVerification:' + str(item['id']) + ':Create'),
                 'type': 'Create',
-                'published': item.date_created.isoformat('T'),
+                'published': item['date_created'].isoformat('T'),
                 'generator': {
                     'type': 'Application',
                     'name': 'dit:directory',
                 },
                 'object': {
                     'type': ['Document', 'dit:directory:CompanyVerification'],
-                    'id': 'dit:directory:CompanyVerification:' + str(item.id),
+                    'id': 'dit:directory:CompanyVerification:' + str(item['id']),
                     'attributedTo': {
                         'type': ['Organization', 'dit:Company'],
-                        'id': 'dit:directory:Company:' + item.object_id,
-                        'dit:companiesHouseNumber': companies_by_id[int(item.object_id)]['number'],
-                        'name': companies_by_id[int(item.object_id)]['name'],
+                        'id': 'dit:directory:Company:' + item['object_id'],
+                        'dit:companiesHouseNumber': item['company_number'],
+                        'name': item['company_name'],
                     },
                 },
             }
             for item in history
-            if (self._company_in_db(companies_by_id, item) and self._was_company_verified(item))
         ]
 
-        return self._generate_response(
+        response = self._generate_response(
             items=items,
-            next_page_url=(self._build_after(request, history[-1].date_created, history[-1].id) if history else None),
+            next_page_url=(
+                self._build_after(request, history[-1]['date_created'], history[-1]['id']) if history else None
+            ),
         )
+        response['Server-Timing'] = stats['header']
+        return response
 
 
 class ActivityStreamCompanyViewSet(BaseActivityStreamViewSet):
@@ -307,17 +337,29 @@ class ActivityStreamCompanyViewSet(BaseActivityStreamViewSet):
         parameters=[OpenApiParameter(name='after', description='After Timestamp String', required=True, type=str)],
     )
     def list(self, request):
-        """A single page of companies to be consumed by activity stream."""
+        """A single page of companies to be consumed by activity stream.
+
+        The modified__gte bound lets the database range scan the partial
+        company_published_modified_id index rather than evaluate the OR for
+        every published company
+        """
         after_ts, after_id = self._parse_after(request)
-        companies = list(
-            Company.objects.filter(
-                Q(modified=after_ts, id__gt=after_id) | Q(modified__gt=after_ts), date_published__isnull=False
-            ).order_by('modified', 'id')[:MAX_PER_PAGE]
-        )
-        return self._generate_response(
-            ActivityStreamCompanySerializer(companies, many=True).data,
+        with self._page_stats('companies') as stats:
+            companies = list(
+                Company.objects.filter(
+                    Q(modified=after_ts, id__gt=after_id) | Q(modified__gt=after_ts),
+                    modified__gte=after_ts,
+                    date_published__isnull=False,
+                ).order_by('modified', 'id')[:MAX_PER_PAGE]
+            )
+            items = ActivityStreamCompanySerializer(companies, many=True).data
+            stats['items'] = len(companies)
+        response = self._generate_response(
+            items,
             self._build_after(request, companies[-1].modified, companies[-1].id) if companies else None,
         )
+        response['Server-Timing'] = stats['header']
+        return response
 
 
 class ActivityStreamExportPlanView(ListAPIView):
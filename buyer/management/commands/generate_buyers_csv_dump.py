@@ -1,28 +1,30 @@
-import io
+from functools import partial
 
 from django.conf import settings
 from django.core.management import BaseCommand
 
 from buyer.models import Buyer
-from core.helpers import generate_csv, upload_file_object_to_s3
+from core.helpers import CSVDump, generate_csv
 
 
 class Command(BaseCommand):
     help = 'Generate the FAB buyers CSV dump and uploads it to S3.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Export only the buyers modified since the last run, as a delta on the snapshot',
+        )
+
     def handle(self, *args, **options):
-        file_object = self.generate_csv_file()
-        key = settings.BUYERS_CSV_FILE_NAME
-        upload_file_object_to_s3(
-            file_object=file_object,
-            key=key,
+        csv_excluded_fields = ('buyeremailnotification',)
+        dump = CSVDump(
             bucket=settings.AWS_STORAGE_BUCKET_NAME_DATA_SCIENCE,
+            key=settings.BUYERS_CSV_FILE_NAME,
+            write_csv=partial(generate_csv, excluded_fields=csv_excluded_fields),
+            compress=settings.CSV_DUMP_GZIP,
         )
+        manifest = dump.export(queryset=Buyer.objects.all(), incremental=options['incremental'])
+        self.stdout.write(self.style.SUCCESS(f'Published {len(manifest["deltas"])} deltas since the last snapshot'))
         self.stdout.write(self.style.SUCCESS('All done, bye!'))
-
-    @staticmethod
-    def generate_csv_file():
-        csv_excluded_fields = ('buyeremailnotification',)
-        file_object = io.StringIO()
-        generate_csv(file_object=file_object, queryset=Buyer.objects.all(), excluded_fields=csv_excluded_fields)
-        return file_object
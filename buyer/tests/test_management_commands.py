@@ -9,14 +9,15 @@ from buyer.tests.factories import BuyerFactory
 
 
 @pytest.mark.django_db
-@mock.patch('buyer.management.commands.generate_buyers_csv_dump.upload_file_object_to_s3')
+@mock.patch('buyer.management.commands.generate_buyers_csv_dump.CSVDump')
 @override_settings(AWS_STORAGE_BUCKET_NAME_DATA_SCIENCE='my_ds_bucket')
-def test_upload_buyers_csv_to_s3(mocked_upload_file_object_to_s3):
+def test_upload_buyers_csv_to_s3(mocked_csv_dump):
     BuyerFactory.create_batch(5)
     call_command('generate_buyers_csv_dump')
-    assert mocked_upload_file_object_to_s3.called
-    assert mocked_upload_file_object_to_s3.call_args == mock.call(
-        file_object=mock.ANY,
-        key=settings.BUYERS_CSV_FILE_NAME,
+    assert mocked_csv_dump.call_args == mock.call(
         bucket=settings.AWS_STORAGE_BUCKET_NAME_DATA_SCIENCE,
+        key=settings.BUYERS_CSV_FILE_NAME,
+        write_csv=mock.ANY,
+        compress=False,
     )
+    assert mocked_csv_dump().export.call_args == mock.call(queryset=mock.ANY, incremental=False)
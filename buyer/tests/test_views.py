@@ -41,10 +41,37 @@ def test_buyer_csv_dump(mocked_get_file_from_s3, authed_client):
     reload_module('buyer.views')
     reload_urlconf()
     mocked_body = Mock()
-    mocked_body.read.return_value = b'company_name\r\nacme\r\n'
+    mocked_body.iter_chunks.return_value = iter([b'company_name\r\n', b'acme\r\n'])
     mocked_get_file_from_s3.return_value = {'Body': mocked_body}
     response = authed_client.get(reverse('buyer-csv-dump'), {'token': settings.CSV_DUMP_AUTH_TOKEN})
     assert response.status_code == status.HTTP_200_OK
-    assert response.content == b'company_name\r\nacme\r\n'
+    assert b''.join(response.streaming_content) == b'company_name\r\nacme\r\n'
     assert response.headers['content-type'] == 'text/csv'
     assert response.headers['content-disposition'] == f'attachment; filename="{settings.BUYERS_CSV_FILE_NAME}"'
+
+
+@pytest.mark.django_db
+@patch('sigauth.helpers.RequestSignatureChecker.test_signature', Mock(return_value=True))
+@patch('core.views.get_file_from_s3')
+@patch('core.views.get_csv_dump_manifest')
+@override_settings(STORAGE_CLASS_NAME='default')
+@override_settings(AWS_STORAGE_BUCKET_NAME_DATA_SCIENCE='my_db_buket')
+def test_buyer_csv_dump_delta(mocked_get_csv_dump_manifest, mocked_get_file_from_s3, authed_client):
+    reload_module('company.views')
+    reload_module('buyer.views')
+    reload_urlconf()
+    mocked_get_csv_dump_manifest.return_value = {'deltas': [{'key': 'buyers-delta-20240102T120000.csv'}]}
+    mocked_body = Mock()
+    mocked_body.iter_chunks.return_value = iter([b'company_name\r\n'])
+    mocked_get_file_from_s3.return_value = {'Body': mocked_body}
+    url = reverse('buyer-csv-dump')
+
+    response = authed_client.get(url, {'token': settings.CSV_DUMP_AUTH_TOKEN, 'file': 'other.csv'})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = authed_client.get(
+        url, {'token': settings.CSV_DUMP_AUTH_TOKEN, 'file': 'buyers-delta-20240102T120000.csv'}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert mocked_get_file_from_s3.call_args.kwargs['key'] == 'buyers-delta-20240102T120000.csv'
+    assert response.headers['content-disposition'] == 'attachment; filename="buyers-delta-20240102T120000.csv"'
@@ -12,7 +12,7 @@ from import_export.admin import ExportActionMixin
 from import_export.fields import Field
 from import_export.resources import ModelResource
 
-from company import helpers, models
+from company import helpers, indexing, models
 from company.forms import ConfirmVerificationLetterForm, EnrolCompanies, UploadExpertise
 from core.helpers import build_preverified_url, generate_csv_response
 
@@ -92,6 +92,10 @@ class CompaniesCreateFormView(FormView):
         kwargs['user'] = self.request.user
         return kwargs
 
+    def post(self, request, *args, **kwargs):
+        with indexing.suspend_indexing():
+            return super().post(request, *args, **kwargs)
+
     def form_valid(self, form):
         created_companies = [
             {**company, 'url': build_preverified_url(company['number'])} for company in form.created_companies
@@ -128,6 +132,10 @@ class CompaniesUploadExpertiseFormView(FormView):
         kwargs['user'] = self.request.user
         return kwargs
 
+    def post(self, request, *args, **kwargs):
+        with indexing.suspend_indexing():
+            return super().post(request, *args, **kwargs)
+
     def form_valid(self, form):
         return TemplateResponse(
             self.request,
@@ -179,11 +187,15 @@ class PublishByCompanyHouseNumberView(FormView):
 
     def form_valid(self, form):
         numbers = form.cleaned_data['company_numbers']
-
-        if 'investment_support_directory' in form.cleaned_data['directories']:
-            models.Company.objects.filter(number__in=numbers).update(is_published_investment_support_directory=True)
-        if 'find_a_supplier' in form.cleaned_data['directories']:
-            models.Company.objects.filter(number__in=numbers).update(is_published_find_a_supplier=True)
+        companies = models.Company.objects.filter(number__in=numbers)
+
+        with indexing.suspend_indexing() as company_pks:
+            if 'investment_support_directory' in form.cleaned_data['directories']:
+                companies.update(is_published_investment_support_directory=True)
+            if 'find_a_supplier' in form.cleaned_data['directories']:
+                companies.update(is_published_find_a_supplier=True)
+            # queryset updates skip the post_save signal, so the published companies are reindexed explicitly
+            company_pks.update(companies.values_list('pk', flat=True))
 
         return super().form_valid(form)
 
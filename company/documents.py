@@ -3,7 +3,7 @@ from urllib.parse import urljoin
 from django.conf import settings
 from opensearch_dsl import Document, InnerDoc, MetaField, analysis, field
 
-from company import helpers, search_filters, serializers
+from company import helpers, search_filters
 
 american_english_analyzer = analysis.analyzer(
     'normalize_american_english',
@@ -113,6 +113,9 @@ def get_absolute_url(url):
     return url
 
 
+EXPERTISE_LABEL_FIELDS = ['expertise_industries', 'expertise_regions', 'expertise_countries', 'expertise_languages']
+
+
 def company_model_to_document(company, index=settings.OPENSEARCH_COMPANY_INDEX_ALIAS):
     # getattr is used on the company to allow this functionton be used in
     # migrations (historic models wont have all the fields listed below).
@@ -159,8 +162,11 @@ def company_model_to_document(company, index=settings.OPENSEARCH_COMPANY_INDEX_A
         'website',
     }
     has_description = getattr(company, 'description', '') != ''
-    company_data_dict = serializers.CompanySerializer(company).data
-    company_parser = helpers.CompanyParser(company_data_dict)
+    # CompanyParser only reads the expertise fields, which the serializer passes through unchanged
+    company_parser = helpers.CompanyParser(
+        {key: getattr(company, key, []) for key in EXPERTISE_LABEL_FIELDS},
+    )
+    case_studies = company.supplier_case_studies.all()
     expertise_products_services_labels = []
     for key, values in company.expertise_products_services.items():
         expertise_products_services_labels += values
@@ -168,7 +174,7 @@ def company_model_to_document(company, index=settings.OPENSEARCH_COMPANY_INDEX_A
     document = CompanyDocument(
         meta={'id': company.pk, '_index': index},
         pk=str(company.pk),
-        case_study_count=company.supplier_case_studies.count(),
+        case_study_count=len(case_studies),
         has_single_sector=len(company.sectors) == 1,
         has_description=has_description,
         logo=get_absolute_url(company.logo.url if company.logo else ''),
@@ -178,7 +184,7 @@ def company_model_to_document(company, index=settings.OPENSEARCH_COMPANY_INDEX_A
         **{key: getattr(company, key, '') for key in company_fields},
     )
 
-    for case_study in company.supplier_case_studies.all():
+    for case_study in case_studies:
         document.supplier_case_studies.append({key: getattr(case_study, key, '') for key in case_study_fields})
 
     return document
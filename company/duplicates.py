@@ -0,0 +1,158 @@
+import bisect
+import functools
+import itertools
+import math
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+
+SIMILARITY_THRESHOLD = 0.9
+GRAM_SIZE = 3
+VERIFY_CHUNK_SIZE = 10000
+
+
+def get_company_key(name, postal_code):
+    return (name + postal_code).lower()
+
+
+def is_similar(key, candidate_key):
+    # real_quick_ratio and quick_ratio are cheap upper bounds of ratio, so they only skip pairs that would fail it
+    matcher = SequenceMatcher(lambda x: x == ' ', key, candidate_key)
+    return (
+        matcher.real_quick_ratio() > SIMILARITY_THRESHOLD
+        and matcher.quick_ratio() > SIMILARITY_THRESHOLD
+        and matcher.ratio() > SIMILARITY_THRESHOLD
+    )
+
+
+def get_grams(key):
+    """
+    The overlapping GRAM_SIZE-character substrings of the key. Repeats are numbered so that the overlap of two
+    gram sets counts shared repeats too.
+    """
+    seen = Counter()
+    grams = []
+    for start, end in zip(range(len(key)), range(GRAM_SIZE, len(key) + 1)):
+        gram = key[start:end]
+        grams.append((gram, seen[gram]))
+        seen[gram] += 1
+    return grams
+
+
+@functools.lru_cache(maxsize=None)
+def get_min_shared_grams(length, other_length=None):
+    """
+    The fewest grams that two similar keys of the given lengths must share. Without the other length, the fewest
+    that a key of the given length must share with any key it is similar to.
+
+    A ratio above the threshold means that more than threshold / 2 of the combined length is matched, in blocks
+    separated by fewer than (1 - threshold) of the combined length of unmatched characters. Every gram inside a
+    block is shared, and each block loses GRAM_SIZE - 1 of its characters to grams that are not.
+    """
+    if other_length is None:
+        # the shortest partner the threshold allows
+        other_length = length * SIMILARITY_THRESHOLD / (2 - SIMILARITY_THRESHOLD)
+    combined_length = length + other_length
+    matched = combined_length * SIMILARITY_THRESHOLD / 2
+    max_blocks = combined_length * (1 - SIMILARITY_THRESHOLD) + 1
+    return math.floor(matched - max_blocks * (GRAM_SIZE - 1))
+
+
+def could_be_similar_length(length, other_length):
+    # real_quick_ratio without the matcher, allowing for rounding
+    shorter, longer = sorted([length, other_length])
+    return shorter * (2 - SIMILARITY_THRESHOLD) >= longer * SIMILARITY_THRESHOLD
+
+
+def get_candidate_pairs(keys):
+    """
+    Every pair of keys that could be similar, as (position, position) tuples with the lower position first.
+
+    Keys are blocked by prefix filtering: with grams ordered from rarest to most common, two keys sharing at least
+    n grams must share one of their first len(grams) - n + 1, so only those are indexed and probed. Keys that
+    share one are then only paired if they share as many grams as their lengths require. Keys too short to be
+    guaranteed a shared gram are paired with all keys of a length they could be similar to instead.
+    """
+    # grams are numbered so that comparing gram sets doesn't hash strings
+    gram_ids = defaultdict(itertools.count().__next__)
+    grams_by_position = [frozenset(gram_ids[gram] for gram in get_grams(key)) for key in keys]
+    frequency = Counter(gram for grams in grams_by_position for gram in grams)
+    short_length = 0
+    while get_min_shared_grams(short_length + 1) < 1:
+        short_length += 1
+    # the longest key that a short key can be similar to
+    short_partner_length = math.floor(short_length * (2 - SIMILARITY_THRESHOLD) / SIMILARITY_THRESHOLD)
+
+    short_positions = [position for position, key in enumerate(keys) if len(key) <= short_partner_length]
+    for index, position in enumerate(short_positions):
+        for other in short_positions[:index]:
+            if could_be_similar_length(len(keys[position]), len(keys[other])):
+                yield other, position
+
+    # keys are indexed shortest first, so the keys long enough to be similar to the one probing are a suffix of
+    # each gram's postings
+    index = defaultdict(lambda: ([], []))
+    for position in sorted(range(len(keys)), key=lambda position: len(keys[position])):
+        grams = grams_by_position[position]
+        length = len(keys[position])
+        min_shared = get_min_shared_grams(length)
+        if min_shared < 1:
+            continue
+        min_other_length = math.floor(length * SIMILARITY_THRESHOLD / (2 - SIMILARITY_THRESHOLD))
+        prefix_length = len(grams) - min_shared + 1
+        prefix = sorted(grams, key=lambda gram: (frequency[gram], gram))[:prefix_length]
+        candidates = set()
+        for gram in prefix:
+            lengths, positions = index[gram]
+            first = bisect.bisect_left(lengths, min_other_length)
+            candidates.update(positions[first:])
+            lengths.append(length)
+            positions.append(position)
+        for other in candidates:
+            other_length = len(keys[other])
+            if other_length > short_partner_length or length > short_partner_length:
+                if len(grams & grams_by_position[other]) >= get_min_shared_grams(length, other_length):
+                    yield min(position, other), max(position, other)
+
+
+def verify_pairs(keyed_pairs):
+    # SequenceMatcher is not symmetric, so both directions are checked
+    similar = []
+    for position, other, key, other_key in keyed_pairs:
+        if is_similar(key, other_key):
+            similar.append((position, other))
+        if position != other and is_similar(other_key, key):
+            similar.append((other, position))
+    return similar
+
+
+def find_duplicate_groups(keys, processes=1):
+    """
+    Group the positions of similar keys, giving the same groups as comparing every key with every other key in
+    order: each key claims the not yet claimed keys it is similar to, and groups of one are dropped.
+
+    Only candidate pairs are compared, optionally spread over a pool of processes.
+    """
+    keyed_pairs = [(position, position, key, key) for position, key in enumerate(keys)]
+    keyed_pairs += [(position, other, keys[position], keys[other]) for position, other in get_candidate_pairs(keys)]
+    starts = range(0, len(keyed_pairs), VERIFY_CHUNK_SIZE)
+    chunks = [keyed_pairs[start:end] for start, end in zip(starts, [*starts[1:], len(keyed_pairs)])]
+    if processes > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(verify_pairs, chunks))
+    else:
+        results = [verify_pairs(chunk) for chunk in chunks]
+
+    similar = defaultdict(list)
+    for result in results:
+        for position, other in result:
+            similar[position].append(other)
+
+    claimed = set()
+    groups = {}
+    for position in range(len(keys)):
+        for other in sorted(similar[position]):
+            if other not in claimed:
+                groups.setdefault(position, []).append(other)
+                claimed.add(other)
+    return [group for group in groups.values() if len(group) > 1]
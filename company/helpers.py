@@ -1,9 +1,9 @@
+import base64
+import binascii
 import csv
-import itertools
+import json
 import logging
 import re
-from collections import defaultdict
-from difflib import SequenceMatcher
 
 import directory_components.helpers
 from directory_constants import choices, company_types, user_roles
@@ -16,7 +16,8 @@ from opensearch_dsl import Q
 from opensearch_dsl.query import SF, ConstantScore
 from rest_framework.serializers import ValidationError
 
-from company import models
+from company import duplicates, models
+from core.helpers import CSV_CHUNK_SIZE
 
 MESSAGE_ADMIN_NEEDED = 'A business profile must have at least one admin'
 MESSAGE_NETWORK_ERROR = 'A network error occurred'
@@ -124,6 +125,23 @@ def build_search_company_query(params):
         return Q('bool', must=must, should=should, minimum_should_match=1 if should else 0)
 
 
+def encode_search_cursor(pit_id, search_after):
+    """
+    Opaque token for the next page of a cursor paginated company search: the point in time the search runs against
+    and the sort values of the last hit returned.
+    """
+    payload = json.dumps({'pit_id': pit_id, 'search_after': search_after}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_search_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {'pit_id': str(payload['pit_id']), 'search_after': list(payload['search_after'])}
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError('Invalid search cursor')
+
+
 def send_verification_letter(company, form_url=None):
     template_id = settings.GOVNOTIFY_VERIFICATION_LETTER_TEMPLATE_ID
     action = actions.GovNotifyLetterAction(template_id=template_id, form_url=form_url)
@@ -396,6 +414,7 @@ def generate_company_users_csv(file_object, queryset):
             company__number_of_case_studies=Count('company__supplier_case_studies'),
         )
         .values(*fieldnames)
+        .iterator(chunk_size=CSV_CHUNK_SIZE)
     )
     fieldnames.append('company__number_of_sectors')
     fieldnames = sorted(fieldnames)
@@ -419,21 +438,15 @@ def validate_other_admins_connected_to_company(company, sso_ids):
         raise ValidationError(MESSAGE_ADMIN_NEEDED)
 
 
-def get_duplicate_companies():
-    duplicates = set()
-    groups = defaultdict(list)
+def get_duplicate_companies(processes=None):
     queryset = models.Company.objects.exclude(company_type=company_types.COMPANIES_HOUSE)
-    for company, candidate in itertools.product(queryset, queryset):
-        if candidate not in duplicates and is_similar_company(company=company, candidate=candidate):
-            groups[company].append(candidate)
-            duplicates.add(candidate)
-    return [item for item in groups.values() if len(item) > 1]
-
-
-def is_similar_company(company, candidate):
-    a = (company.name + company.postal_code).lower()
-    b = (candidate.name + candidate.postal_code).lower()
-    return SequenceMatcher(lambda x: x == " ", a, b).ratio() > 0.9
+    rows = list(queryset.values_list('pk', 'name', 'postal_code'))
+    groups = duplicates.find_duplicate_groups(
+        keys=[duplicates.get_company_key(name, postal_code) for _, name, postal_code in rows],
+        processes=processes or settings.DUPLICATE_COMPANIES_PROCESSES,
+    )
+    companies = queryset.in_bulk([rows[position][0] for group in groups for position in group])
+    return [[companies[rows[position][0]] for position in group] for group in groups]
 
 
 def notify_duplicate_companies():
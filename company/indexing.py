@@ -0,0 +1,133 @@
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from opensearch_dsl.connections import connections
+from opensearchpy.helpers import bulk
+
+from company import documents, models
+
+PENDING_KEY = 'company:index:pending'
+FLUSH_SCHEDULED_KEY = 'company:index:flush-scheduled'
+FLUSH_BATCH_SIZE = 500
+SEARCH_GENERATION_KEY = 'company:index:generation'
+
+logger = logging.getLogger(__name__)
+
+suspended = threading.local()
+
+
+def index_companies(company_pks):
+    """
+    Bring the search documents of the given companies in line with the database in one bulk request: published
+    companies are indexed, and unpublished or deleted companies are removed from the index.
+    """
+    company_pks = set(company_pks)
+    if not company_pks:
+        return 0
+    companies = models.Company.objects.prefetch_related('supplier_case_studies').filter(pk__in=company_pks)
+    actions = []
+    for company in companies:
+        company_pks.discard(company.pk)
+        if company.is_published:
+            actions.append(documents.company_model_to_document(company).to_dict(True))
+        else:
+            actions.append(delete_action(company.pk))
+    actions += [delete_action(pk) for pk in company_pks]
+    bulk(connections.get_connection(), actions, ignore_status=(404,))
+    bump_search_generation()
+    return len(actions)
+
+
+def get_search_generation():
+    return cache.get(SEARCH_GENERATION_KEY, 0)
+
+
+def bump_search_generation():
+    """
+    Invalidate cached search results. Called after anything is written to the company index.
+    """
+    # cache.add only adds the key if it isn't present, so concurrent first increments are not lost
+    if not cache.add(SEARCH_GENERATION_KEY, 1, timeout=None):
+        cache.incr(SEARCH_GENERATION_KEY)
+
+
+def delete_action(company_pk):
+    return {'_op_type': 'delete', '_index': settings.OPENSEARCH_COMPANY_INDEX_ALIAS, '_id': company_pk}
+
+
+def enqueue_company(company_pk):
+    enqueue_companies([company_pk])
+
+
+def enqueue_companies(company_pks):
+    """
+    Queue companies to be reindexed. Companies queued within OPENSEARCH_COMPANY_INDEX_DEBOUNCE_SECONDS of each other
+    are flushed together by a single flush_company_index task, and queueing the same company twice indexes it once.
+    """
+    if getattr(suspended, 'company_pks', None) is not None:
+        suspended.company_pks.update(company_pks)
+        return
+    if not company_pks:
+        return
+    get_redis_connection('default').sadd(PENDING_KEY, *company_pks)
+    debounce_seconds = settings.OPENSEARCH_COMPANY_INDEX_DEBOUNCE_SECONDS
+    if cache.add(FLUSH_SCHEDULED_KEY, 'scheduled', debounce_seconds * 10):
+        from company.tasks import flush_company_index
+
+        flush_company_index.apply_async(countdown=debounce_seconds)
+
+
+def flush_pending():
+    # Clear the schedule before popping so that anything queued from here on schedules another flush
+    cache.delete(FLUSH_SCHEDULED_KEY)
+    connection = get_redis_connection('default')
+    flushed = 0
+    while True:
+        company_pks = connection.spop(PENDING_KEY, FLUSH_BATCH_SIZE)
+        if not company_pks:
+            return flushed
+        try:
+            flushed += index_companies(int(pk) for pk in company_pks)
+        except Exception:
+            # the schedule was cleared above, so requeueing has to schedule another flush for them
+            enqueue_companies([int(pk) for pk in company_pks])
+            raise
+
+
+@contextmanager
+def suspend_indexing():
+    """
+    Collect the companies saved inside the block instead of queueing them, then reindex them in bulk requests of
+    FLUSH_BATCH_SIZE when the block exits. Meant for batch jobs that save many companies in a row. If the block
+    raises, the collected companies are queued for the debounced flush instead, and the error is left to propagate.
+
+    The collected set of company pks is yielded so that changes made without signals, such as queryset updates,
+    can be added to the reconcile.
+    """
+    if getattr(suspended, 'company_pks', None) is not None:
+        # Nested: the outermost block reconciles
+        yield suspended.company_pks
+        return
+    suspended.company_pks = set()
+    try:
+        yield suspended.company_pks
+    except BaseException:
+        company_pks, suspended.company_pks = suspended.company_pks, None
+        try:
+            enqueue_companies(company_pks)
+        except Exception:
+            logger.exception('Failed to queue %s companies for reindexing', len(company_pks))
+        raise
+    company_pks, suspended.company_pks = sorted(suspended.company_pks), None
+    for start in range(0, len(company_pks), FLUSH_BATCH_SIZE):
+        end = start + FLUSH_BATCH_SIZE
+        try:
+            index_companies(company_pks[start:end])
+        except Exception:
+            # leave the companies not yet reindexed to the debounced flush
+            enqueue_companies(company_pks[start:])
+            raise
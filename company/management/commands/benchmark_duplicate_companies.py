@@ -0,0 +1,78 @@
+import itertools
+import random
+import string
+import timeit
+
+from django.core.management import BaseCommand
+
+from company import duplicates
+
+SYLLABLES = ['al', 'an', 'ber', 'co', 'da', 'el', 'fin', 'gra', 'ham', 'in', 'ker', 'lo', 'mar', 'no', 'or', 'pen']
+COMMON_WORDS = ['consulting', 'global', 'holdings', 'international', 'services', 'solutions', 'trading', 'uk']
+
+
+def find_duplicate_groups_by_pairwise_scan(keys):
+    # The every-pair comparison that duplicates.find_duplicate_groups replaces, kept for comparison
+    claimed = set()
+    groups = {}
+    for position, other in itertools.product(range(len(keys)), range(len(keys))):
+        if other not in claimed and duplicates.is_similar(keys[position], keys[other]):
+            groups.setdefault(position, []).append(other)
+            claimed.add(other)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def make_word():
+    return ''.join(random.choices(SYLLABLES, k=random.randint(2, 4)))
+
+
+def make_company_keys(count, duplicate_rate):
+    words = [make_word() for _ in range(count // 10 + 100)] + COMMON_WORDS * 10
+    keys = []
+    for _ in range(count):
+        if keys and random.random() < duplicate_rate:
+            # a resubmission of an existing company with a typo
+            key = list(random.choice(keys))
+            key[random.randrange(len(key))] = random.choice(string.ascii_lowercase)
+            keys.append(''.join(key))
+        else:
+            name = ' '.join(random.choices(words, k=random.randint(1, 3))) + random.choice([' ltd', ' limited', ''])
+            postal_code = ''.join(random.choices(string.ascii_lowercase, k=2)) + ''.join(
+                random.choices(string.digits + string.ascii_lowercase, k=5)
+            )
+            keys.append(duplicates.get_company_key(name, postal_code))
+    return keys
+
+
+class Command(BaseCommand):
+    help = 'Time duplicate company detection on synthetic companies'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--companies', type=int, nargs='+', default=[10000, 100000], help='Number of synthetic companies'
+        )
+        parser.add_argument('--processes', type=int, default=1, help='Processes to compare candidate pairs with')
+        parser.add_argument('--duplicate-rate', type=float, default=0.05, help='Share of companies that are typos')
+        parser.add_argument(
+            '--compare-up-to',
+            type=int,
+            default=2000,
+            help='Also time the pairwise scan, and check the results match, for up to this many companies',
+        )
+
+    def handle(self, *args, **options):
+        for count in options['companies']:
+            keys = make_company_keys(count, options['duplicate_rate'])
+            results = {}
+
+            seconds = timeit.timeit(
+                lambda: results.update(blocked=duplicates.find_duplicate_groups(keys, options['processes'])), number=1
+            )
+            self.stdout.write(f'{count} companies: {len(results["blocked"])} groups in {seconds:.2f}s')
+
+            if count <= options['compare_up_to']:
+                seconds = timeit.timeit(
+                    lambda: results.update(pairwise=find_duplicate_groups_by_pairwise_scan(keys)), number=1
+                )
+                matches = results['pairwise'] == results['blocked']
+                self.stdout.write(f'{count} companies: pairwise scan in {seconds:.2f}s, results match: {matches}')
@@ -1,11 +1,13 @@
+import time
+
 from django.conf import settings
 from django.core import management
 from django.db.models import Q
 from django.utils.crypto import get_random_string
 from opensearch_dsl.connections import connections
-from opensearchpy.helpers import bulk
+from opensearchpy.helpers import parallel_bulk, streaming_bulk
 
-from company import documents, models
+from company import documents, indexing, models
 
 ALIAS = settings.OPENSEARCH_COMPANY_INDEX_ALIAS
 PREFIX = 'companies-'
@@ -21,7 +23,9 @@ class Command(management.BaseCommand):
        them the appropriate alias so the new indices will be used when the
        application searches from or inserts into the company.
     2) Populate the new indices: insert the companies into the
-       new indices. This is done in bulk for performance gains.
+       new indices. Companies are streamed from a server-side cursor and sent
+       in bulk chunks by a pool of worker threads, so memory use is bounded by
+       the chunk and queue sizes rather than the number of companies.
     3) Delete the old indices: If a search happens during the migration the
        old indices will be used but now the new indices are ready so the old
        indices can be deleted - and the application will now search from and
@@ -43,15 +47,68 @@ class Command(management.BaseCommand):
         index_template = documents.CompanyDocument._index.as_template(ALIAS, PATTERN)
         index_template.save()
 
-    def populate_new_indices(self):
-        companies = models.Company.objects.prefetch_related('supplier_case_studies').filter(
-            Q(is_published_find_a_supplier=True) | Q(is_published_investment_support_directory=True)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of companies read from the database and sent to OpenSearch per bulk request',
+        )
+        parser.add_argument(
+            '--thread-count',
+            type=int,
+            default=4,
+            help='Number of worker threads sending bulk requests. Use 1 to send them sequentially',
+        )
+        parser.add_argument(
+            '--queue-size',
+            type=int,
+            default=4,
+            help='Number of chunks buffered for the worker threads',
+        )
+        parser.add_argument(
+            '--progress-every',
+            type=int,
+            default=10000,
+            help='Report progress after this many companies have been indexed',
+        )
+
+    def get_companies(self, chunk_size):
+        # iterator() reads through a server-side cursor and prefetches case studies one chunk at a time
+        return (
+            models.Company.objects.prefetch_related('supplier_case_studies')
+            .filter(Q(is_published_find_a_supplier=True) | Q(is_published_investment_support_directory=True))
+            .order_by('pk')
+            .iterator(chunk_size=chunk_size)
         )
-        data = []
-        for company in companies:
+
+    def generate_actions(self, chunk_size):
+        for company in self.get_companies(chunk_size):
             company_doc_type = documents.company_model_to_document(company=company, index=self.new_index_name)
-            data.append(company_doc_type.to_dict(True))
-        bulk(self.client, data)
+            yield company_doc_type.to_dict(True)
+
+    def populate_new_indices(self, chunk_size=500, thread_count=4, queue_size=4, progress_every=10000):
+        actions = self.generate_actions(chunk_size)
+        if thread_count > 1:
+            results = parallel_bulk(
+                self.client, actions, thread_count=thread_count, chunk_size=chunk_size, queue_size=queue_size
+            )
+        else:
+            results = streaming_bulk(self.client, actions, chunk_size=chunk_size)
+
+        started = time.monotonic()
+        indexed = 0
+        for _ok, _info in results:
+            indexed += 1
+            if progress_every and indexed % progress_every == 0:
+                self.report_progress(indexed, started)
+        self.report_progress(indexed, started)
+        return indexed
+
+    def report_progress(self, indexed, started):
+        elapsed = time.monotonic() - started
+        rate = indexed / elapsed if elapsed else 0
+        self.stdout.write(f'Indexed {indexed} companies into {self.new_index_name} in {elapsed:.1f}s ({rate:.0f}/s)')
 
     def update_aliases(self):
         actions = [
@@ -64,5 +121,11 @@ class Command(management.BaseCommand):
         if settings.FEATURE_FLAG_OPENSEARCH_REBUILD_INDEX:
             self.create_index_template()
             self.client.indices.create(self.new_index_name)
-            self.populate_new_indices()
+            self.populate_new_indices(
+                chunk_size=options['chunk_size'],
+                thread_count=options['thread_count'],
+                queue_size=options['queue_size'],
+                progress_every=options['progress_every'],
+            )
             self.update_aliases()
+            indexing.bump_search_generation()
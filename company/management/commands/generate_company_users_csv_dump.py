@@ -1,31 +1,29 @@
-import io
-
 from django.conf import settings
 from django.core.management import BaseCommand
 
 from company import helpers, models
-from core.helpers import upload_file_object_to_s3
+from core.helpers import CSVDump
 
 
 class Command(BaseCommand):
     help = 'Generate the FAS suppliers CSV dump and uploads it to S3.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Export only the suppliers modified since the last run, as a delta on the snapshot',
+        )
+
     def handle(self, *args, **options):
-        file_object = self.generate_csv_file()
-        key = settings.SUPPLIERS_CSV_FILE_NAME
-        upload_file_object_to_s3(
-            file_object=file_object,
-            key=key,
+        dump = CSVDump(
             bucket=settings.AWS_STORAGE_BUCKET_NAME_DATA_SCIENCE,
+            key=settings.SUPPLIERS_CSV_FILE_NAME,
+            write_csv=helpers.generate_company_users_csv,
+            modified_fields=('modified', 'company__modified'),
+            compress=settings.CSV_DUMP_GZIP,
         )
-        self.stdout.write(self.style.SUCCESS('All done, bye!'))
-
-    @staticmethod
-    def generate_csv_file():
-        file_object = io.StringIO()
         queryset = models.CompanyUser.objects.exclude(company__isnull=True)
-        helpers.generate_company_users_csv(
-            file_object=file_object,
-            queryset=queryset,
-        )
-        return file_object
+        manifest = dump.export(queryset=queryset, incremental=options['incremental'])
+        self.stdout.write(self.style.SUCCESS(f'Published {len(manifest["deltas"])} deltas since the last snapshot'))
+        self.stdout.write(self.style.SUCCESS('All done, bye!'))
@@ -0,0 +1,119 @@
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from company import indexing, models
+
+
+class BaseCompaniesHouseSyncCommand(BaseCommand):
+    """
+    Update companies from their Companies House profiles.
+
+    Profiles are fetched by a pool of threads, within the Companies House rate limit enforced by
+    CompaniesHouseClient, and the changed fields are written back a batch at a time with bulk_update. A profile
+    whose etag matches the last one applied by the command is skipped. Every written batch is checkpointed, so an
+    interrupted run can continue where it stopped with --resume.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.COMPANIES_HOUSE_SYNC_WORKERS,
+            help='Number of profiles to fetch at once',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of companies to write at once')
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue after the last company written by an interrupted run',
+        )
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_profile(self, number):
+        raise NotImplementedError
+
+    def get_changes(self, company, profile):
+        """
+        The field values the profile gives the company. Raise to count the company as failed.
+        """
+        raise NotImplementedError
+
+    @property
+    def cache_key_prefix(self):
+        return f'companies-house-sync:{self.__module__.rsplit(".", 1)[-1]}'
+
+    def fetch_profile(self, company):
+        try:
+            return self.get_profile(company.number), None
+        except Exception as exception:
+            return None, exception
+
+    def handle(self, *args, **options):
+        checkpoint_key = f'{self.cache_key_prefix}:checkpoint'
+        last_pk = cache.get(checkpoint_key, 0) if options['resume'] else 0
+        queryset = self.get_queryset().order_by('pk')
+        batch_size = options['batch_size']
+        counter = Counter()
+
+        with indexing.suspend_indexing() as company_pks, ThreadPoolExecutor(options['workers']) as executor:
+            while True:
+                companies = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+                if not companies:
+                    break
+                changed_companies = self.sync_batch(companies, executor, counter)
+                company_pks.update(company.pk for company in changed_companies)
+                last_pk = companies[-1].pk
+                cache.set(checkpoint_key, last_pk, timeout=None)
+        cache.delete(checkpoint_key)
+
+        self.stdout.write(self.style.SUCCESS(f'{counter["success"]} companies updated'))
+        self.stdout.write(self.style.WARNING(f'{counter["skipped"]} companies skipped as unchanged'))
+        self.stdout.write(self.style.WARNING(f'{counter["failure"]} companies failed'))
+
+    def sync_batch(self, companies, executor, counter):
+        etag_keys = {company.pk: f'{self.cache_key_prefix}:etag:{company.number}' for company in companies}
+        applied_etags = cache.get_many(etag_keys.values())
+        new_etags = {}
+        companies_by_fields = defaultdict(list)
+
+        for company, (profile, error) in zip(companies, executor.map(self.fetch_profile, companies)):
+            try:
+                if error:
+                    raise error
+                etag = profile.get('etag')
+                if etag and applied_etags.get(etag_keys[company.pk]) == etag:
+                    counter['skipped'] += 1
+                    continue
+                changes = {
+                    field: value
+                    for field, value in self.get_changes(company, profile).items()
+                    if getattr(company, field) != value
+                }
+            except Exception as exception:
+                self.stdout.write(self.style.ERROR(exception))
+                counter['failure'] += 1
+                continue
+            if etag:
+                new_etags[etag_keys[company.pk]] = etag
+            if not changes:
+                counter['skipped'] += 1
+                self.stdout.write(self.style.SUCCESS(f'Company {company.name} skipped'))
+                continue
+            for field, value in changes.items():
+                setattr(company, field, value)
+            company.modified = timezone.now()
+            companies_by_fields[tuple(sorted(changes))].append(company)
+            counter['success'] += 1
+            self.stdout.write(self.style.SUCCESS(f'Company {company.name} updated'))
+
+        for fields, changed_companies in companies_by_fields.items():
+            models.Company.objects.bulk_update(changed_companies, [*fields, 'modified'])
+        cache.set_many(new_etags, timeout=None)
+        return [company for changed_companies in companies_by_fields.values() for company in changed_companies]
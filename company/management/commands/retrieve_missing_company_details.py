@@ -1,38 +1,32 @@
-from collections import Counter
 from datetime import datetime
 
 from directory_constants import company_types
-from django.core.management.base import BaseCommand
 from django.db.models import Q
 
 from company import models
+from company.management.commands.helpers import BaseCompaniesHouseSyncCommand
 from core.helpers import get_companies_house_profile
 
 
-class Command(BaseCommand):
+class Command(BaseCompaniesHouseSyncCommand):
     help = 'Retrieves missing data of companies such as date of creation'
 
-    def handle(self, *args, **options):
+    def get_queryset(self):
         missing_data_query = Q(date_of_creation__isnull=True) | Q(address_line_1__isnull=True) | Q(address_line_1='')
-        queryset = models.Company.objects.filter(Q(company_type=company_types.COMPANIES_HOUSE) & missing_data_query)
-        counter = Counter()
-        for company in queryset:
-            try:
-                profile = get_companies_house_profile(company.number)
-                if profile.get('date_of_creation'):
-                    company.date_of_creation = datetime.strptime(profile['date_of_creation'], '%Y-%m-%d')
-                if profile.get('registered_office_address'):
-                    address = profile['registered_office_address']
-                    company.address_line_1 = address.get('address_line_1', '')
-                    company.address_line_2 = address.get('address_line_2', '')
-                    company.locality = address.get('locality', '')
-                    company.po_box = address.get('po_box', '')
-                    company.postal_code = address.get('postal_code', '')
-                company.save()
-                self.stdout.write(self.style.SUCCESS(f'Company {company.name} updated'))
-                counter['success'] += 1
-            except Exception as execption:
-                self.stdout.write(self.style.ERROR(execption))
-                counter['failure'] += 1
-        self.stdout.write(self.style.SUCCESS(f'{counter["success"]} companies updated'))
-        self.stdout.write(self.style.WARNING(f'{counter["failure"]} companies failed'))
+        return models.Company.objects.filter(Q(company_type=company_types.COMPANIES_HOUSE) & missing_data_query)
+
+    def get_profile(self, number):
+        return get_companies_house_profile(number)
+
+    def get_changes(self, company, profile):
+        changes = {}
+        if profile.get('date_of_creation'):
+            changes['date_of_creation'] = datetime.strptime(profile['date_of_creation'], '%Y-%m-%d').date()
+        if profile.get('registered_office_address'):
+            address = profile['registered_office_address']
+            changes['address_line_1'] = address.get('address_line_1', '')
+            changes['address_line_2'] = address.get('address_line_2', '')
+            changes['locality'] = address.get('locality', '')
+            changes['po_box'] = address.get('po_box', '')
+            changes['postal_code'] = address.get('postal_code', '')
+        return changes
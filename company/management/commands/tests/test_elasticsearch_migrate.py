@@ -1,3 +1,5 @@
+import io
+
 import pytest
 from django.core import management
 
@@ -37,3 +39,21 @@ def test_elasticsearch_migrate_turned_off(settings):
 
     assert CompanyDocument.get(id=published_investment_support_directory.pk, ignore=404) is None
     assert CompanyDocument.get(id=published_company.pk, ignore=404) is None
+
+
+@pytest.mark.django_db
+@pytest.mark.rebuild_elasticsearch
+def test_elasticsearch_migrate_sequential_small_chunks(settings):
+    settings.FEATURE_FLAG_OPENSEARCH_REBUILD_INDEX = True
+
+    companies = factories.CompanyFactory.create_batch(3, is_published_find_a_supplier=True)
+    for company in companies:
+        CompanyDocument.get(id=company.pk).delete()
+
+    out = io.StringIO()
+    management.call_command('elasticsearch_migrate', chunk_size=2, thread_count=1, progress_every=2, stdout=out)
+
+    for company in companies:
+        assert CompanyDocument.get(id=company.pk) is not None
+    assert 'Indexed 2 companies' in out.getvalue()
+    assert 'Indexed 3 companies' in out.getvalue()
@@ -2,8 +2,10 @@ from unittest.mock import Mock, patch
 
 import pytest
 from directory_constants import company_types
+from django.core.cache import cache
 from django.core.management import call_command
 
+from company import models
 from company.tests.factories import CompanyFactory
 
 
@@ -84,3 +86,40 @@ def test_retrieve_company_status_handles_error():
 
     company.refresh_from_db()
     assert company.companies_house_company_status == ''
+
+
+@pytest.mark.django_db
+@patch('company.management.commands.retrieve_companies_house_company_status.get_companies_house_profile')
+def test_retrieve_company_status_skips_applied_etag(mock_get_companies_house_profile, mock_elasticsearch_company_bulk):
+    company = CompanyFactory(number=123)
+    cache.delete('companies-house-sync:retrieve_companies_house_company_status:etag:123')
+    mock_get_companies_house_profile.return_value = {'company_status': 'active', 'etag': 'abc'}
+    call_command('retrieve_companies_house_company_status')
+    mock_elasticsearch_company_bulk.reset_mock()
+
+    models.Company.objects.filter(pk=company.pk).update(companies_house_company_status='dissolved')
+    call_command('retrieve_companies_house_company_status')
+
+    company.refresh_from_db()
+    assert company.companies_house_company_status == 'dissolved'
+    assert mock_elasticsearch_company_bulk.call_count == 0
+
+
+@pytest.mark.django_db
+@patch(
+    'company.management.commands.retrieve_companies_house_company_status.get_companies_house_profile',
+    Mock(return_value={'company_status': 'active'}),
+)
+def test_retrieve_company_status_resumes_after_checkpoint():
+    first, second, third = CompanyFactory.create_batch(3)
+    cache.set('companies-house-sync:retrieve_companies_house_company_status:checkpoint', first.pk)
+
+    call_command('retrieve_companies_house_company_status', resume=True, batch_size=1)
+
+    first.refresh_from_db()
+    second.refresh_from_db()
+    third.refresh_from_db()
+    assert first.companies_house_company_status == ''
+    assert second.companies_house_company_status == 'active'
+    assert third.companies_house_company_status == 'active'
+    assert cache.get('companies-house-sync:retrieve_companies_house_company_status:checkpoint') is None
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('company', '0108_alter_companyuser_company'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(
+                condition=models.Q(('date_published__isnull', False)),
+                fields=['modified', 'id'],
+                name='company_published_modified_id',
+            ),
+        ),
+    ]
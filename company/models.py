@@ -106,6 +106,14 @@ class Company(TimeStampedModel):
 
     class Meta:
         verbose_name_plural = 'companies'
+        indexes = [
+            # Keyset for the activity stream companies feed
+            models.Index(
+                fields=['modified', 'id'],
+                name='company_published_modified_id',
+                condition=models.Q(date_published__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.name
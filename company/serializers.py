@@ -5,7 +5,7 @@ from django.http import QueryDict
 from django.utils.timezone import now
 from rest_framework import serializers
 
-from company import models, validators
+from company import helpers, models, validators
 from core.helpers import CompaniesHouseClient
 
 
@@ -167,10 +167,17 @@ class SearchSerializer(serializers.Serializer):
     ]
 
     MESSAGE_MISSING_QUERY = 'Please specify a term or filter'
+    MESSAGE_MISSING_PAGE = 'Please specify a page, or use cursor pagination'
+    MESSAGE_INVALID_CURSOR = 'Invalid cursor'
+
+    PAGINATION_PAGE = 'page'
+    PAGINATION_CURSOR = 'cursor'
 
     term = serializers.CharField(required=False)
-    page = serializers.IntegerField()
+    page = serializers.IntegerField(required=False, min_value=1)
     size = serializers.IntegerField()
+    pagination = serializers.ChoiceField(choices=[PAGINATION_PAGE, PAGINATION_CURSOR], default=PAGINATION_PAGE)
+    cursor = serializers.CharField(required=False)
     sectors = serializers.MultipleChoiceField(choices=choices.INDUSTRIES, required=False)
     expertise_industries = serializers.MultipleChoiceField(choices=choices.INDUSTRIES, required=False)
     expertise_regions = serializers.MultipleChoiceField(choices=choices.EXPERTISE_REGION_CHOICES, required=False)
@@ -179,11 +186,22 @@ class SearchSerializer(serializers.Serializer):
     expertise_products_services_labels = serializers.ListField(required=False)
     is_showcase_company = serializers.BooleanField(required=False)
 
+    def validate_cursor(self, value):
+        try:
+            return helpers.decode_search_cursor(value)
+        except ValueError:
+            raise serializers.ValidationError(self.MESSAGE_INVALID_CURSOR)
+
     def validate(self, attrs):
         is_term_present = attrs.get('term') is not None
         is_optional_field_present = self.is_optional_field_present(attrs)
         if not (is_term_present or is_optional_field_present):
             raise serializers.ValidationError(self.MESSAGE_MISSING_QUERY)
+        # Sending a cursor continues a cursor paginated search
+        if attrs.get('cursor'):
+            attrs['pagination'] = self.PAGINATION_CURSOR
+        if attrs['pagination'] == self.PAGINATION_PAGE and attrs.get('page') is None:
+            raise serializers.ValidationError({'page': [self.MESSAGE_MISSING_PAGE]})
         return {key: value for key, value in attrs.items() if value}
 
     def is_optional_field_present(self, attrs):
@@ -4,7 +4,7 @@ from directory_constants import company_types, user_roles
 from django.conf import settings
 from django.utils import timezone
 
-from company import documents, email, helpers, models
+from company import email, helpers, indexing, models
 
 FROM_EMAIL = settings.FAS_FROM_EMAIL
 
@@ -53,22 +53,15 @@ def store_date_published(sender, instance, *args, **kwargs):
 
 
 def update_company_elasticsearch_document(sender, instance, *args, **kwargs):
-    document = documents.company_model_to_document(instance)
-    if instance.is_published:
-        document.save()
-    else:
-        document.delete(ignore=404)
+    indexing.enqueue_company(instance.pk)
 
 
 def delete_company_elasticsearch_document(sender, instance, *args, **kwargs):
-    document = documents.company_model_to_document(instance)
-    document.delete(ignore=404)
+    indexing.enqueue_company(instance.pk)
 
 
 def save_case_study_change_to_elasticsearch(sender, instance, *args, **kwargs):
-    if instance.company.is_published:
-        document = documents.company_model_to_document(instance.company)
-        document.save()
+    indexing.enqueue_company(instance.company_id)
 
 
 def send_account_ownership_transfer_notification(sender, instance, created, *args, **kwargs):
@@ -1,6 +1,6 @@
 from django.core.management import call_command
 
-from company import helpers
+from company import helpers, indexing
 from conf.celery import app
 from notifications.tasks import lock_acquired
 
@@ -26,3 +26,8 @@ def detect_duplicate_companies():
 @app.task
 def obsfucate_personal_details():
     call_command('obsfucate_personal_details')
+
+
+@app.task
+def flush_company_index():
+    indexing.flush_pending()
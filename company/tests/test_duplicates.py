@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from company import duplicates
+from company.management.commands.benchmark_duplicate_companies import (
+    find_duplicate_groups_by_pairwise_scan,
+    make_company_keys,
+)
+
+
+def test_find_duplicate_groups():
+    keys = [
+        duplicates.get_company_key('Test company', 'DN217UJ'),
+        duplicates.get_company_key('some other company', 'dn217uj'),
+        duplicates.get_company_key('test company', 'dn217uj'),
+        duplicates.get_company_key('Test compny', 'DN21 7UJ'),
+        duplicates.get_company_key('Other', 'N1'),
+        duplicates.get_company_key('Otter', 'N2'),
+    ]
+
+    assert duplicates.find_duplicate_groups(keys) == [[0, 2, 3]]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_find_duplicate_groups_matches_pairwise_scan(seed):
+    random.seed(seed)
+    keys = make_company_keys(300, duplicate_rate=0.2) + ['', 'a', 'ab', 'abc', 'abcd', 'abce', 'abcde', 'abcdf']
+    random.shuffle(keys)
+
+    assert duplicates.find_duplicate_groups(keys) == find_duplicate_groups_by_pairwise_scan(keys)
+
+
+@pytest.mark.parametrize(
+    'key,other_key',
+    [
+        ('acme trading limiteddn217uj', 'acme tradng limiteddn217uj'),
+        ('acme trading limiteddn217uj', 'acme trading ltddn217uj'),
+        ('a' * 250, 'a' * 240 + 'b' * 10),
+    ],
+)
+def test_candidate_pairs_include_similar_keys(key, other_key):
+    keys = [key, 'unrelated company ltdn17ab', other_key]
+    similar = duplicates.is_similar(key, other_key) or duplicates.is_similar(other_key, key)
+
+    assert not similar or (0, 2) in set(duplicates.get_candidate_pairs(keys))
@@ -0,0 +1,108 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from company import indexing
+from company.tests import factories
+
+
+@pytest.fixture(autouse=True)
+def empty_index_queue():
+    get_redis_connection('default').delete(indexing.PENDING_KEY)
+    cache.delete(indexing.FLUSH_SCHEDULED_KEY)
+    yield
+    get_redis_connection('default').delete(indexing.PENDING_KEY)
+    cache.delete(indexing.FLUSH_SCHEDULED_KEY)
+
+
+def bulk_actions(mock_bulk):
+    return sorted(
+        [(action.get('_op_type', 'index'), int(action['_id'])) for action in mock_bulk.call_args[0][1]],
+        key=lambda action: action[1],
+    )
+
+
+@pytest.mark.django_db
+@mock.patch('company.tasks.flush_company_index.apply_async')
+def test_enqueue_company_coalesces_saves_into_one_flush(mock_apply_async, mock_elasticsearch_company_bulk):
+    published = factories.CompanyFactory(is_published_find_a_supplier=True)
+    unpublished = factories.CompanyFactory(is_published_find_a_supplier=False)
+    published.save()
+    published.save()
+
+    assert mock_apply_async.call_count == 1
+    assert mock_elasticsearch_company_bulk.call_count == 0
+
+    indexing.flush_pending()
+
+    assert mock_elasticsearch_company_bulk.call_count == 1
+    assert bulk_actions(mock_elasticsearch_company_bulk) == [('index', published.pk), ('delete', unpublished.pk)]
+
+
+@pytest.mark.django_db
+@mock.patch('company.tasks.flush_company_index.apply_async')
+def test_flush_pending_requeues_companies_on_error(mock_apply_async, mock_elasticsearch_company_bulk):
+    company = factories.CompanyFactory(is_published_find_a_supplier=True)
+    mock_elasticsearch_company_bulk.side_effect = ConnectionError
+    mock_apply_async.reset_mock()
+
+    with pytest.raises(ConnectionError):
+        indexing.flush_pending()
+
+    assert get_redis_connection('default').smembers(indexing.PENDING_KEY) == {str(company.pk).encode()}
+    assert mock_apply_async.call_count == 1
+
+
+@pytest.mark.django_db
+def test_suspend_indexing_reconciles_once_on_exit(mock_elasticsearch_company_bulk):
+    deleted = factories.CompanyFactory(is_published_find_a_supplier=True)
+    deleted_pk = deleted.pk
+    mock_elasticsearch_company_bulk.reset_mock()
+
+    with indexing.suspend_indexing() as company_pks:
+        company = factories.CompanyFactory(is_published_find_a_supplier=True)
+        company.save()
+        deleted.delete()
+        updated = factories.CompanyFactory(is_published_find_a_supplier=False)
+        type(updated).objects.filter(pk=updated.pk).update(is_published_find_a_supplier=True)
+        with indexing.suspend_indexing() as nested_company_pks:
+            nested_company_pks.add(updated.pk)
+
+        assert mock_elasticsearch_company_bulk.call_count == 0
+        assert company_pks == {company.pk, deleted_pk, updated.pk}
+
+    assert mock_elasticsearch_company_bulk.call_count == 1
+    assert bulk_actions(mock_elasticsearch_company_bulk) == [
+        ('delete', deleted_pk),
+        ('index', company.pk),
+        ('index', updated.pk),
+    ]
+
+
+@pytest.mark.django_db
+def test_suspend_indexing_reconciles_in_batches(mock_elasticsearch_company_bulk):
+    companies = factories.CompanyFactory.create_batch(3, is_published_find_a_supplier=True)
+    mock_elasticsearch_company_bulk.reset_mock()
+
+    with mock.patch.object(indexing, 'FLUSH_BATCH_SIZE', 2), indexing.suspend_indexing():
+        for company in companies:
+            company.save()
+
+    assert mock_elasticsearch_company_bulk.call_count == 2
+    assert [len(call[0][1]) for call in mock_elasticsearch_company_bulk.call_args_list] == [2, 1]
+
+
+@pytest.mark.django_db
+@mock.patch('company.tasks.flush_company_index.apply_async')
+def test_suspend_indexing_queues_companies_when_block_raises(mock_apply_async, mock_elasticsearch_company_bulk):
+    company = factories.CompanyFactory(is_published_find_a_supplier=True)
+    mock_elasticsearch_company_bulk.reset_mock()
+
+    with pytest.raises(ValueError), indexing.suspend_indexing():
+        company.save()
+        raise ValueError
+
+    assert mock_elasticsearch_company_bulk.call_count == 0
+    assert get_redis_connection('default').smembers(indexing.PENDING_KEY) == {str(company.pk).encode()}
@@ -10,9 +10,9 @@ from company.tests import factories
 
 
 @pytest.mark.django_db
-@mock.patch('company.management.commands.generate_company_users_csv_dump.upload_file_object_to_s3')
+@mock.patch('company.management.commands.generate_company_users_csv_dump.CSVDump')
 @override_settings(AWS_STORAGE_BUCKET_NAME_DATA_SCIENCE='my_datascience_bucket')
-def test_upload_suppliers_csv_to_s3(mocked_upload_file_object_to_s3):
+def test_upload_suppliers_csv_to_s3(mocked_csv_dump):
     factories.CompanyUserFactory.create_batch(5)
     factories.CompanyUserFactory(
         name='foobar',
@@ -21,9 +21,11 @@ def test_upload_suppliers_csv_to_s3(mocked_upload_file_object_to_s3):
         role=user_roles.ADMIN,
     )
     call_command('generate_company_users_csv_dump')
-    assert mocked_upload_file_object_to_s3.called
-    assert mocked_upload_file_object_to_s3.call_args == mock.call(
-        file_object=mock.ANY,
-        key=settings.SUPPLIERS_CSV_FILE_NAME,
+    assert mocked_csv_dump.call_args == mock.call(
         bucket=settings.AWS_STORAGE_BUCKET_NAME_DATA_SCIENCE,
+        key=settings.SUPPLIERS_CSV_FILE_NAME,
+        write_csv=mock.ANY,
+        modified_fields=('modified', 'company__modified'),
+        compress=False,
     )
+    assert mocked_csv_dump().export.call_args == mock.call(queryset=mock.ANY, incremental=False)
@@ -120,3 +120,16 @@ def test_company_doc_type_single_sector_non_local_storage(settings):
         doc = documents.company_model_to_document(company)
 
     assert doc.to_dict()['logo'] == 'http://media.com/a.jpg'
+
+
+@pytest.mark.django_db
+def test_company_doc_type_uses_prefetched_case_studies(django_assert_num_queries):
+    company = factories.CompanyFactory()
+    factories.CompanyCaseStudyFactory.create_batch(2, company=company)
+    company = company._meta.model.objects.prefetch_related('supplier_case_studies').get(pk=company.pk)
+
+    with django_assert_num_queries(0):
+        doc = documents.company_model_to_document(company)
+
+    assert doc.to_dict()['case_study_count'] == 2
+    assert len(doc.to_dict()['supplier_case_studies']) == 2
@@ -7,7 +7,7 @@ from directory_constants import choices, company_types, user_roles
 from freezegun import freeze_time
 from pytz import UTC
 
-from company import models, serializers, validators
+from company import helpers, models, serializers, validators
 from company.tests import VALID_REQUEST_DATA, factories
 
 
@@ -285,6 +285,30 @@ def test_company_search_serializer_empty_term_sector():
     assert serializer.errors == {'non_field_errors': [message]}
 
 
+def test_company_search_serializer_page_required_for_page_pagination():
+    serializer = serializers.SearchSerializer(data={'size': 10, 'term': 'thing'})
+
+    assert serializer.is_valid() is False
+    assert serializer.errors == {'page': [serializers.SearchSerializer.MESSAGE_MISSING_PAGE]}
+
+
+def test_company_search_serializer_cursor():
+    cursor = helpers.encode_search_cursor('pit-1', [1.5, 'wolf', 1])
+    serializer = serializers.SearchSerializer(data={'size': 10, 'term': 'thing', 'cursor': cursor})
+
+    assert serializer.is_valid() is True
+    assert serializer.validated_data['pagination'] == 'cursor'
+    assert serializer.validated_data['cursor'] == {'pit_id': 'pit-1', 'search_after': [1.5, 'wolf', 1]}
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', 'e30='])
+def test_company_search_serializer_invalid_cursor(cursor):
+    serializer = serializers.SearchSerializer(data={'size': 10, 'term': 'thing', 'cursor': cursor})
+
+    assert serializer.is_valid() is False
+    assert serializer.errors == {'cursor': [serializers.SearchSerializer.MESSAGE_INVALID_CURSOR]}
+
+
 @pytest.mark.parametrize(
     'field, field_value',
     [
@@ -121,13 +121,14 @@ def test_store_date_published_published_fab_company_with_date():
 
 
 @pytest.mark.django_db
-@pytest.mark.parametrize('is_published_find_a_supplier,call_count', [(False, 0), (True, 1)])
-def test_save_company_changes_to_elasticsearch(
-    is_published_find_a_supplier, call_count, mock_elasticsearch_company_save
-):
-    factories.CompanyFactory(is_published_find_a_supplier=is_published_find_a_supplier)
-
-    assert mock_elasticsearch_company_save.call_count == call_count
+@pytest.mark.parametrize('is_published_find_a_supplier,op_type', [(False, 'delete'), (True, 'index')])
+def test_save_company_changes_to_elasticsearch(is_published_find_a_supplier, op_type, mock_elasticsearch_company_bulk):
+    company = factories.CompanyFactory(is_published_find_a_supplier=is_published_find_a_supplier)
+
+    assert mock_elasticsearch_company_bulk.call_count == 1
+    [action] = mock_elasticsearch_company_bulk.call_args[0][1]
+    assert action.get('_op_type', 'index') == op_type
+    assert int(action['_id']) == company.pk
 
 
 @pytest.mark.rebuild_elasticsearch
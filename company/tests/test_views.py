@@ -5,6 +5,7 @@ import json
 from io import BytesIO
 from unittest import mock
 
+import opensearchpy
 import pytest
 from directory_constants import choices, company_types, sectors, user_roles
 from django.conf import settings
@@ -19,7 +20,7 @@ from PIL import Image
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from company import helpers, models, serializers
+from company import helpers, models, serializers, views
 from company.tests import (
     VALID_REQUEST_DATA,
     VALID_SUPPLIER_REQUEST_DATA,
@@ -881,7 +882,7 @@ def test_company_update(company_data, authed_client, authed_supplier, company):
 
 @pytest.mark.django_db
 def test_company_case_study_create(
-    case_study_data, authed_client, authed_supplier, company, mock_elasticsearch_company_save
+    case_study_data, authed_client, authed_supplier, company, mock_elasticsearch_company_bulk
 ):
     authed_supplier.company = company
     authed_supplier.save()
@@ -987,7 +988,7 @@ def test_company_case_study_create_company_not_published(video, authed_client, a
 
 @pytest.mark.django_db
 def test_company_case_study_update(
-    company_user_case_study, authed_supplier, authed_client, mock_elasticsearch_company_save
+    company_user_case_study, authed_supplier, authed_client, mock_elasticsearch_company_bulk
 ):
     authed_supplier.company = company_user_case_study.company
     authed_supplier.save()
@@ -1224,6 +1225,92 @@ def test_search_paginate_first_page(url, page_number, expected_start, api_client
         assert mock_search.call_args[1]['body']['from'] == expected_start
 
 
+@pytest.mark.rebuild_elasticsearch
+@pytest.mark.parametrize('url', search_urls)
+def test_search_cursor_pagination_request(url, api_client, settings):
+    es = connections.get_connection('default')
+    search_response = {'pit_id': 'pit-2', 'hits': {'total': 2, 'hits': [{'_id': '1', 'sort': [1.5, 'wolf', 1]}]}}
+    with mock.patch.object(es, 'search', return_value=search_response) as mock_search:
+        cursor = helpers.encode_search_cursor('pit-1', [2.5, 'aardvark', 2])
+        data = {'term': 'bones', 'size': 1, 'cursor': cursor}
+
+        response = api_client.get(reverse(url), data=data)
+
+    assert response.status_code == 200, response.content
+    body = mock_search.call_args[1]['body']
+    assert 'from' not in body
+    assert body['pit'] == {'id': 'pit-1', 'keep_alive': '2m'}
+    assert body['search_after'] == [2.5, 'aardvark', 2]
+    assert mock_search.call_args[1].get('index') is None
+    assert helpers.decode_search_cursor(response.json()['next_cursor']) == {
+        'pit_id': 'pit-2',
+        'search_after': [1.5, 'wolf', 1],
+    }
+
+
+@pytest.mark.rebuild_elasticsearch
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', search_urls)
+def test_search_cursor_pagination_pages_through_results(url, search_data, api_client):
+    data = {'term': 'common', 'size': 2, 'pagination': 'cursor'}
+    seen = []
+
+    while True:
+        response = api_client.get(reverse(url), data=data)
+        assert response.status_code == 200, response.content
+        seen += [hit['_id'] for hit in response.json()['hits']['hits']]
+        if not response.json()['next_cursor']:
+            break
+        data['cursor'] = response.json()['next_cursor']
+
+    assert sorted(seen) == ['1', '2', '3']
+
+
+@pytest.mark.rebuild_elasticsearch
+@pytest.mark.parametrize('url', search_urls)
+def test_search_cursor_pagination_expired(url, api_client, settings):
+    es = connections.get_connection('default')
+    with mock.patch.object(es, 'search', side_effect=opensearchpy.exceptions.NotFoundError(404, 'expired')):
+        data = {'term': 'bones', 'size': 5, 'cursor': helpers.encode_search_cursor('pit-1', [1.0, 'a', 1])}
+
+        response = api_client.get(reverse(url), data=data)
+
+    assert response.status_code == 400
+    assert response.json() == {'cursor': [views.AbstractSearchAPIView.MESSAGE_CURSOR_EXPIRED]}
+
+
+@pytest.mark.rebuild_elasticsearch
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', search_urls)
+def test_search_results_cached_until_index_changes(url, api_client, settings):
+    es = connections.get_connection('default')
+    with mock.patch.object(es, 'search', return_value={'hits': {'total': 0, 'hits': []}}) as mock_search:
+        data = {'sectors': [sectors.AEROSPACE, sectors.AIRPORTS], 'page': 1, 'size': 5}
+        api_client.get(reverse(url), data=data)
+        data = {'sectors': [sectors.AIRPORTS, sectors.AEROSPACE], 'page': 1, 'size': 5}
+        response = api_client.get(reverse(url), data=data)
+
+        assert response.status_code == 200, response.content
+        assert mock_search.call_count == 1
+
+        factories.CompanyFactory(is_published_find_a_supplier=True)
+        api_client.get(reverse(url), data=data)
+
+        assert mock_search.call_count == 2
+
+
+@pytest.mark.rebuild_elasticsearch
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', search_urls)
+def test_search_results_include_facets(url, search_data, api_client):
+    response = api_client.get(reverse(url), data={'term': 'common', 'page': 1, 'size': 1})
+
+    assert response.status_code == 200, response.content
+    aggregations = response.json()['aggregations']
+    assert sorted(aggregations) == ['expertise_countries', 'expertise_regions', 'sectors']
+    assert sum(bucket['doc_count'] for bucket in aggregations['expertise_regions']['buckets']) > 0
+
+
 @pytest.mark.rebuild_elasticsearch
 @pytest.mark.parametrize('url', search_urls)
 def test_search_sector_filter(url, api_client, settings):
@@ -1913,7 +2000,7 @@ def test_verify_companies_house_expired_access_token(
 
 @pytest.mark.django_db
 def test_verify_companies_house_good_access_token(
-    companies_house_oauth_valid_token, authed_supplier, authed_client, mock_elasticsearch_company_save
+    companies_house_oauth_valid_token, authed_supplier, authed_client, mock_elasticsearch_company_bulk
 ):
     url = reverse('company-verify-companies-house')
     response = authed_client.post(url, {'access_token': '123'})
@@ -2448,11 +2535,11 @@ def test_company_user_csv_dump(mocked_get_file_from_s3, authed_client):
     reload_urlconf()
 
     mocked_body = mock.Mock()
-    mocked_body.read.return_value = b'company_name\r\nacme\r\n'
+    mocked_body.iter_chunks.return_value = iter([b'company_name\r\n', b'acme\r\n'])
     mocked_get_file_from_s3.return_value = {'Body': mocked_body}
     response = authed_client.get(reverse('supplier-csv-dump'), {'token': settings.CSV_DUMP_AUTH_TOKEN})
     assert response.status_code == status.HTTP_200_OK
-    assert response.content == b'company_name\r\nacme\r\n'
+    assert b''.join(response.streaming_content) == b'company_name\r\nacme\r\n'
     assert response.headers['content-type'] == 'text/csv'
     assert response.headers['content-disposition'] == f'attachment; filename="{settings.SUPPLIERS_CSV_FILE_NAME}"'
 
@@ -1,19 +1,25 @@
 import abc
+import hashlib
+import json
 
-from directory_constants import user_roles
+from directory_constants import choices, user_roles
 from django.conf import settings
+from django.core.cache import cache
 from django.db.models import BooleanField, Case, Count, Q, Value, When
 from django.http import Http404, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, OpenApiResponse, extend_schema, inline_serializer
+from opensearch_dsl.connections import connections
+from opensearchpy.exceptions import NotFoundError
 from rest_framework import generics, status, views, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.serializers import CharField, IntegerField, JSONField
 
-from company import documents, filters, gecko, helpers, models, pagination, permissions, serializers
+from company import documents, filters, gecko, helpers, indexing, models, pagination, permissions, serializers
 from core import authentication
 from core.permissions import IsAuthenticatedSSO
 from core.views import CSVDumpAPIView
@@ -258,6 +264,22 @@ class RequestVerificationWithIdentificationView(views.APIView):
 class AbstractSearchAPIView(abc.ABC, views.APIView):
     permission_classes = []
     serializer_class = serializers.SearchSerializer
+    sort = (
+        {'_score': {'order': 'desc'}},
+        {'ordering_name': {'order': 'asc'}},
+    )
+    # search_after needs a unique sort, so cursor pagination breaks ties on the company pk
+    cursor_sort = sort + ({'pk': {'order': 'asc'}},)
+    cursor_keep_alive = '2m'
+    # Facet counts returned under "aggregations" alongside the hits, sized to cover every choice
+    facets = {
+        'sectors': len(choices.INDUSTRIES),
+        'expertise_regions': len(choices.EXPERTISE_REGION_CHOICES),
+        'expertise_countries': len(choices.COUNTRY_CHOICES),
+    }
+    cache_timeout = 60 * 10
+
+    MESSAGE_CURSOR_EXPIRED = 'Cursor has expired, please restart the search'
 
     @property
     @abc.abstractmethod
@@ -274,36 +296,99 @@ class AbstractSearchAPIView(abc.ABC, views.APIView):
             documents.CompanyDocument.search()
             .filter('term', **self.elasticsearch_filter)
             .query(query)
-            .sort(
-                {'_score': {'order': 'desc'}},
-                {'ordering_name': {'order': 'asc'}},
-            )
             .highlight_options(require_field_match=False)
             .highlight('summary', 'description')
-            .extra(
-                from_=(serializer.validated_data['page'] - 1) * size,
-                size=size,
+        )
+        if serializer.validated_data['pagination'] == serializer.PAGINATION_CURSOR:
+            return self.get_cursor_page(search_object, size, serializer.validated_data.get('cursor'))
+
+        cache_key = self.get_cache_key(serializer.validated_data)
+        data = cache.get(cache_key)
+        if data is None:
+            search_object = (
+                self.add_facets(search_object)
+                .sort(*self.sort)
+                .extra(
+                    from_=(serializer.validated_data['page'] - 1) * size,
+                    size=size,
+                )
             )
+            data = search_object.execute().to_dict()
+            cache.set(cache_key, data, self.cache_timeout)
+        return Response(data=data)
+
+    def get_cache_key(self, validated_data):
+        """
+        Key for a page of results. Multiple choice filters are sorted so equivalent searches share a key, and the
+        index generation is included so that any write to the index invalidates every cached search.
+        """
+        params = {
+            key: sorted(value) if isinstance(value, (list, set)) else value for key, value in validated_data.items()
+        }
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+        return f'company:search:{self.__class__.__name__}:{indexing.get_search_generation()}:{digest}'
+
+    def add_facets(self, search_object):
+        for name, size in self.facets.items():
+            search_object.aggs.bucket(name, 'terms', field=name, size=size)
+        return search_object
+
+    def get_cursor_page(self, search_object, size, cursor):
+        """
+        Page through the results with search_after against a point in time, so deep pages cost the same as the
+        first and results do not shift between requests. The response includes ``next_cursor``, which is null
+        on the last page. Cursor pages are not cached.
+        """
+        client = connections.get_connection()
+        if cursor:
+            pit_id = cursor['pit_id']
+        else:
+            pit = client.create_pit(index=settings.OPENSEARCH_COMPANY_INDEX_ALIAS, keep_alive=self.cursor_keep_alive)
+            pit_id = pit['pit_id']
+            # Facet counts are the same on every page, so only the first page computes them
+            search_object = self.add_facets(search_object)
+        # A point in time search names its index in the point in time rather than the URL
+        search_object = (
+            search_object.index()
+            .sort(*self.cursor_sort)
+            .extra(size=size, pit={'id': pit_id, 'keep_alive': self.cursor_keep_alive})
         )
-        return Response(data=search_object.execute().to_dict())
+        if cursor:
+            search_object = search_object.extra(search_after=cursor['search_after'])
+        try:
+            data = search_object.execute().to_dict()
+        except NotFoundError:
+            raise ValidationError({'cursor': [self.MESSAGE_CURSOR_EXPIRED]})
+
+        pit_id = data.get('pit_id', pit_id)
+        hits = data['hits']['hits']
+        if len(hits) == size:
+            data['next_cursor'] = helpers.encode_search_cursor(pit_id, hits[-1]['sort'])
+        else:
+            data['next_cursor'] = None
+            client.delete_pit(body={'pit_id': [pit_id]}, ignore=404)
+        return Response(data=data)
 
 
-@extend_schema(
-    parameters=[
-        OpenApiParameter(name='page', description='Page', required=True, type=int),
-        OpenApiParameter(name='size', description='Size', required=True, type=int),
-    ]
-)
+SEARCH_PARAMETERS = [
+    OpenApiParameter(name='page', description='Page, required unless using cursor pagination', type=int),
+    OpenApiParameter(name='size', description='Size', required=True, type=int),
+    OpenApiParameter(
+        name='pagination',
+        description='Page numbers or a cursor. Cursor pagination returns a next_cursor with each page',
+        enum=[serializers.SearchSerializer.PAGINATION_PAGE, serializers.SearchSerializer.PAGINATION_CURSOR],
+        type=str,
+    ),
+    OpenApiParameter(name='cursor', description='next_cursor from the previous page of a cursor search', type=str),
+]
+
+
+@extend_schema(parameters=SEARCH_PARAMETERS)
 class FindASupplierSearchAPIView(AbstractSearchAPIView):
     elasticsearch_filter = {'is_published_find_a_supplier': True}
 
 
-@extend_schema(
-    parameters=[
-        OpenApiParameter(name='page', description='Page', required=True, type=int),
-        OpenApiParameter(name='size', description='Size', required=True, type=int),
-    ]
-)
+@extend_schema(parameters=SEARCH_PARAMETERS)
 class InvestmentSupportDirectorySearchAPIView(AbstractSearchAPIView):
     elasticsearch_filter = {'is_published_investment_support_directory': True}
 
@@ -38,6 +38,7 @@ class BaseSettings(PydanticBaseSettings):
     staticfiles_storage: str = 'whitenoise.storage.CompressedStaticFilesStorage'
 
     opensearch_company_index_alias: str = 'companies-alias'
+    opensearch_company_index_debounce_seconds: int = 2
 
     is_docker: bool = False
 
@@ -126,6 +127,17 @@ class BaseSettings(PydanticBaseSettings):
     companies_house_url: str = 'https://account.companieshouse.gov.uk'
     companies_house_api_url: str = 'https://api.companieshouse.gov.uk'
     companies_house_api_key: str = ''
+    companies_house_rate_limit_requests: int = 600
+    companies_house_rate_limit_period_seconds: int = 300
+    companies_house_sync_workers: int = 8
+
+    # Outbound HTTP
+    outbound_http_pool_size: int = 10
+    outbound_http_timeout: float = 5
+    outbound_http_retries: int = 2
+    outbound_http_backoff_factor: float = 0.2
+    outbound_http_circuit_breaker_threshold: int = 5
+    outbound_http_circuit_breaker_reset_seconds: int = 30
 
     # directory constants
     directory_constants_url_great_domestic: str = ''
@@ -174,6 +186,7 @@ class BaseSettings(PydanticBaseSettings):
     # Duplicate companies notification settings
     govnotify_duplicate_companies: str = '9d93b6c9-ff75-4797-b841-2f7a6c78a277'
     govnotify_duplicate_companies_email: str
+    duplicate_companies_processes: int = 1
 
     # Error message notification settings
     govnotify_error_message_template_id: str = '1657d3ab-bf49-455f-9e42-e26b8752009e'
@@ -207,6 +220,8 @@ class BaseSettings(PydanticBaseSettings):
     sole_trader_number_seed: int
 
     csv_dump_auth_token: str
+    csv_dump_gzip: bool = False
+    csv_dump_compaction_days: int = 7
 
     trade_barrier_api_uri: str = 'https://data.api.trade.gov.uk/v1/datasets/market-barriers/versions/'
     world_bank_api_uri: str = 'https://api.worldbank.org/v2/en/indicator/'
@@ -236,6 +251,10 @@ class BaseSettings(PydanticBaseSettings):
     comtrade_s3_prefix: str = ''
 
     comtrade_first_period: int = 2020
+    comtrade_ingest_processes: int = 1
+    comtrade_ingest_chunk_size: int = 50000
+    copy_batch_size: int = 10000
+    import_all_workers: int = 1
 
 
 class CIEnvironment(BaseSettings):
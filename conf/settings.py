@@ -320,6 +320,18 @@ else:
 COMPANIES_HOUSE_URL = env.companies_house_url
 COMPANIES_HOUSE_API_URL = env.companies_house_api_url
 COMPANIES_HOUSE_API_KEY = env.companies_house_api_key
+# Companies House allows 600 requests per API key in any five minutes
+COMPANIES_HOUSE_RATE_LIMIT_REQUESTS = env.companies_house_rate_limit_requests
+COMPANIES_HOUSE_RATE_LIMIT_PERIOD_SECONDS = env.companies_house_rate_limit_period_seconds
+COMPANIES_HOUSE_SYNC_WORKERS = env.companies_house_sync_workers
+
+# Outbound HTTP, used by core.helpers.outbound_request
+OUTBOUND_HTTP_POOL_SIZE = env.outbound_http_pool_size
+OUTBOUND_HTTP_TIMEOUT = env.outbound_http_timeout
+OUTBOUND_HTTP_RETRIES = env.outbound_http_retries
+OUTBOUND_HTTP_BACKOFF_FACTOR = env.outbound_http_backoff_factor
+OUTBOUND_HTTP_CIRCUIT_BREAKER_THRESHOLD = env.outbound_http_circuit_breaker_threshold
+OUTBOUND_HTTP_CIRCUIT_BREAKER_RESET_SECONDS = env.outbound_http_circuit_breaker_reset_seconds
 
 # Email
 EMAIL_BACKED_CLASSES = {
@@ -435,6 +447,7 @@ GOVNOTIFY_GREAT_MARKETGUIDES_REVIEW_REQUEST_TEMPLATE_ID = env.govnotify_great_ma
 
 GOVNOTIFY_DUPLICATE_COMPANIES = env.govnotify_duplicate_companies
 GOVNOTIFY_DUPLICATE_COMPANIES_EMAIL = env.govnotify_duplicate_companies_email
+DUPLICATE_COMPANIES_PROCESSES = env.duplicate_companies_processes
 
 # Error message notification
 GOVNOTIFY_ERROR_MESSAGE_TEMPLATE_ID = env.govnotify_error_message_template_id
@@ -491,6 +504,7 @@ DIRECTORY_CONSTANTS_URL_GREAT_DOMESTIC = env.directory_constants_url_great_domes
 
 # Opensearch
 OPENSEARCH_COMPANY_INDEX_ALIAS = env.opensearch_company_index_alias
+OPENSEARCH_COMPANY_INDEX_DEBOUNCE_SECONDS = env.opensearch_company_index_debounce_seconds
 
 connections.create_connection(**env.opensearch_config)
 
@@ -520,6 +534,10 @@ DIRECTORY_HEALTHCHECK_BACKENDS = [
 CSV_DUMP_AUTH_TOKEN = env.csv_dump_auth_token
 BUYERS_CSV_FILE_NAME = 'find-a-buyer-buyers.csv'
 SUPPLIERS_CSV_FILE_NAME = 'find-a-buyer-suppliers.csv'
+# Store the dumps gzipped; downloads are served with Content-Encoding: gzip
+CSV_DUMP_GZIP = env.csv_dump_gzip
+# Days between full snapshots of the dumps; runs in between only export the rows modified since the last run
+CSV_DUMP_COMPACTION_DAYS = env.csv_dump_compaction_days
 
 # directory-signature-auth
 SIGNATURE_SECRET = env.signature_secret
@@ -632,3 +650,10 @@ DATASETS_METADATA_S3_PREFIX = env.datasets_metadata_s3_prefix
 COMTRADE_S3_PREFIX = env.comtrade_s3_prefix
 
 COMTRADE_FIRST_PERIOD = env.comtrade_first_period
+# Comtrade lines are parsed and classified a chunk at a time, spread over this many processes
+COMTRADE_INGEST_PROCESSES = env.comtrade_ingest_processes
+COMTRADE_INGEST_CHUNK_SIZE = env.comtrade_ingest_chunk_size
+# Rows per transaction when bulk loading with COPY
+COPY_BATCH_SIZE = env.copy_batch_size
+# Number of dataservices importers import_all runs at once
+IMPORT_ALL_WORKERS = env.import_all_workers
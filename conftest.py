@@ -129,8 +129,8 @@ def requests_mocker():
 
 
 @pytest.fixture
-def mock_elasticsearch_company_save():
-    stub = mock.patch('company.documents.CompanyDocument.save')
+def mock_elasticsearch_company_bulk():
+    stub = mock.patch('company.indexing.bulk')
     yield stub.start()
     stub.stop()
 
@@ -153,8 +153,11 @@ def elasticsearch_marker(request, django_db_blocker):
                 pass
 
         stub = mock.patch.object(documents, 'CompanyDocument', CompanyDocument)
+        bulk_stub = mock.patch('company.indexing.bulk')
+        bulk_stub.start()
         yield stub.start()
         stub.stop()
+        bulk_stub.stop()
 
 
 class MockResponse:
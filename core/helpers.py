@@ -1,24 +1,36 @@
 import csv
+import datetime
+import gzip
 import http
+import io
+import json
 import logging
+import operator
 import os
-from functools import partial
-from urllib.parse import urljoin
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial, reduce
+from urllib.parse import urljoin, urlparse
 from uuid import uuid4
 
 import boto3
 import requests
+from botocore.exceptions import ClientError
 from directory_constants.urls import domestic
 from django.conf import settings
 from django.core.signing import Signer
 from django.db import models
+from django.db.models import Q
 from django.http import HttpResponse
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 from django.utils.deconstruct import deconstructible
 from django.utils.functional import cached_property
 from django.utils.translation import gettext as _
 from django_extensions.db.fields import CreationDateTimeField, ModificationDateTimeField
 from notifications_python_client.notifications import NotificationsAPIClient
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +40,8 @@ def notifications_client():
 
 
 MESSAGE_AUTH_FAILED = 'Auth failed with Companies House'
+# rows fetched per round trip by the server side cursors of CSV exports
+CSV_CHUNK_SIZE = 2000
 
 
 def _get_s3_client_kwargs():
@@ -39,17 +53,78 @@ def _get_s3_client_kwargs():
     return kwargs
 
 
-def upload_file_object_to_s3(file_object, bucket, key):
-    s3 = boto3.client(
-        's3',
-        region_name=settings.AWS_S3_REGION_NAME_DATA_SCIENCE,
-        **_get_s3_client_kwargs(),
-    )
-    s3.put_object(
-        Bucket=bucket,
-        Key=key,
-        Body=file_object.getvalue(),
-    )
+class S3MultipartUpload(io.RawIOBase):
+    """
+    Write-only file that uploads to S3 in parts as it is written, so that at most one part is held in memory.
+    The object is created when the file is closed.
+    """
+
+    # S3 requires every part but the last to be at least 5MB
+    part_size = 8 * 1024 * 1024
+
+    def __init__(self, bucket, key, part_size=None, **extra_args):
+        self.client = boto3.client(
+            's3',
+            region_name=settings.AWS_S3_REGION_NAME_DATA_SCIENCE,
+            **_get_s3_client_kwargs(),
+        )
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size or self.part_size
+        self.upload_id = self.client.create_multipart_upload(Bucket=bucket, Key=key, **extra_args)['UploadId']
+        self.parts = []
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        part_size = self.part_size
+        self.buffer.extend(data)
+        while len(self.buffer) >= part_size:
+            self.upload_part(self.buffer[:part_size])
+            del self.buffer[:part_size]
+        return len(data)
+
+    def upload_part(self, body):
+        part_number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=part_number, Body=bytes(body)
+        )
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+
+    def close(self):
+        if not self.closed:
+            # an empty object still needs one (empty) part
+            if self.buffer or not self.parts:
+                self.upload_part(self.buffer)
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, MultipartUpload={'Parts': self.parts}
+            )
+        super().close()
+
+    def abort(self):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        super().close()
+
+
+@contextmanager
+def open_s3_upload(bucket, key, compress=False):
+    """
+    Text file whose contents are streamed to S3 as they are written, optionally gzipped. The upload is completed
+    when the block exits, or aborted if it raises.
+    """
+    upload = S3MultipartUpload(bucket=bucket, key=key, **({'ContentEncoding': 'gzip'} if compress else {}))
+    try:
+        stream = gzip.GzipFile(fileobj=upload, mode='wb') if compress else io.BufferedWriter(upload)
+        file_object = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+        yield file_object
+        # closing the gzip stream writes its trailer but leaves the upload open
+        file_object.close()
+        upload.close()
+    except BaseException:
+        upload.abort()
+        raise
 
 
 def get_file_from_s3(bucket, key):
@@ -78,14 +153,98 @@ def generate_csv(file_object, queryset, excluded_fields):
     model = queryset.model
     fieldnames = sorted([field.name for field in model._meta.get_fields() if field.name not in excluded_fields])
 
-    objects = queryset.all().values(*fieldnames)
-    writer = csv.DictWriter(file_object, fieldnames=fieldnames)
-    writer.writeheader()
-    writer.writerows(objects)
+    rows = queryset.all().values_list(*fieldnames).iterator(chunk_size=CSV_CHUNK_SIZE)
+    writer = csv.writer(file_object)
+    writer.writerow(fieldnames)
+    writer.writerows(rows)
 
     return writer
 
 
+class CSVDump:
+    """
+    A CSV export published to S3 as a full snapshot plus deltas, described by a JSON manifest stored next to it.
+
+    By default every run writes the whole queryset to the snapshot key and drops any deltas, so the snapshot is
+    always a current export. An incremental run writes only the rows modified since the previous one instead, up to
+    a high-watermark kept in the manifest, until the snapshot is older than the compaction interval. Deleted rows
+    are only reflected by the next snapshot.
+    """
+
+    # rows modified this long before a run may still be committing, so consecutive deltas overlap by it
+    watermark_overlap = datetime.timedelta(minutes=5)
+
+    def __init__(self, bucket, key, write_csv, modified_fields=('modified',), compaction_interval=None, compress=False):
+        self.bucket = bucket
+        self.key = key
+        self.write_csv = write_csv
+        # a row belongs in a delta when any of these changed, e.g. the modified timestamps of joined models
+        self.modified_fields = modified_fields
+        self.compaction_interval = compaction_interval or datetime.timedelta(days=settings.CSV_DUMP_COMPACTION_DAYS)
+        self.compress = compress
+        self.client = boto3.client(
+            's3', region_name=settings.AWS_S3_REGION_NAME_DATA_SCIENCE, **_get_s3_client_kwargs()
+        )
+
+    @property
+    def manifest_key(self):
+        return get_csv_dump_manifest_key(self.key)
+
+    def get_manifest(self):
+        return get_csv_dump_manifest(bucket=self.bucket, key=self.key)
+
+    def is_due_compaction(self, manifest, now):
+        return now - datetime.datetime.fromisoformat(manifest['snapshot']['until']) > self.compaction_interval
+
+    def export(self, queryset, incremental=False):
+        """
+        Write a snapshot, or when incremental a delta unless a snapshot is due, and publish the manifest. Returns the
+        manifest.
+        """
+        until = timezone.now()
+        manifest = self.get_manifest()
+        if not incremental or not manifest or self.is_due_compaction(manifest, until):
+            with open_s3_upload(bucket=self.bucket, key=self.key, compress=self.compress) as file_object:
+                self.write_csv(file_object=file_object, queryset=queryset)
+            stale_keys = [delta['key'] for delta in manifest['deltas']] if manifest else []
+            manifest = {'snapshot': {'key': self.key, 'until': until.isoformat()}, 'deltas': []}
+        else:
+            previous = manifest['deltas'][-1] if manifest['deltas'] else manifest['snapshot']
+            since = datetime.datetime.fromisoformat(previous['until']) - self.watermark_overlap
+            root, extension = os.path.splitext(self.key)
+            delta_key = f'{root}-delta-{until:%Y%m%dT%H%M%S}{extension}'
+            with open_s3_upload(bucket=self.bucket, key=delta_key, compress=self.compress) as file_object:
+                modified_since = reduce(operator.or_, [Q(**{f'{field}__gt': since}) for field in self.modified_fields])
+                self.write_csv(file_object=file_object, queryset=queryset.filter(modified_since))
+            stale_keys = []
+            manifest['deltas'].append({'key': delta_key, 'since': since.isoformat(), 'until': until.isoformat()})
+
+        manifest['compressed'] = self.compress
+        self.client.put_object(
+            Bucket=self.bucket, Key=self.manifest_key, Body=json.dumps(manifest), ContentType='application/json'
+        )
+        if stale_keys:
+            # only once the manifest no longer lists them
+            self.client.delete_objects(
+                Bucket=self.bucket, Delete={'Objects': [{'Key': key} for key in stale_keys], 'Quiet': True}
+            )
+        return manifest
+
+
+def get_csv_dump_manifest_key(key):
+    return f'{os.path.splitext(key)[0]}-manifest.json'
+
+
+def get_csv_dump_manifest(bucket, key):
+    try:
+        manifest = get_file_from_s3(bucket=bucket, key=get_csv_dump_manifest_key(key))
+    except ClientError as error:
+        if error.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+    return json.loads(manifest['Body'].read())
+
+
 class TimeStampedModel(models.Model):
     """Modified version of django_extensions.db.models.TimeStampedModel
 
@@ -182,6 +341,147 @@ class SSOUser:
             return self.company_user.company
 
 
+class TokenBucket:
+    """
+    Thread safe rate limiter allowing up to `requests` calls in any `period` seconds, refilled continuously.
+    """
+
+    def __init__(self, requests, period):
+        self.capacity = requests
+        self.rate = requests / period
+        self.tokens = requests
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised instead of making a request to a dependency whose circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Thread safe circuit breaker that opens after `failure_threshold` consecutive failures. While open, calls are
+    refused for `reset_seconds`, after which one trial call is let through. A success closes it again.
+    """
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened >= self.reset_seconds:
+                # the trial call restarts the reset period, so other calls are refused while it is in flight
+                self.opened = now
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened = time.monotonic()
+
+
+outbound_sessions = {}
+circuit_breakers = {}
+outbound_lock = threading.Lock()
+
+
+def get_outbound_session(url):
+    """
+    The session for the scheme and host of the url, shared between threads so that its pooled connections are
+    kept alive between requests. Idempotent requests that fail to connect or get a 502, 503 or 504 are retried
+    with exponential backoff.
+    """
+    parsed = urlparse(url)
+    origin = f'{parsed.scheme}://{parsed.netloc}'
+    with outbound_lock:
+        if origin not in outbound_sessions:
+            retry = Retry(
+                total=settings.OUTBOUND_HTTP_RETRIES,
+                backoff_factor=settings.OUTBOUND_HTTP_BACKOFF_FACTOR,
+                status_forcelist=(502, 503, 504),
+                raise_on_status=False,
+            )
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=settings.OUTBOUND_HTTP_POOL_SIZE, max_retries=retry
+            )
+            session = requests.Session()
+            session.mount(f'{parsed.scheme}://', adapter)
+            outbound_sessions[origin] = session
+        return outbound_sessions[origin]
+
+
+def get_circuit_breaker(dependency):
+    with outbound_lock:
+        if dependency not in circuit_breakers:
+            circuit_breakers[dependency] = CircuitBreaker(
+                failure_threshold=settings.OUTBOUND_HTTP_CIRCUIT_BREAKER_THRESHOLD,
+                reset_seconds=settings.OUTBOUND_HTTP_CIRCUIT_BREAKER_RESET_SECONDS,
+            )
+        return circuit_breakers[dependency]
+
+
+def outbound_request(method, url, dependency=None, **kwargs):
+    """
+    Make a request through the pooled session for the host of the url, guarded by the circuit breaker of the
+    dependency, which defaults to the host. Errors and 5xx responses left after retrying count as failures.
+    The latency of every request is logged against its dependency.
+    """
+    dependency = dependency or urlparse(url).netloc
+    breaker = get_circuit_breaker(dependency)
+    if not breaker.allow():
+        raise CircuitOpenError(f'Circuit open for {dependency}')
+    kwargs.setdefault('timeout', settings.OUTBOUND_HTTP_TIMEOUT)
+    start = time.monotonic()
+    try:
+        response = get_outbound_session(url).request(method, url, **kwargs)
+    except requests.exceptions.RequestException as error:
+        breaker.record_failure()
+        log_outbound_latency(dependency, method, type(error).__name__, start)
+        raise
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    log_outbound_latency(dependency, method, response.status_code, start)
+    return response
+
+
+def log_outbound_latency(dependency, method, outcome, start):
+    milliseconds = round((time.monotonic() - start) * 1000)
+    logger.info(
+        f'Outbound {method.upper()} to {dependency}: {outcome} in {milliseconds}ms',
+        extra={'dependency': dependency, 'outcome': outcome, 'duration_ms': milliseconds},
+    )
+
+
 class CompaniesHouseClient:
     api_key = settings.COMPANIES_HOUSE_API_KEY
     make_api_url = partial(urljoin, settings.COMPANIES_HOUSE_API_URL)
@@ -195,6 +495,9 @@ class CompaniesHouseClient:
         'https',
         requests.adapters.HTTPAdapter(max_retries=3),
     )
+    rate_limiter = TokenBucket(
+        requests=settings.COMPANIES_HOUSE_RATE_LIMIT_REQUESTS, period=settings.COMPANIES_HOUSE_RATE_LIMIT_PERIOD_SECONDS
+    )
 
     @classmethod
     def get_http_basic_auth(cls):
@@ -203,6 +506,7 @@ class CompaniesHouseClient:
     @classmethod
     def get(cls, url, params={}, auth=None):
         auth = auth or cls.get_http_basic_auth
+        cls.rate_limiter.acquire()
         response = cls.session.get(url=url, params=params, auth=auth())
         if response.status_code == http.client.UNAUTHORIZED:
             logger.error(MESSAGE_AUTH_FAILED)
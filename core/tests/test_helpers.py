@@ -1,10 +1,16 @@
+import datetime
+import gzip
 import http
 import io
+import json
 from unittest import mock
 
 import pytest
 import requests_mock
+from botocore.exceptions import ClientError
 from django.conf import settings
+from django.db.models import Q
+from freezegun import freeze_time
 from requests.exceptions import HTTPError
 
 from core import helpers
@@ -22,22 +28,57 @@ def data_science_settings():
     return settings
 
 
+def uploaded_parts(mocked_boto3):
+    return [call.kwargs['Body'] for call in mocked_boto3.client().upload_part.call_args_list]
+
+
 @mock.patch('core.helpers.boto3')
-def test_upload_file_object_to_s3(mocked_boto3, data_science_settings):
-    file_object = io.StringIO()
-    helpers.upload_file_object_to_s3(
-        file_object=file_object,
-        bucket=data_science_settings.AWS_STORAGE_BUCKET_NAME_DATA_SCIENCE,
-        key='key',
-    )
-    assert mocked_boto3.client().put_object.called
-    assert mocked_boto3.client().put_object.call_args == mock.call(
-        Body=file_object.getvalue(),
-        Bucket=data_science_settings.AWS_STORAGE_BUCKET_NAME_DATA_SCIENCE,
+def test_s3_multipart_upload_uploads_whole_parts(mocked_boto3, data_science_settings):
+    mocked_boto3.client().create_multipart_upload.return_value = {'UploadId': 'upload'}
+    mocked_boto3.client().upload_part.side_effect = [{'ETag': 'a'}, {'ETag': 'b'}, {'ETag': 'c'}]
+    upload = helpers.S3MultipartUpload(bucket='my_ds_bucket', key='key', part_size=4)
+
+    upload.write(b'abcdef')
+    upload.write(b'ghij')
+    assert uploaded_parts(mocked_boto3) == [b'abcd', b'efgh']
+
+    upload.close()
+    assert uploaded_parts(mocked_boto3) == [b'abcd', b'efgh', b'ij']
+    assert mocked_boto3.client().complete_multipart_upload.call_args == mock.call(
+        Bucket='my_ds_bucket',
         Key='key',
+        UploadId='upload',
+        MultipartUpload={
+            'Parts': [{'ETag': 'a', 'PartNumber': 1}, {'ETag': 'b', 'PartNumber': 2}, {'ETag': 'c', 'PartNumber': 3}]
+        },
     )
 
 
+@mock.patch('core.helpers.boto3')
+def test_open_s3_upload_compressed(mocked_boto3, data_science_settings):
+    mocked_boto3.client().upload_part.return_value = {'ETag': 'a'}
+
+    with helpers.open_s3_upload(bucket='my_ds_bucket', key='key', compress=True) as file_object:
+        file_object.write('name\r\nacme\r\n')
+
+    assert mocked_boto3.client().create_multipart_upload.call_args == mock.call(
+        Bucket='my_ds_bucket', Key='key', ContentEncoding='gzip'
+    )
+    assert gzip.decompress(b''.join(uploaded_parts(mocked_boto3))) == b'name\r\nacme\r\n'
+    assert mocked_boto3.client().complete_multipart_upload.called
+
+
+@mock.patch('core.helpers.boto3')
+def test_open_s3_upload_aborts_on_error(mocked_boto3, data_science_settings):
+    with pytest.raises(ValueError):
+        with helpers.open_s3_upload(bucket='my_ds_bucket', key='key') as file_object:
+            file_object.write('name\r\n')
+            raise ValueError()
+
+    assert mocked_boto3.client().abort_multipart_upload.called
+    assert not mocked_boto3.client().complete_multipart_upload.called
+
+
 @mock.patch('core.helpers.boto3')
 def test_get_file_from_s3(mocked_boto3, data_science_settings):
     helpers.get_file_from_s3(bucket=data_science_settings.AWS_STORAGE_BUCKET_NAME_DATA_SCIENCE, key='key')
@@ -56,6 +97,106 @@ def test_get_s3_file_stream(mocked_boto3):
     assert stream == 'S3 file contents'
 
 
+def csv_dump_manifest(manifest):
+    return {'Body': io.BytesIO(json.dumps(manifest).encode('utf-8'))}
+
+
+@mock.patch('core.helpers.open_s3_upload')
+@mock.patch('core.helpers.boto3')
+def test_csv_dump_writes_snapshot_without_manifest(mocked_boto3, mocked_open_s3_upload, data_science_settings):
+    mocked_boto3.client().get_object.side_effect = ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+    write_csv = mock.Mock()
+    queryset = mock.Mock()
+
+    manifest = helpers.CSVDump(bucket='my_ds_bucket', key='buyers.csv', write_csv=write_csv).export(queryset)
+
+    assert mocked_open_s3_upload.call_args == mock.call(bucket='my_ds_bucket', key='buyers.csv', compress=False)
+    assert write_csv.call_args == mock.call(file_object=mock.ANY, queryset=queryset)
+    assert manifest['snapshot']['key'] == 'buyers.csv'
+    assert manifest['deltas'] == []
+    assert mocked_boto3.client().put_object.call_args.kwargs['Key'] == 'buyers-manifest.json'
+    assert not mocked_boto3.client().delete_objects.called
+
+
+@freeze_time('2024-01-02 12:00:00')
+@mock.patch('core.helpers.open_s3_upload')
+@mock.patch('core.helpers.boto3')
+def test_csv_dump_writes_delta_since_watermark(mocked_boto3, mocked_open_s3_upload, data_science_settings):
+    mocked_boto3.client().get_object.return_value = csv_dump_manifest(
+        {'snapshot': {'key': 'buyers.csv', 'until': '2024-01-02T00:00:00+00:00'}, 'deltas': [], 'compressed': False}
+    )
+    write_csv = mock.Mock()
+    queryset = mock.Mock()
+
+    manifest = helpers.CSVDump(bucket='my_ds_bucket', key='buyers.csv', write_csv=write_csv).export(
+        queryset, incremental=True
+    )
+
+    assert mocked_open_s3_upload.call_args == mock.call(
+        bucket='my_ds_bucket', key='buyers-delta-20240102T120000.csv', compress=False
+    )
+    since = datetime.datetime(2024, 1, 1, 23, 55, tzinfo=datetime.timezone.utc)
+    assert queryset.filter.call_args == mock.call(Q(modified__gt=since))
+    assert write_csv.call_args == mock.call(file_object=mock.ANY, queryset=queryset.filter())
+    assert manifest['deltas'] == [
+        {
+            'key': 'buyers-delta-20240102T120000.csv',
+            'since': '2024-01-01T23:55:00+00:00',
+            'until': '2024-01-02T12:00:00+00:00',
+        }
+    ]
+
+
+@freeze_time('2024-01-02 12:00:00')
+@mock.patch('core.helpers.open_s3_upload')
+@mock.patch('core.helpers.boto3')
+def test_csv_dump_writes_snapshot_unless_incremental(mocked_boto3, mocked_open_s3_upload, data_science_settings):
+    mocked_boto3.client().get_object.return_value = csv_dump_manifest(
+        {
+            'snapshot': {'key': 'buyers.csv', 'until': '2024-01-02T00:00:00+00:00'},
+            'deltas': [{'key': 'buyers-delta-20240102T060000.csv', 'since': '', 'until': '2024-01-02T06:00:00+00:00'}],
+            'compressed': False,
+        }
+    )
+    queryset = mock.Mock()
+
+    manifest = helpers.CSVDump(bucket='my_ds_bucket', key='buyers.csv', write_csv=mock.Mock()).export(queryset)
+
+    assert mocked_open_s3_upload.call_args.kwargs['key'] == 'buyers.csv'
+    assert not queryset.filter.called
+    assert manifest['deltas'] == []
+    assert mocked_boto3.client().delete_objects.call_args == mock.call(
+        Bucket='my_ds_bucket', Delete={'Objects': [{'Key': 'buyers-delta-20240102T060000.csv'}], 'Quiet': True}
+    )
+
+
+@freeze_time('2024-01-10 12:00:00')
+@mock.patch('core.helpers.open_s3_upload')
+@mock.patch('core.helpers.boto3')
+def test_csv_dump_compaction_drops_deltas(mocked_boto3, mocked_open_s3_upload, data_science_settings):
+    mocked_boto3.client().get_object.return_value = csv_dump_manifest(
+        {
+            'snapshot': {'key': 'buyers.csv', 'until': '2024-01-02T00:00:00+00:00'},
+            'deltas': [{'key': 'buyers-delta-20240103T000000.csv', 'since': '', 'until': '2024-01-03T00:00:00+00:00'}],
+            'compressed': False,
+        }
+    )
+
+    manifest = helpers.CSVDump(
+        bucket='my_ds_bucket', key='buyers.csv', write_csv=mock.Mock(), compaction_interval=datetime.timedelta(days=7)
+    ).export(mock.Mock(), incremental=True)
+
+    assert mocked_open_s3_upload.call_args.kwargs['key'] == 'buyers.csv'
+    assert manifest == {
+        'snapshot': {'key': 'buyers.csv', 'until': '2024-01-10T12:00:00+00:00'},
+        'deltas': [],
+        'compressed': False,
+    }
+    assert mocked_boto3.client().delete_objects.call_args == mock.call(
+        Bucket='my_ds_bucket', Delete={'Objects': [{'Key': 'buyers-delta-20240103T000000.csv'}], 'Quiet': True}
+    )
+
+
 def test_companies_house_client_consumes_auth(settings):
     helpers.CompaniesHouseClient.api_key = 'ff'
     with requests_mock.mock() as mock:
@@ -85,6 +226,61 @@ def test_companies_house_client_retrieve_profile():
     assert response.json() == profile
 
 
+@mock.patch('core.helpers.time')
+def test_token_bucket_waits_for_refill(mock_time):
+    mock_time.monotonic.side_effect = [0, 0, 0, 0.5, 1]
+    bucket = helpers.TokenBucket(requests=2, period=2)
+
+    bucket.acquire()
+    bucket.acquire()
+    bucket.acquire()
+
+    assert mock_time.sleep.call_args_list == [mock.call(0.5)]
+
+
+def test_outbound_request_reuses_session_per_host():
+    with requests_mock.mock() as mock:
+        mock.get('https://pooled.example.com/a', json={})
+        mock.get('https://pooled.example.com/b', json={})
+        helpers.outbound_request('get', 'https://pooled.example.com/a')
+        helpers.outbound_request('get', 'https://pooled.example.com/b')
+
+    assert helpers.get_outbound_session('https://pooled.example.com/a') is helpers.get_outbound_session(
+        'https://pooled.example.com/b'
+    )
+    assert helpers.get_outbound_session('https://pooled.example.com') is not helpers.get_outbound_session(
+        'https://other.example.com'
+    )
+    assert mock.last_request.timeout == settings.OUTBOUND_HTTP_TIMEOUT
+
+
+def test_outbound_request_opens_circuit_after_failures(caplog):
+    threshold = settings.OUTBOUND_HTTP_CIRCUIT_BREAKER_THRESHOLD
+    with requests_mock.mock() as mock:
+        mock.get('https://failing.example.com', status_code=503)
+        for _ in range(threshold):
+            assert helpers.outbound_request('get', 'https://failing.example.com').status_code == 503
+        with pytest.raises(helpers.CircuitOpenError):
+            helpers.outbound_request('get', 'https://failing.example.com')
+
+    assert mock.call_count == threshold
+    assert caplog.records[0].dependency == 'failing.example.com'
+    assert caplog.records[0].outcome == 503
+
+
+@mock.patch('core.helpers.time')
+def test_circuit_breaker_lets_a_trial_call_through_after_reset(mock_time):
+    mock_time.monotonic.side_effect = [0, 10, 30, 31]
+    breaker = helpers.CircuitBreaker(failure_threshold=1, reset_seconds=30)
+
+    breaker.record_failure()
+    assert breaker.allow() is False
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    breaker.record_success()
+    assert breaker.allow() is True
+
+
 def test_path_and_rename_logos_name_is_uuid():
     instance = mock.Mock(pk=1)
 
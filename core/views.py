@@ -1,11 +1,12 @@
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.template.loader import render_to_string
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import never_cache
 from django.views.generic import TemplateView
+from rest_framework.exceptions import NotFound
 from rest_framework.views import APIView
 
-from core.helpers import get_file_from_s3
+from core.helpers import get_csv_dump_manifest, get_csv_dump_manifest_key, get_file_from_s3
 from core.permissions import IsAuthenticatedCSVDump
 from core.pingdom.services import health_check_services
 
@@ -16,11 +17,34 @@ class CSVDumpAPIView(APIView):
     key = None
     filename = None
 
+    chunk_size = 64 * 1024
+
+    def get_key(self):
+        # ?file= fetches the dump's manifest, or one of the deltas that it lists, instead of the snapshot
+        requested = self.request.query_params.get('file')
+        if not requested:
+            return self.key
+        manifest_key = get_csv_dump_manifest_key(self.key)
+        manifest = get_csv_dump_manifest(bucket=self.bucket, key=self.key) or {'deltas': []}
+        if requested not in [manifest_key, *[delta['key'] for delta in manifest['deltas']]]:
+            raise NotFound()
+        return requested
+
     def get(self, request, format=None):
-        csv_file = get_file_from_s3(bucket=self.bucket, key=self.key)
-        response = HttpResponse(csv_file['Body'].read(), content_type="text/csv")
-        content = 'attachment; filename="{filename}"'.format(filename=self.filename)
+        key = self.get_key()
+        filename = self.filename if key == self.key else key
+        csv_file = get_file_from_s3(bucket=self.bucket, key=key)
+        # proxy the object a chunk at a time rather than reading it all into memory
+        response = StreamingHttpResponse(
+            csv_file['Body'].iter_chunks(self.chunk_size),
+            content_type='application/json' if key.endswith('.json') else "text/csv",
+        )
+        content = 'attachment; filename="{filename}"'.format(filename=filename)
         response['Content-Disposition'] = content
+        if csv_file.get('ContentLength') is not None:
+            response['Content-Length'] = csv_file['ContentLength']
+        if csv_file.get('ContentEncoding'):
+            response['Content-Encoding'] = csv_file['ContentEncoding']
         return response
 
 
@@ -1,5 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class DataservicesConfig(AppConfig):
     name = 'dataservices'
+
+    def ready(self):
+        from dataservices import helpers, signals, spatial
+
+        for model_name in (
+            spatial.LOCAL_SUPPORT_MODELS + helpers.VERSIONED_RESPONSE_MODELS + helpers.METADATA_REGISTRY_MODELS
+        ):
+            post_save.connect(receiver=signals.bump_model_generation, sender=f'dataservices.{model_name}')
+            post_delete.connect(receiver=signals.bump_model_generation, sender=f'dataservices.{model_name}')
+        m2m_changed.connect(
+            receiver=signals.bump_model_generation, sender=self.get_model('SupportHub').boundaries.through
+        )
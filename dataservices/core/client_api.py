@@ -5,6 +5,8 @@ from urllib.parse import quote_plus
 import requests
 from django.conf import settings
 
+from core.helpers import outbound_request
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,7 +21,7 @@ class APIClient:
         return f"{self.get_base_uri().rstrip('/')}/{path.lstrip('/')}"
 
     def request(self, method, uri, **kwargs):
-        response = getattr(requests, method)(uri, timeout=5, **kwargs)
+        response = outbound_request(method, uri, timeout=5, **kwargs)
         try:
             response.raise_for_status()
             return response
@@ -76,6 +76,17 @@ class S3DownloadMixin:
             if table is not None:
                 Base.metadata.drop_all(engine, [table], checkfirst=True)
 
+    # the versions of the objects downloaded by do_handle, by prefix
+    downloaded_source_versions = None
+
+    def get_latest_s3_object(self, prefix):
+        objects = [obj for page in get_s3_paginator(prefix) for obj in page.get('Contents', [])]
+        if objects:
+            return sorted(objects, key=lambda obj: obj['LastModified'])[-1]
+
+    def get_s3_source_version(self, obj):
+        return f'{obj["Key"]}:{obj.get("ETag", "")}:{obj["LastModified"].isoformat()}'
+
     def do_handle(self, prefix):
         """
         Download latest data file from s3
@@ -86,19 +97,13 @@ class S3DownloadMixin:
         """
         assert None not in [prefix]
 
-        page_iterator = get_s3_paginator(prefix)
-        files = []
-        for page in page_iterator:
-            if "Contents" in page:
-                for obj in page['Contents']:
-                    this_page = obj['Key']
-                    this_last_modified_date = obj['LastModified']
-                    files.append((this_page, this_last_modified_date))
-
-        if files:
-            last_added = sorted(files, key=lambda x: x[1])[-1][0]
-            s3_file = get_s3_file(last_added)
+        latest = self.get_latest_s3_object(prefix)
+        if latest:
+            s3_file = get_s3_file(latest['Key'])
             if s3_file:
+                if self.downloaded_source_versions is None:
+                    self.downloaded_source_versions = {}
+                self.downloaded_source_versions[prefix] = self.get_s3_source_version(latest)
                 body = s3_file.get('Body', None)
                 if body:
                     chunks = unzip_s3_gzip_file(body, (32 + zlib.MAX_WBITS))
@@ -7,7 +7,7 @@ class UKTopFiveGoodsExportsFilter(django_filters.rest_framework.FilterSet):
     iso2 = django_filters.CharFilter(field_name='country__iso2', lookup_expr='iexact', required=True)
 
     class Meta:
-        model = models.UKTradeInGoodsByCountry
+        model = models.UKTopExportsByCountry
         fields = ['iso2']
 
 
@@ -15,7 +15,7 @@ class UKTopFiveServicesExportsFilter(django_filters.rest_framework.FilterSet):
     iso2 = django_filters.CharFilter(field_name='country__iso2', lookup_expr='iexact', required=True)
 
     class Meta:
-        model = models.UKTradeInServicesByCountry
+        model = models.UKTopExportsByCountry
         fields = ['iso2']
 
 
@@ -29,10 +29,10 @@ class UKMarketTrendsFilter(django_filters.rest_framework.FilterSet):
 
 
 class UKTradeHighlightsFilter(django_filters.rest_framework.FilterSet):
-    iso2 = django_filters.CharFilter(field_name='country__iso2', lookup_expr='iexact', required=True)
+    iso2 = django_filters.CharFilter(field_name='iso2', lookup_expr='iexact', required=True)
 
     class Meta:
-        model = models.UKTotalTradeByCountry
+        model = models.UKTradeHighlightsByCountry
         fields = ['iso2']
 
 
@@ -44,21 +44,27 @@ class EconomicHighlightsFilter(django_filters.rest_framework.FilterSet):
         fields = ['iso2']
 
 
-class BusinessClusterInformationBySicFilter(django_filters.rest_framework.FilterSet):
-    sic_code = django_filters.CharFilter(field_name='sic_code', lookup_expr='iexact', required=True)
+class BusinessClusterCubeFilter(django_filters.rest_framework.FilterSet):
+    # cube keys are stored lowercased, so matching is case insensitive without a function on the column
+    def filter_key(self, queryset, name, value):
+        return queryset.filter(key=value.lower())
+
+
+class BusinessClusterInformationBySicFilter(BusinessClusterCubeFilter):
+    sic_code = django_filters.CharFilter(method='filter_key', required=True)
     geo_code = django_filters.BaseInFilter(field_name='geo_code', lookup_expr='in')
 
     class Meta:
-        model = models.EYBBusinessClusterInformation
+        model = models.EYBBusinessClusterCube
         fields = ['sic_code', 'geo_code']
 
 
-class BusinessClusterInformationByDBTSectorFilter(django_filters.rest_framework.FilterSet):
-    dbt_sector_name = django_filters.CharFilter(field_name='dbt_sector_name', lookup_expr='iexact', required=True)
+class BusinessClusterInformationByDBTSectorFilter(BusinessClusterCubeFilter):
+    dbt_sector_name = django_filters.CharFilter(method='filter_key', required=True)
     geo_code = django_filters.BaseInFilter(field_name='geo_code', lookup_expr='in')
 
     class Meta:
-        model = models.EYBBusinessClusterInformation
+        model = models.EYBBusinessClusterCube
         fields = ['dbt_sector_name', 'geo_code']
 
 
@@ -68,7 +74,7 @@ class EYBSalaryFilter(django_filters.rest_framework.FilterSet):
     geo_description = django_filters.CharFilter(field_name='geo_description', lookup_expr='iexact')
 
     class Meta:
-        model = models.EYBSalaryData
+        model = models.EYBLatestSalaryData
         fields = ['vertical', 'professional_level', 'geo_description']
 
 
@@ -1,35 +1,240 @@
+import functools
 import json
+import math
+import random
+import threading
+import time
+from collections import Counter
 
-import requests
+from django.apps import apps
 from django.core.cache import cache
-from django.db.models import Q
-from shapely.geometry import Point
+from django.db.models import F, Max, Q, Window
 
+from core.helpers import outbound_request
 from dataservices import models, serializers
+from exporting.models import Postcode
+
+CACHE_GENERATION_KEY = 'dataservices:generation:{model_name}'
+
+
+def increment_cache_counter(key, delta=1):
+    # cache.add only adds the key if it isn't present, so concurrent first increments are not lost
+    if not cache.add(key, delta, timeout=None):
+        cache.incr(key, delta)
+
+
+# Models whose endpoints answer conditional requests from a cached, pre-rendered body (see views.VersionedResponseMixin)
+VERSIONED_RESPONSE_MODELS = [
+    'CountryTerritoryRegion',
+    'DBTSector',
+    'Market',
+    'SectorGVAValueBand',
+    'UKFreeTradeAgreement',
+]
+
+# Models edited outside the import commands whose rows are held by metadata_registry
+METADATA_REGISTRY_MODELS = ['Country', 'Metadata']
+
+
+def bump_cache_generation(*model_names):
+    """
+    Invalidate everything cached against the given dataservices models. Called by the import commands once
+    new data has been written.
+    """
+    for model_name in model_names:
+        key = CACHE_GENERATION_KEY.format(model_name=model_name)
+        # Generations start from the current time rather than 1, so that a generation lost with the cache is not
+        # reused for different data, which would make stale ETags match
+        if not cache.add(key, int(time.time()), timeout=None):
+            cache.incr(key)
+
+
+def get_dataset_version(model_names):
+    """
+    The current generation of each of the given models, as a string that changes whenever any of them is bumped.
+    """
+    keys = [CACHE_GENERATION_KEY.format(model_name=model_name) for model_name in model_names]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, int(time.time()), timeout=None)
+            generations[key] = cache.get(key)
+    return '.'.join(str(generations[key]) for key in keys)
 
 
 class TTLCache:
-    def __init__(self, default_cache_max_age=60 * 60 * 24):
+    """
+    Memoize a function in the shared cache for ``default_cache_max_age`` seconds.
+
+    Empty results are cached like any other. Only one worker recomputes a cold key while the others wait for its
+    result, and entries are refreshed probabilistically shortly before they expire so a hot key is not recomputed
+    by every worker at once. Entries are invalidated as soon as the generation of any of ``models`` is bumped.
+    """
+
+    registry = {}
+    counter_names = ('hits', 'misses', 'recomputes')
+    lock_timeout = 30
+    lock_wait = 5
+    lock_poll_interval = 0.05
+    early_refresh_beta = 1.0
+    stats_flush_interval = 60
+
+    def __init__(self, default_cache_max_age=60 * 60 * 24, models=()):
         self.default_max_age = default_cache_max_age
+        self.generation_keys = [CACHE_GENERATION_KEY.format(model_name=model_name) for model_name in models]
+        self.counters = Counter()
+        self.counters_flushed_at = time.monotonic()
 
-    def get_cache_value(self, key):
-        return cache.get(key, default=None)
+    def get_cache_key(self, args, kwargs):
+        return 'dataservices:ttlcache:' + json.dumps([self.name, kwargs, args], sort_keys=True, separators=(',', ':'))
 
-    def set_cache_value(self, key, value):
-        cache.set(key, value, self.default_max_age)
+    def get_cache_value(self, key):
+        """
+        Return the cached entry for key, or None if it is missing or was stored under an older data generation.
+        """
+        values = cache.get_many([key, *self.generation_keys])
+        entry = values.get(key)
+        if entry is None or entry['generation'] != [values.get(k, 0) for k in self.generation_keys]:
+            return None
+        return entry
+
+    def set_cache_value(self, key, func, args, kwargs):
+        # Read the generation before computing so a bump during the computation leaves the entry stale
+        generations = cache.get_many(self.generation_keys)
+        started = time.time()
+        value = func(*args, **kwargs)
+        finished = time.time()
+        entry = {
+            'value': value,
+            'generation': [generations.get(k, 0) for k in self.generation_keys],
+            'delta': finished - started,
+            'expiry': finished + self.default_max_age,
+        }
+        cache.set(key, entry, self.default_max_age)
+        self.record('recomputes')
+        return value
+
+    def should_refresh_early(self, entry):
+        # Probabilistic early expiration: the closer the entry is to expiry and the more expensive it was to
+        # compute, the more likely a caller is to refresh it ahead of time.
+        return time.time() - entry['delta'] * self.early_refresh_beta * math.log(random.random()) >= entry['expiry']
+
+    def record(self, counter):
+        self.counters[counter] += 1
+        if time.monotonic() - self.counters_flushed_at >= self.stats_flush_interval:
+            self.flush_stats()
+
+    def flush_stats(self):
+        counters, self.counters = self.counters, Counter()
+        self.counters_flushed_at = time.monotonic()
+        for counter, value in counters.items():
+            increment_cache_counter(f'dataservices:ttlcache-stats:{self.name}:{counter}', value)
+
+    def stats(self):
+        keys = {counter: f'dataservices:ttlcache-stats:{self.name}:{counter}' for counter in self.counter_names}
+        values = cache.get_many(keys.values())
+        return {counter: values.get(key, 0) + self.counters[counter] for counter, key in keys.items()}
+
+    def get_or_set(self, func, args, kwargs):
+        key = self.get_cache_key(args, kwargs)
+        entry = self.get_cache_value(key)
+        if entry is not None and not self.should_refresh_early(entry):
+            self.record('hits')
+            return entry['value']
+
+        if entry is None:
+            self.record('misses')
+
+        lock_key = f'{key}:lock'
+        if cache.add(lock_key, 'acquired', self.lock_timeout):
+            try:
+                return self.set_cache_value(key, func, args, kwargs)
+            finally:
+                cache.delete(lock_key)
+
+        if entry is not None:
+            # Another worker is already refreshing this entry, keep serving the current value meanwhile
+            self.record('hits')
+            return entry['value']
+
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll_interval)
+            entry = self.get_cache_value(key)
+            if entry is not None:
+                return entry['value']
+
+        # The worker holding the lock is taking too long, compute the value here rather than fail the request
+        return self.set_cache_value(key, func, args, kwargs)
 
     def __call__(self, func):
+        self.name = func.__name__
+        self.registry[self.name] = self
+
+        @functools.wraps(func)
         def inner(*args, **kwargs):
-            cache_key = json.dumps([func.__name__, kwargs, args], sort_keys=True, separators=(',', ':'))
-            cached_value = self.get_cache_value(cache_key)
-            if not cached_value:
-                cached_value = func(*args, **kwargs)
-                self.set_cache_value(cache_key, cached_value)
-            return cached_value
+            return self.get_or_set(func, args, kwargs)
 
+        inner.ttl_cache = self
         return inner
 
 
+def get_cache_stats():
+    return {name: ttl_cache.stats() for name, ttl_cache in TTLCache.registry.items()}
+
+
+class MetadataRegistry:
+    """
+    In-process store of the metadata that MetadataMixin views add to their responses: the Metadata rows, the
+    countries by ISO2 and the current period of each dataset. Each is recomputed once the generation of a model it
+    was read from has been bumped, so reading one costs a cache lookup rather than a query.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, name, model_names, compute):
+        version = get_dataset_version(model_names)
+        entry = self.entries.get(name)
+        if entry is None or entry[0] != version:
+            with self.lock:
+                entry = self.entries.get(name)
+                if entry is None or entry[0] != version:
+                    # the version is read before computing, so a bump during the computation leaves it stale
+                    entry = (version, compute())
+                    self.entries[name] = entry
+        return entry[1]
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
+
+    def get_metadata(self, view_name):
+        metadata = self.get(
+            'metadata', ['Metadata'], lambda: dict(models.Metadata.objects.values_list('view_name', 'data'))
+        )
+        return metadata.get(view_name)
+
+    def get_country(self, iso2):
+        countries = self.get(
+            'countries',
+            ['Country'],
+            lambda: {
+                iso2.upper(): {'name': name, 'iso2': iso2}
+                for name, iso2 in models.Country.objects.values_list('name', 'iso2')
+            },
+        )
+        return countries.get(iso2.upper())
+
+    def get_current_period(self, manager):
+        model_name = manager.model.__name__
+        return self.get(f'current-period:{model_name}', [model_name], manager.get_current_period)
+
+
+metadata_registry = MetadataRegistry()
+
+
 def get_comtrade_data_by_country(commodity_code, country_list):
     '''
     Comtrade data is ingested annually. The trade_value is cumulative so we
@@ -46,7 +251,7 @@ def get_comtrade_data_by_country(commodity_code, country_list):
     return data
 
 
-@TTLCache()
+@TTLCache(models=['CIAFactbook'])
 def get_cia_factbook_data(country_name, data_keys=None):
     try:
         cia_data = models.CIAFactbook.objects.get(country_name=country_name).factbook_data
@@ -58,7 +263,7 @@ def get_cia_factbook_data(country_name, data_keys=None):
         return {}
 
 
-@TTLCache()
+@TTLCache(models=['InternetUsage', 'Country'])
 def get_internet_usage(country):
     try:
         internet_usage_obj = models.InternetUsage.objects.filter(country__name=country).latest('year')
@@ -72,7 +277,7 @@ def get_internet_usage(country):
         return {}
 
 
-@TTLCache()
+@TTLCache(models=['ConsumerPriceIndex'])
 def get_cpi_data(country):
     try:
         cpi_obj = models.ConsumerPriceIndex.objects.filter(country_name=country).latest('year')
@@ -86,7 +291,7 @@ def get_cpi_data(country):
         return {}
 
 
-@TTLCache()
+@TTLCache(models=['CIAFactbook'])
 def get_society_data(country):
     society_data = {}
     cia_people_data = get_cia_factbook_data(country, data_keys=['people'])
@@ -126,25 +331,103 @@ def get_multiple_serialized_instance_from_model(model_class, serializer_class, f
     out = {}
     fields = [field.name for field in model_class._meta.fields]
 
-    results = model_class.objects.filter(**filter_args)
+    results = model_class.objects.filter(**filter_args).select_related('country')
     if latest_only and 'year' in fields:
-        results = results.order_by('-year')
+        # Resolve the latest year per country in the database rather than walking an ordered result set
+        results = results.annotate(
+            latest_year=Window(expression=Max('year'), partition_by=[F('country_id')]),
+        ).filter(year=F('latest_year'))
+
+    instances = list(results)
+    serialized_instances = serializer_class(instances, many=True).data
+    for instance, serialized in zip(instances, serialized_instances):
+        out.setdefault(instance.country.iso2, {section_key: []})[section_key].append(serialized)
+    return out
+
 
-    if results:
-        for result in results:
-            iso = result.country.iso2
-            serialized = serializer_class(result).data
-            out[iso] = out.get(iso, {section_key: []})
-            if latest_only and out[iso][section_key]:
-                # We only want the latest, and we have a row - let's see if the new row matches year
-                if out[result.country.iso2][section_key][0].get('year') != serialized.get('year'):
-                    break
-            out[iso][section_key].append(serialized)
+def get_serialized_data_by_country(countries_list, field_specs):
+    """
+    Assemble the serialized instances of each requested model for the given countries, keyed by country iso2 then
+    by model name. Each field spec is either a model name or a dict of model, filter and latest_only, and results
+    in a single query against its model.
+    """
+    out = {}
+    for field_spec in field_specs:
+        if isinstance(field_spec, str):
+            field_spec = {'model': field_spec}
+        filter_args = {'country__iso2__in': countries_list, 'country__is_active': True}
+        filter_args.update(field_spec.get('filter', {}))
+        try:
+            model = apps.get_model('dataservices', field_spec['model'])
+        except LookupError:
+            continue
+        serializer = serializers.__dict__.get(field_spec['model'] + 'Serializer')
+        if model and serializer:
+            deep_extend(
+                out,
+                get_multiple_serialized_instance_from_model(
+                    model_class=model,
+                    serializer_class=serializer,
+                    filter_args=filter_args,
+                    section_key=field_spec['model'],
+                    latest_only=field_spec.get('latest_only', False),
+                ),
+            )
     return out
 
 
 def get_postcode_data(postcode):
-    response = requests.get(f'https://api.postcodes.io/postcodes/{postcode}', timeout=8)
+    """
+    Resolve a postcode from the ONS postcode directory ingested by import_postcodes_from_s3, falling back to
+    api.postcodes.io for postcodes that are missing locally or have no grid reference.
+    """
+    postcode = postcode.replace(' ', '').upper()
+    return get_local_postcode_data(postcode) or get_postcodes_io_data(postcode)
+
+
+def get_local_postcode_data(postcode):
+    records = Postcode.objects.filter(post_code=postcode, eastings__isnull=False).values(
+        'region',
+        'european_electoral_region',
+        'eastings',
+        'northings',
+        'latitude',
+        'longitude',
+        'country',
+        'admin_district',
+        'admin_district_code',
+        'admin_county_code',
+    )[:1]
+    if not records:
+        return None
+
+    record = records[0]
+    # Shaped like the postcodes.io response for a postcode with a full grid reference (quality 1)
+    return {
+        'status': 200,
+        'result': {
+            'postcode': f'{postcode[:-3]} {postcode[-3:]}',
+            'quality': 1,
+            'eastings': record['eastings'],
+            'northings': record['northings'],
+            'latitude': record['latitude'],
+            'longitude': record['longitude'],
+            'country': record['country'],
+            'region': record['region'],
+            'european_electoral_region': record['european_electoral_region'],
+            'admin_district': record['admin_district'],
+            'admin_county': None,
+            'codes': {
+                'admin_district': record['admin_district_code'],
+                'admin_county': record['admin_county_code'],
+            },
+        },
+    }
+
+
+@TTLCache(default_cache_max_age=60 * 60 * 24 * 7, models=['Postcode'])
+def get_postcodes_io_data(postcode):
+    response = outbound_request('get', f'https://api.postcodes.io/postcodes/{postcode}', timeout=8)
     data = response.json()
 
     # Less than or equal to 5 means the postcode data contains all necessary details to proceed.
@@ -153,7 +436,7 @@ def get_postcode_data(postcode):
         return data
 
     outcode = postcode[:-3]
-    outcode_response = requests.get(f'https://api.postcodes.io/outcodes/{outcode}', timeout=8)
+    outcode_response = outbound_request('get', f'https://api.postcodes.io/outcodes/{outcode}', timeout=8)
     if outcode_response.status_code != 200:
         return data
 
@@ -218,64 +501,22 @@ def get_support_hub_by_postcode(postcode_data):
                         }
                     )
     if not support_hubs:
-        hubs_by_distance = []
-        postcode_point = Point(postcode_data['eastings'], postcode_data['northings'])
-        hubs = models.SupportHub.objects.filter(place__isnull=False)
-        for hub in hubs:
-            place = models.Place.objects.filter(id=hub.place.id).values()[0]
-            contact_card = models.ContactCard.objects.filter(id=hub.contacts.id)[0]
-            distance = postcode_point.distance(Point(place['eastings'], place['northings']))
-            hub.boundaries.order_by
-            hubs_by_distance.append({'hub': hub, 'contact_card': contact_card, 'distance': distance})
-        closest_hub = sorted(hubs_by_distance, key=lambda d: d['distance'], reverse=False)[0]
-        hub_largest_boundary = closest_hub['hub'].boundaries.order_by('-type').values()[0]
-        support_hubs.append(
-            {
-                'name': closest_hub['hub'].name,
-                'digest': closest_hub['hub'].digest,
-                'contacts': {
-                    'website': closest_hub['contact_card'].website,
-                    'website_label': closest_hub['contact_card'].website_label,
-                    'phone': closest_hub['contact_card'].phone,
-                    'email': closest_hub['contact_card'].email,
-                    'contact_form': closest_hub['contact_card'].contact_form_url,
-                    'contact_form_label': closest_hub['contact_card'].contact_form_label,
-                },
-                'boundary_name': hub_largest_boundary['name'],
-                'boundary_type': models.BoundaryType(hub_largest_boundary['type']).label,
-                'boundary_level': hub_largest_boundary['type'],
-            }
-        )
+        from dataservices.spatial import support_hub_index
+
+        for closest_hub, _ in support_hub_index.nearest(postcode_data['eastings'], postcode_data['northings']):
+            support_hubs.append({**closest_hub})
 
     return support_hubs
 
 
 def get_chamber_by_postcode(postcode_data):
-    chambers_by_distance = []
+    from dataservices.spatial import chamber_of_commerce_index
+
     try:
         boundary = models.Boundary.objects.get(name=postcode_data['country'])
-        chambers = models.ChamberOfCommerce.objects.filter(boundary=boundary)
-        postcode_point = Point(postcode_data['eastings'], postcode_data['northings'])
-        for chamber in chambers:
-            place = models.Place.objects.filter(id=chamber.place.id).values()[0]
-            contact_card = models.ContactCard.objects.filter(id=chamber.contacts.id)[0]
-            distance = postcode_point.distance(Point(place['eastings'], place['northings']))
-            chambers_by_distance.append(
-                {
-                    'name': chamber.name,
-                    'digest': chamber.digest,
-                    'contacts': {
-                        'website': contact_card.website,
-                        'website_label': contact_card.website_label,
-                        'phone': contact_card.phone,
-                        'email': contact_card.email,
-                        'contact_form': contact_card.contact_form_url,
-                        'contact_form_label': contact_card.contact_form_label,
-                    },
-                    'place': place,
-                    'distance': distance,
-                }
-            )
-        return sorted(chambers_by_distance, key=lambda d: d['distance'], reverse=False)[:5]
     except models.Boundary.DoesNotExist:
         return []
+    closest_chambers = chamber_of_commerce_index.nearest(
+        postcode_data['eastings'], postcode_data['northings'], k=5, group=boundary.id
+    )
+    return [{**chamber, 'distance': distance} for chamber, distance in closest_chambers]
@@ -0,0 +1,65 @@
+import random
+import timeit
+
+from django.core.management import BaseCommand
+from shapely.geometry import Point
+
+from dataservices import models
+from dataservices.spatial import chamber_of_commerce_index, support_hub_index
+
+
+def closest_chambers_by_loop(eastings, northings, boundary):
+    # The per-chamber query loop that chamber_of_commerce_index replaces, kept for comparison
+    chambers_by_distance = []
+    postcode_point = Point(eastings, northings)
+    for chamber in models.ChamberOfCommerce.objects.filter(boundary=boundary):
+        place = models.Place.objects.filter(id=chamber.place.id).values()[0]
+        models.ContactCard.objects.filter(id=chamber.contacts.id)[0]
+        distance = postcode_point.distance(Point(float(place['eastings']), float(place['northings'])))
+        chambers_by_distance.append({'name': chamber.name, 'distance': distance})
+    return sorted(chambers_by_distance, key=lambda d: d['distance'])[:5]
+
+
+def closest_hub_by_loop(eastings, northings):
+    # The per-hub query loop that support_hub_index replaces, kept for comparison
+    hubs_by_distance = []
+    postcode_point = Point(eastings, northings)
+    for hub in models.SupportHub.objects.filter(place__isnull=False):
+        place = models.Place.objects.filter(id=hub.place.id).values()[0]
+        models.ContactCard.objects.filter(id=hub.contacts.id)[0]
+        distance = postcode_point.distance(Point(float(place['eastings']), float(place['northings'])))
+        hubs_by_distance.append({'name': hub.name, 'distance': distance})
+    return sorted(hubs_by_distance, key=lambda d: d['distance'])[:1]
+
+
+class Command(BaseCommand):
+    help = 'Compare nearest support hub and chamber of commerce lookups against the previous per-row query loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, default=100, help='Number of random points to look up')
+
+    def handle(self, *args, **options):
+        # Eastings/northings bounding box of Great Britain
+        points = [(random.uniform(0, 700000), random.uniform(0, 1300000)) for _ in range(options['points'])]
+        boundary = models.Boundary.objects.filter(chamberofcommerce__isnull=False).first()
+
+        support_hub_index.refresh_if_stale()
+        chamber_of_commerce_index.refresh_if_stale()
+        self.stdout.write(
+            f'{len(support_hub_index.entries)} support hubs, {len(chamber_of_commerce_index.entries)} chambers, '
+            f'{len(points)} points'
+        )
+
+        timings = {
+            'support hub loop': lambda: [closest_hub_by_loop(e, n) for e, n in points],
+            'support hub index': lambda: [support_hub_index.nearest(e, n) for e, n in points],
+        }
+        if boundary:
+            timings['chamber loop'] = lambda: [closest_chambers_by_loop(e, n, boundary) for e, n in points]
+            timings['chamber index'] = lambda: [
+                chamber_of_commerce_index.nearest(e, n, k=5, group=boundary.id) for e, n in points
+            ]
+
+        for name, lookup in timings.items():
+            seconds = timeit.timeit(lookup, number=1)
+            self.stdout.write(f'{name}: {seconds * 1000 / len(points):.3f}ms per lookup')
@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from dataservices.helpers import get_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Report hit, miss and recompute counts for the dataservices TTL caches'
+
+    def handle(self, *args, **options):
+        for name, stats in get_cache_stats().items():
+            lookups = stats['hits'] + stats['misses']
+            hit_rate = stats['hits'] / lookups * 100 if lookups else 0
+            self.stdout.write(
+                f'{name}: {stats["hits"]} hits, {stats["misses"]} misses, {stats["recomputes"]} recomputes '
+                f'({hit_rate:.1f}% hit rate)'
+            )
@@ -1,4 +1,8 @@
+import csv
 import io
+import itertools
+import logging
+from contextlib import contextmanager
 from zipfile import ZipFile
 
 import pandas as pd
@@ -7,11 +11,14 @@ import requests
 import sqlalchemy as sa
 import xmltodict
 from dateutil import parser
+from django.apps import apps
 from django.conf import settings
 from django.core.management import BaseCommand
+from django.db import connection, transaction
 
 from core.helpers import notifications_client
-from dataservices.models import Metadata
+from dataservices.helpers import bump_cache_generation
+from dataservices.models import IngestedSource, Metadata
 
 
 def flatten_ordered_dict(d):
@@ -47,7 +54,22 @@ def send_ingest_error_notify_email(view_name, error_details):
 
 
 class BaseDataWorkspaceIngestionCommand(BaseCommand):
+    """
+    Subclasses either provide sql, a query against Data Workspace, and get_postgres_table(), the table its rows
+    replace, or implement load_data() to return the model instances that replace the model's rows.
+
+    Rows from sql are streamed with COPY into a staging table, which is indexed and then swapped for the live table
+    in one transaction, so readers keep seeing the previous rows until the new ones are complete and memory use does
+    not grow with the dataset.
+
+    When source_table_names lists the Data Workspace tables the command reads, a write is skipped unless one of
+    them has been swapped in by dataflow since the last write.
+    """
+
     engine = sa.create_engine(settings.DATA_WORKSPACE_DATASETS_URL, execution_options={'stream_results': True})
+    source_table_names = []
+    sql = None
+    bulk_create_batch_size = 1000
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -55,32 +77,113 @@ class BaseDataWorkspaceIngestionCommand(BaseCommand):
             action='store_true',
             help='Store dataset records',
         )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Write even if the source is unchanged since the last write',
+        )
+
+    @property
+    def ingestion_name(self):
+        return self.__module__.rsplit('.', 1)[-1]
+
+    def get_source_watermark(self):
+        sql = sa.text(
+            '''
+            SELECT
+                max(dataflow_swapped_tables_utc)
+            FROM
+                dataflow.metadata
+            WHERE
+                table_name IN :table_names;
+        '''
+        ).bindparams(sa.bindparam('table_names', expanding=True))
+        with self.engine.connect() as connection:
+            watermark = connection.execute(sql, {'table_names': self.source_table_names}).scalar()
+        return watermark.isoformat() if watermark else None
 
     def load_data(self):
         """
-        The procedure for fetching the data. Subclasses must implement this method.
+        The procedure for fetching the data. Subclasses must implement this method unless they provide sql.
         """
         raise NotImplementedError('subclasses of MarketGuidesDataIngestionCommand must provide a load_data() method')
 
-    def handle(self, *args, **options):
-        data = self.load_data()
-        prefix = 'Would create'
-        count = len(data)
+    def get_postgres_table(self, metadata):
+        """
+        The table that the rows of sql replace, with columns in the order sql selects them.
+        """
+        raise NotImplementedError('subclasses of BaseDataWorkspaceIngestionCommand with sql must provide a table')
 
-        if options['write']:
-            prefix = 'Created'
-            model = data[0].__class__
+    def count_source_rows(self):
+        with self.engine.connect() as connection:
+            return connection.execute(sa.text(f'SELECT count(*) FROM ({self.sql}) AS source')).scalar()
+
+    def swap_in_source_rows(self):
+        metadata = sa.MetaData()
+        data_table = self.get_postgres_table(metadata)
+        count = 0
+
+        def get_table_data(rows):
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield data_table, tuple(row)
+
+        def on_before_visible(conn, ingest_table, batch_metadata):
+            pass
+
+        def batches(_):
+            # a single batch, so that the staging table is only swapped in once every row has been copied
+            with self.engine.connect() as connection:
+                yield None, None, get_table_data(connection.execute(sa.text(self.sql)))
+
+        ingest_data(sa.create_engine(settings.DATABASE_URL, future=True), metadata, on_before_visible, batches)
+        return count
+
+    def replace_model_rows(self, data):
+        model = data[0].__class__
+        # readers see the previous rows until the new ones are committed
+        with transaction.atomic():
             model.objects.all().delete()
-            model.objects.bulk_create(data)
+            model.objects.bulk_create(data, batch_size=self.bulk_create_batch_size)
+        bump_cache_generation(model.__name__)
+
+    def handle(self, *args, **options):
+        watermark = self.get_source_watermark() if options['write'] and self.source_table_names else None
+        if watermark and not options['force']:
+            ingested = get_ingested_source_versions(self.ingestion_name)
+            if ingested.get('dataflow.metadata') == watermark:
+                self.stdout.write(self.style.SUCCESS('Source unchanged since the last import, nothing to do.'))
+                return
+
+        prefix = 'Created' if options['write'] else 'Would create'
+        if self.sql is None:
+            data = self.load_data()
+            count = len(data)
+            if options['write']:
+                self.replace_model_rows(data)
+        elif options['write']:
+            count = self.swap_in_source_rows()
+        else:
+            count = self.count_source_rows()
+
+        if options['write'] and watermark:
+            save_ingested_source_versions(self.ingestion_name, {'dataflow.metadata': watermark})
 
         self.stdout.write(self.style.SUCCESS(f'{prefix} {count} records.'))
 
 
 class BaseS3IngestionCommand(BaseCommand):
+    """
+    Subclasses mix in S3DownloadMixin. When s3_prefix_settings names the settings holding every prefix the command
+    downloads from, a write is skipped unless the newest object under one of them has changed since the last
+    write that completed without logging an error.
+    """
 
     save_func = None
     engine = sa.create_engine(settings.DATABASE_URL, future=True)
     metadata = sa.MetaData()
+    s3_prefix_settings = []
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -88,6 +191,25 @@ class BaseS3IngestionCommand(BaseCommand):
             action='store_true',
             help='Store dataset records',
         )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Write even if the source is unchanged since the last write',
+        )
+
+    @property
+    def ingestion_name(self):
+        return self.__module__.rsplit('.', 1)[-1]
+
+    def is_source_unchanged(self):
+        if not self.s3_prefix_settings:
+            return False
+        ingested = get_ingested_source_versions(self.ingestion_name)
+        for prefix in [getattr(settings, name) for name in self.s3_prefix_settings]:
+            latest = self.get_latest_s3_object(prefix)
+            if not latest or ingested.get(prefix) != self.get_s3_source_version(latest):
+                return False
+        return True
 
     def load_data(self):
         """
@@ -117,10 +239,18 @@ class BaseS3IngestionCommand(BaseCommand):
         if not options['write']:
             data = self.load_data(delete_temp_tables=True)
             prefix = 'Would create'
+        elif not options['force'] and self.is_source_unchanged():
+            self.stdout.write(self.style.SUCCESS('Source unchanged since the last import, nothing to do.'))
+            return
         else:
             prefix = 'Created'
-            data = self.load_data(delete_temp_tables=False)
-            self.save_import_data(data)
+            # importers log rather than raise most errors, so those are what mark an import as incomplete. They are
+            # also logged by the shared ingestion and HTTP helpers, outside the command's own module.
+            with capture_logged_errors('dataservices', 'core') as errors:
+                data = self.load_data(delete_temp_tables=False)
+                self.save_import_data(data)
+            if not errors and self.downloaded_source_versions:
+                save_ingested_source_versions(self.ingestion_name, self.downloaded_source_versions)
 
         if isinstance(data, list):
             count = len(data)
@@ -191,6 +321,33 @@ def align_vertical_names(statista_vertical_name: str) -> str:
     return mapping[statista_vertical_name] if statista_vertical_name in mapping.keys() else statista_vertical_name
 
 
+@contextmanager
+def capture_logged_errors(*logger_names):
+    """
+    Collect the records of errors logged to the named loggers, or their children, within the block.
+    """
+    errors = []
+    handler = logging.Handler(logging.ERROR)
+    handler.emit = errors.append
+    loggers = [logging.getLogger(logger_name) for logger_name in logger_names]
+    for logger in loggers:
+        logger.addHandler(handler)
+    try:
+        yield errors
+    finally:
+        for logger in loggers:
+            logger.removeHandler(handler)
+
+
+def get_ingested_source_versions(command):
+    return dict(IngestedSource.objects.filter(command=command).values_list('source', 'version'))
+
+
+def save_ingested_source_versions(command, versions):
+    for source, version in versions.items():
+        IngestedSource.objects.update_or_create(command=command, source=source, defaults={'version': version})
+
+
 def ingest_data(engine, metadata, on_before_visible, batches, delete=pg_bulk_ingest.Delete.BEFORE_FIRST_BATCH):
     with engine.connect() as conn:
         pg_bulk_ingest.ingest(
@@ -202,3 +359,32 @@ def ingest_data(engine, metadata, on_before_visible, batches, delete=pg_bulk_ing
             upsert=pg_bulk_ingest.Upsert.OFF,
             delete=delete,
         )
+    # Invalidate cached responses for the models behind the ingested tables; temporary tables have no model
+    models_by_table = {model._meta.db_table: model.__name__ for model in apps.get_models()}
+    bump_cache_generation(*[models_by_table[name] for name in metadata.tables if name in models_by_table])
+
+
+def copy_rows(table, columns, rows, batch_size=None, offset=0, on_batch=None):
+    """
+    Stream rows into a table with COPY, committing a batch at a time, and return the number of rows consumed.
+
+    The first offset rows are skipped, and on_batch is called inside the transaction of every batch with the offset
+    it reaches, so that a checkpoint saved to the database commits or rolls back together with the batch.
+    """
+    batch_size = batch_size or settings.COPY_BATCH_SIZE
+    statement = f'COPY {table} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)'
+    rows = itertools.islice(rows, offset, None)
+    with connection.cursor() as cursor:
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                return offset
+            # unquoted empty CSV values are loaded as NULL
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(batch)
+            buffer.seek(0)
+            with transaction.atomic():
+                cursor.copy_expert(statement, buffer)
+                offset += len(batch)
+                if on_batch:
+                    on_batch(offset)
@@ -1,39 +1,241 @@
+import hashlib
 import os
+import queue
+import resource
+import time
+from collections import namedtuple
+from multiprocessing import get_context
 
-from django.core.management import BaseCommand, call_command
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connections
+
+Importer = namedtuple('Importer', ['command', 'dependencies', 'models', 'sources', 'args'], defaults=((), (), (), ()))
+
+RAN = 'ran'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+BLOCKED = 'blocked'
+
+
+def get_source_signature(sources):
+    if not sources:
+        return None
+    digest = hashlib.sha1()
+    for source in sources:
+        with open(source, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def get_peak_memory():
+    # in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_importer(importer, force):
+    """
+    Run an importer unless its sources are unchanged since it last succeeded and its tables are populated.
+    Returns the outcome with the time taken and the rows in its tables.
+    """
+
+    def get_rows():
+        return sum(apps.get_model('dataservices', name).objects.count() for name in importer.models)
+
+    signature_key = f'import-all:source:{importer.command}'
+    signature = get_source_signature(importer.sources)
+    if not force and signature and cache.get(signature_key) == signature and get_rows():
+        return {'status': SKIPPED}
+
+    start = time.monotonic()
+    with open(os.devnull, 'w') as devnull:
+        call_command(importer.command, *importer.args, stdout=devnull)
+    seconds = time.monotonic() - start
+    if signature:
+        cache.set(signature_key, signature, timeout=None)
+    return {'status': RAN, 'seconds': seconds, 'rows': get_rows()}
+
+
+def run_importer_in_child(importer, force):
+    """
+    run_importer for a pool process that runs no other importer, so the peak memory of the process is the
+    importer's own and is added to the outcome.
+    """
+    outcome = run_importer(importer, force)
+    if outcome['status'] == RAN:
+        outcome['peak_memory'] = get_peak_memory()
+    return outcome
 
 
 class Command(BaseCommand):
     help = 'Import all dataservices data'
 
-    command_list = [
-        'import_countries',
-        'import_cia_factbook_data',
-        'import_cpi_data',
-        'import_currency_data',
-        'import_population_urbanrural',
-        'import_rank_of_law_data',
-        'import_suggested_countries',
-        'import_target_age_groups',
-        'import_trading_blocs',
-        'import_weo_data',
-        # 'import_worldbank_data',
+    importers = [
+        Importer(
+            'import_countries',
+            models=['Country'],
+            sources=['dataservices/resources/countries-territories-and-regions-5.35.csv'],
+        ),
+        Importer('import_cia_factbook_data', dependencies=['import_countries'], models=['CIAFactbook']),
+        Importer(
+            'import_cpi_data',
+            dependencies=['import_countries'],
+            models=['CorruptionPerceptionsIndex'],
+            sources=['dataservices/resources/corruption_perception_index.csv'],
+        ),
+        Importer(
+            'import_currency_data',
+            dependencies=['import_countries'],
+            models=['Currency'],
+            sources=['dataservices/resources/Currency.ISO.csv'],
+        ),
+        Importer(
+            'import_population_urbanrural',
+            dependencies=['import_countries'],
+            models=['PopulationUrbanRural'],
+            sources=[
+                'dataservices/resources/urban_population_annual.csv',
+                'dataservices/resources/rural_population_annual.csv',
+            ],
+        ),
+        Importer(
+            'import_rank_of_law_data',
+            dependencies=['import_countries'],
+            models=['RuleOfLaw'],
+            sources=['dataservices/resources/rule_of_law_rank.csv'],
+        ),
+        Importer('import_suggested_countries', dependencies=['import_countries'], models=['SuggestedCountry']),
+        Importer(
+            'import_target_age_groups',
+            dependencies=['import_countries'],
+            models=['PopulationData'],
+            sources=[
+                'dataservices/resources/world_population_medium_male.csv',
+                'dataservices/resources/world_population_medium_female.csv',
+            ],
+        ),
+        Importer(
+            'import_trading_blocs',
+            dependencies=['import_countries'],
+            models=['TradingBlocs'],
+            sources=['dataservices/resources/countries-and-territories-trading-blocs-25.0.csv'],
+        ),
+        Importer('import_weo_data', models=['WorldEconomicOutlook'], sources=['dataservices/resources/weo.csv']),
+        # Importer('import_worldbank_data'),
     ]
 
-    def run_command(self, command, **options):
-        f = open(os.devnull, 'w')
-        self.stdout.write('Running ' + command)
-        call_command(command, stdout=f)
-        self.stdout.write(self.style.SUCCESS('Complete'))
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--comtrade-period',
+            type=str,
+            help='Also import the Comtrade data for this period',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.IMPORT_ALL_WORKERS,
+            help='Number of importers to run at once',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Run importers even if their sources are unchanged since the last run',
+        )
+
+    def get_importers(self, options):
+        importers = list(self.importers)
+        if options['comtrade_period']:
+            importers.append(
+                Importer(
+                    'import_comtrade_data',
+                    dependencies=['import_countries'],
+                    models=['ComtradeReport'],
+                    args=['--period', options['comtrade_period'], '--load_data', '--write'],
+                )
+            )
+        return importers
+
+    def report(self, command, outcome):
+        if outcome['status'] == RAN:
+            message = f'{command} complete in {outcome["seconds"]:.1f}s, {outcome["rows"]} rows'
+            if 'peak_memory' in outcome:
+                message += f', peak memory {outcome["peak_memory"] // 1024}MB'
+            self.stdout.write(self.style.SUCCESS(message))
+        elif outcome['status'] == SKIPPED:
+            self.stdout.write(f'{command} skipped as its source is unchanged')
+        elif outcome['status'] == BLOCKED:
+            self.stdout.write(self.style.WARNING(f'{command} not run as a dependency failed'))
+        else:
+            self.stdout.write(self.style.ERROR(f'{command} failed: {outcome["error"]!r}'))
 
     def handle(self, *args, **options):
-        for command in self.command_list:
-            self.run_command(command)
+        """
+        Run every importer once all of its dependencies have finished, up to --workers at a time. With more than
+        one worker, each importer runs in a fresh process and its own peak memory is reported. With one, they all
+        run in this process, whose peak memory is reported once at the end. An importer whose dependency ran is
+        never skipped, as the rows it links to may have been replaced.
+        """
+        importers = self.get_importers(options)
+        commands = {importer.command for importer in importers}
+        for importer in importers:
+            if not commands.issuperset(importer.dependencies):
+                raise CommandError(f'{importer.command} depends on an unknown importer')
+        outcomes = {}
+        started = set()
+        finished = queue.Queue()
+        pool = None
+        if options['workers'] > 1:
+            # forked processes must not share the database connections of this one, which doesn't use them again
+            connections.close_all()
+            pool = get_context('fork').Pool(options['workers'], maxtasksperchild=1)
 
+        try:
+            while len(outcomes) < len(importers):
+                for importer in importers:
+                    command = importer.command
+                    if command in started or any(dependency not in outcomes for dependency in importer.dependencies):
+                        continue
+                    started.add(command)
+                    dependency_outcomes = [outcomes[dependency]['status'] for dependency in importer.dependencies]
+                    force = options['force'] or RAN in dependency_outcomes
+                    if FAILED in dependency_outcomes or BLOCKED in dependency_outcomes:
+                        finished.put((command, {'status': BLOCKED}))
+                    elif pool:
+                        self.stdout.write('Running ' + command)
+                        pool.apply_async(
+                            run_importer_in_child,
+                            (importer, force),
+                            callback=lambda outcome, command=command: finished.put((command, outcome)),
+                            error_callback=lambda error, command=command: finished.put(
+                                (command, {'status': FAILED, 'error': error})
+                            ),
+                        )
+                    else:
+                        self.stdout.write('Running ' + command)
+                        try:
+                            finished.put((command, run_importer(importer, force)))
+                        except Exception as error:
+                            finished.put((command, {'status': FAILED, 'error': error}))
+                command, outcome = finished.get()
+                outcomes[command] = outcome
+                self.report(command, outcome)
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        if not pool:
+            self.stdout.write(f'Peak memory of the import, across all importers, {get_peak_memory() // 1024}MB')
+        failed = [command for command, outcome in outcomes.items() if outcome['status'] == FAILED]
+        if failed:
+            raise CommandError(f'Import all data - {", ".join(failed)} failed')
         self.stdout.write(self.style.SUCCESS('Import all data - Complete'))
-        self.stdout.write(
-            self.style.WARNING(
-                'The ComTrade data import takes longer and has not been run. '
-                'Run it separately with the `import_comtrade_data` management command.'
+        if not options['comtrade_period']:
+            self.stdout.write(
+                self.style.WARNING(
+                    'The ComTrade data import has not been run as no period was given. '
+                    'Pass --comtrade-period to include it.'
+                )
             )
-        )
@@ -1,6 +1,7 @@
 import requests
 from django.core.management import BaseCommand
 
+from dataservices.helpers import bump_cache_generation
 from dataservices.models import CIAFactbook, Country
 
 name_map = {
@@ -48,4 +49,5 @@ class Command(BaseCommand):
                 country_key=country, country=country_ref, country_name=country_name, factbook_data=country_data
             ).save()
 
+        bump_cache_generation('CIAFactbook')
         self.stdout.write(self.style.SUCCESS('All done, bye!'))
@@ -1,6 +1,10 @@
 import csv
+import itertools
 import json
 import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import pandas as pd
 import pg_bulk_ingest
@@ -9,54 +13,110 @@ from django.conf import settings
 from django.db import connection
 from django.db.models import Max
 
-from core.helpers import get_s3_file_stream
+from core.helpers import get_file_from_s3
 from dataservices.core.mixins import S3DownloadMixin
-from dataservices.management.commands.helpers import BaseS3IngestionCommand, ingest_data
-from dataservices.models import ComtradeReport
+from dataservices.management.commands.helpers import BaseS3IngestionCommand, copy_rows, ingest_data
+from dataservices.models import ComtradeReport, Country, ImportCheckpoint
 
 logger = logging.getLogger(__name__)
 
 LIVE_TABLE = 'dataservices_comtradereport'
+COMTRADE_FIELDS = [
+    'year',
+    'period',
+    'classification',
+    'commodity_code',
+    'trade_flow_code',
+    'reporter_country_iso3',
+    'partner_country_iso3',
+    'fob_trade_value_in_usd',
+]
+
+
+def iter_line_chunks(data, chunk_size):
+    lines = iter(data)
+    while True:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def classify_comtrade_lines(lines, period):
+    """
+    Parse a chunk of Comtrade JSON lines and keep those of the period that are UK exports or world imports, as
+    (year, classification, country_iso3, uk_or_world, commodity_code, trade_value) tuples.
+    """
+    # only lines mentioning the UK or the world can be kept, and a substring test is far cheaper than decoding
+    # the rest. The survivors are decoded as one JSON array, which is about twice as fast as line by line
+    candidates = [line for line in lines if '"GBR"' in line or '"W00"' in line]
+    records = json.loads('[' + ','.join(candidates) + ']')
+    if not records:
+        return []
+    df = pd.DataFrame(records, columns=COMTRADE_FIELDS)
+    df = df[df['period'].astype(str) == period]
+
+    flow = df['trade_flow_code']
+    uk_exports = (df['reporter_country_iso3'] == 'GBR') & (flow == 'X')
+    world_imports = (df['partner_country_iso3'] == 'W00') & (flow == 'M')
+    # a line is never both, as they need different flows
+    country_iso3 = df['partner_country_iso3'].where(uk_exports, df['reporter_country_iso3'])
+    keep = (uk_exports | world_imports) & country_iso3.notna() & (country_iso3 != '')
+    df = df[keep]
+
+    return list(
+        zip(
+            df['year'].tolist(),
+            df['classification'].tolist(),
+            country_iso3[keep].tolist(),
+            uk_exports[keep].map({True: 'GBR', False: 'WLD'}).tolist(),
+            df['commodity_code'].tolist(),
+            df['fob_trade_value_in_usd'].fillna(0.0).tolist(),
+        )
+    )
 
 
-def get_comtrade_batch(data, data_table, period, row_count):
-
-    def get_table_data(row_count):
+def iter_comtrade_rows(data, period, processes=1, chunk_size=None):
+    """
+    The classified rows of every chunk of lines, in file order. With more than one process, a few chunks per
+    process are parsed ahead so that the file is never held in memory whole.
+    """
+    chunks = iter_line_chunks(data, chunk_size or settings.COMTRADE_INGEST_CHUNK_SIZE)
+    if processes <= 1:
+        for chunk in chunks:
+            yield from classify_comtrade_lines(chunk, period)
+        return
 
-        for comtrade in data:
+    with ProcessPoolExecutor(processes) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(classify_comtrade_lines, chunk, period))
+            if len(pending) > processes * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
 
-            line = json.loads(comtrade)
-            if str(line['period']) != period:
-                continue
 
-            flow = line['trade_flow_code']
-            uk_or_world = None
-            country_iso3 = None
-            if line['reporter_country_iso3'] == 'GBR' and flow == 'X':
-                uk_or_world = line['reporter_country_iso3']
-                country_iso3 = line['partner_country_iso3']
-            if line['partner_country_iso3'] == 'W00' and flow == 'M':
-                uk_or_world = 'WLD'
-                country_iso3 = line['reporter_country_iso3']
+def get_comtrade_batch(data, data_table, period, row_count, country_ids=None, processes=1):
 
-            trade_value = line['fob_trade_value_in_usd']
-            if pd.isna(trade_value):
-                trade_value = 0.0
-            if not country_iso3 or not uk_or_world:
-                continue
+    country_ids = country_ids or {}
 
+    def get_table_data(row_count):
+        for year, classification, country_iso3, uk_or_world, commodity_code, trade_value in iter_comtrade_rows(
+            data, period, processes
+        ):
             row_count += 1
             yield (
                 (
                     data_table,
                     (
-                        line['year'],
-                        line['classification'],
+                        year,
+                        classification,
                         country_iso3,
                         uk_or_world,
-                        line['commodity_code'],
+                        commodity_code,
                         trade_value,
-                        None,
+                        country_ids.get(country_iso3),
                         row_count,
                     ),
                 )
@@ -87,29 +147,61 @@ def get_comtrade_table(metadata):
     )
 
 
-def filter_data_by_period_count(data, period):
-
-    cnt = 0
-    for row in data:
-        line = json.loads(row)
-        if str(line['period']) == period:
-            flow = line['trade_flow_code']
-            uk_or_world = None
-            country_iso3 = None
-            if line['reporter_country_iso3'] == 'GBR' and flow == 'X':
-                uk_or_world = line['reporter_country_iso3']
-                country_iso3 = line['partner_country_iso3']
-            if line['partner_country_iso3'] == 'W00' and flow == 'M':
-                uk_or_world = 'WLD'
-                country_iso3 = line['reporter_country_iso3']
+def filter_data_by_period_count(data, period, processes=1):
+    return sum(1 for _ in iter_comtrade_rows(data, period, processes))
+
+
+RAW_FILE_COLUMNS = [
+    'year',
+    'classification',
+    'country_iso3',
+    'uk_or_world',
+    'commodity_code',
+    'trade_value',
+    'country_id',
+]
+S3_FILE_COLUMNS = ['id', *RAW_FILE_COLUMNS]
+
+
+def get_raw_file_rows(file_reader, country_ids):
+    # rows of a file as downloaded from comtrade, as RAW_FILE_COLUMNS
+    for row in file_reader:
+        reporter_iso3 = row.get('Reporter ISO')
+        partner_iso3 = row.get('Partner ISO')
+        flow = row.get('Trade Flow')
+        uk_or_world = None
+        country_iso3 = None
+        if reporter_iso3 == 'GBR' and flow == 'Export':
+            uk_or_world = reporter_iso3
+            country_iso3 = partner_iso3
+        if partner_iso3 == 'WLD' and flow == 'Import':
+            uk_or_world = partner_iso3
+            country_iso3 = reporter_iso3
+        if country_iso3 and uk_or_world:
+            yield (
+                row.get('Year'),
+                row.get('Classification'),
+                country_iso3,
+                uk_or_world,
+                row.get('Commodity Code'),
+                float(row.get('Trade Value (US$)') or '0'),
+                country_ids.get(country_iso3),
+            )
 
-            trade_value = line['fob_trade_value_in_usd']
-            if pd.isna(trade_value):
-                trade_value = 0.0
-            if country_iso3 and uk_or_world:
-                cnt += 1
 
-    return cnt
+def get_s3_file_rows(file_reader, country_ids):
+    # rows of an export of the comtrade table, as S3_FILE_COLUMNS
+    for row in file_reader:
+        yield (
+            row.get('id'),
+            row.get('year'),
+            row.get('classification'),
+            row.get('country_iso3'),
+            row.get('uk_or_world'),
+            row.get('commodity_code'),
+            row.get('trade_value'),
+            country_ids.get(row.get('country_iso3')),
+        )
 
 
 class Command(BaseS3IngestionCommand, S3DownloadMixin):
@@ -125,42 +217,39 @@ class Command(BaseS3IngestionCommand, S3DownloadMixin):
                 from dataservices_country as c where d.country_iso3=c.iso3;"
             )
 
-    def load_raw_files(self, filenames):
+    def copy_rows(self, filename, file_version, columns, rows, resume):
+        """
+        Bulk load rows read from a file, reporting progress and checkpointing the offset reached with every batch
+        so that --resume can continue an interrupted load of the same version of the file.
+        """
+        checkpoints = ImportCheckpoint.objects.filter(command=self.ingestion_name, filename=filename)
+        checkpoint = checkpoints.filter(file_version=file_version).first() if resume else None
+        offset = checkpoint.offset if checkpoint else 0
+        if offset:
+            self.stdout.write(f'Resuming {filename} after {offset} rows')
+
+        def on_batch(offset):
+            ImportCheckpoint.objects.update_or_create(
+                command=self.ingestion_name, filename=filename, file_version=file_version, defaults={'offset': offset}
+            )
+            self.stdout.write(f'  {offset} rows written')
+
+        written = copy_rows(LIVE_TABLE, columns, rows, offset=offset, on_batch=on_batch)
+        checkpoints.delete()
+        return written
+
+    def load_raw_files(self, filenames, resume=False):
         # Loads a raw file as downloaded from comtrade on top of existing data in db
+        country_ids = dict(Country.objects.values_list('iso3', 'id'))
 
         for filename in filenames:
             self.stdout.write(self.style.SUCCESS(f'********  Loading: {filename}'))
+            stat = os.stat(filename)
             with open(filename, 'r', encoding='utf-8-sig') as f:
-                written = 0
-                read = 0
-                file_reader = csv.DictReader(f)
-                for row in file_reader:
-                    read = read + 1
-                    reporter_iso3 = row.get('Reporter ISO')
-                    partner_iso3 = row.get('Partner ISO')
-                    flow = row.get('Trade Flow')
-                    uk_or_world = None
-                    country_iso3 = None
-                    if reporter_iso3 == 'GBR' and flow == 'Export':
-                        uk_or_world = reporter_iso3
-                        country_iso3 = partner_iso3
-                    if partner_iso3 == 'WLD' and flow == 'Import':
-                        uk_or_world = partner_iso3
-                        country_iso3 = reporter_iso3
-                    if country_iso3 and uk_or_world:
-                        written = written + 1
-                        report = ComtradeReport(
-                            country_iso3=country_iso3,
-                            year=row.get('Year'),
-                            classification=row.get('Classification'),
-                            commodity_code=row.get('Commodity Code'),
-                            trade_value=float(row.get('Trade Value (US$)') or '0'),
-                            uk_or_world=uk_or_world,
-                        )
-                        report.save()
-                        if written % 100 == 0:
-                            print(f'{read} read, {written} written', end='\r', flush=True)
-                self.stdout.write(self.style.SUCCESS(f'{read} read, {written} written'))
+                rows = get_raw_file_rows(csv.DictReader(f), country_ids)
+                file_version = f'{stat.st_size}:{stat.st_mtime_ns}'
+                written = self.copy_rows(filename, file_version, RAW_FILE_COLUMNS, rows, resume)
+                self.stdout.write(self.style.SUCCESS(f'{written} written'))
 
     def unlink_countries(self):
         with connection.cursor() as cursor:
@@ -189,9 +278,11 @@ class Command(BaseS3IngestionCommand, S3DownloadMixin):
         elif options['unlink_countries']:
             self.unlink_countries()
         elif options['filenames'] and options['raw']:
-            self.load_raw_files(options['filenames'])
+            self.load_raw_files(options['filenames'], resume=options['resume'])
         elif options['filenames'] and options['from_s3_file']:
-            self.populate_db_from_s3(options['filenames'] and options['filenames'][0], test=options['test'])
+            self.populate_db_from_s3_file(
+                options['filenames'] and options['filenames'][0], test=options['test'], resume=options['resume']
+            )
         elif options['load_data'] and options['write'] and options['period']:
             if self.is_invalid_period(options['period']):
                 return
@@ -200,8 +291,7 @@ class Command(BaseS3IngestionCommand, S3DownloadMixin):
                 data = self.load_data(options['period'], read_only=False)
                 if data:
                     self.delete_data_for_period(options['period'])
-                    self.save_import_data(data, options['period'])
-                    self.link_countries()
+                    self.save_import_data(data, options['period'], processes=options['processes'])
             except Exception:
                 logger.exception("import_comtrade failed to ingest data from s3")
 
@@ -209,70 +299,52 @@ class Command(BaseS3IngestionCommand, S3DownloadMixin):
             if self.is_invalid_period(options['period']):
                 return
             try:
-                cnt = self.load_data(options['period'])
+                cnt = self.load_data(options['period'], processes=options['processes'])
                 prefix = 'Would create'
                 self.print_results(cnt, prefix)
             except Exception:
                 logger.exception("import_comtrade failed to ingest data from s3")
 
-    def populate_db_from_s3_file(self, filename, test):
-        # Read from S3, write into local DB, hook up country table
-        with connection.cursor() as cursor:
-            filestream = get_s3_file_stream(filename or settings.COMTRADE_DATA_FILE_NAME)
-            file_reader = csv.DictReader(filestream.split())
-            self.stdout.write('*********   Loading comtrade data')
-            written = 0
-            for row in file_reader:
-                cursor.execute(
-                    f"INSERT INTO \
-                    {LIVE_TABLE} \
-                    (id, year, classification, commodity_code, trade_value, uk_or_world, country_iso3 )\
-                    VALUES\
-                    (%s, %s, %s, %s, %s, %s, %s)",
-                    [
-                        row.get('id'),
-                        row.get('year'),
-                        row.get('classification'),
-                        row.get('commodity_code'),
-                        row.get('trade_value'),
-                        row.get('uk_or_world'),
-                        row.get('country_iso3'),
-                    ],
-                )
-
-                written = written + 1
-                if written % 1000 == 0:
-                    print(f'  {written} rows written', end='\r', flush=True)
-                if written >= 1000 and test:
-                    break
+    def populate_db_from_s3_file(self, filename, test, resume=False):
+        # Stream from S3 into the local DB, linking countries as rows are loaded
+        filename = filename or settings.COMTRADE_DATA_FILE_NAME
+        s3_object = get_file_from_s3(settings.AWS_STORAGE_BUCKET_NAME_DATA_SCIENCE, filename)
+        body = s3_object['Body']
+        lines = (line.decode('utf-8') for line in body.iter_lines())
+        rows = get_s3_file_rows(csv.DictReader(lines), dict(Country.objects.values_list('iso3', 'id')))
+        if test:
+            rows = itertools.islice(rows, 1000)
+        self.stdout.write('*********   Loading comtrade data')
+        written = self.copy_rows(filename, s3_object['ETag'], S3_FILE_COLUMNS, rows, resume)
         self.stdout.write(self.style.SUCCESS(f'Loaded table - {written} rows written'))
-        self.link_countries()
 
-    def load_data(self, period, read_only=True, *args, **options):
+    def load_data(self, period, read_only=True, processes=1, *args, **options):
         data = self.do_handle(
             prefix=settings.COMTRADE_S3_PREFIX,
         )
         if read_only:
-            return filter_data_by_period_count(data, period)
+            return filter_data_by_period_count(data, period, processes)
         else:
             return data
 
-    def save_import_data(self, data, period):
+    def save_import_data(self, data, period, processes=1):
 
         engine = sa.create_engine(settings.DATABASE_URL, future=True)
 
         res = ComtradeReport.objects.aggregate(max_id=Max('id'))
-        row_count = res['max_id']
+        row_count = res['max_id'] or 0
 
         metadata = sa.MetaData()
 
         data_table = get_comtrade_table(metadata)
+        # countries are linked as rows are loaded rather than by updating the whole table afterwards
+        country_ids = dict(Country.objects.values_list('iso3', 'id'))
 
         def on_before_visible(conn, ingest_table, batch_metadata):
             pass
 
         def batches(_):
-            yield get_comtrade_batch(data, data_table, period, row_count)
+            yield get_comtrade_batch(data, data_table, period, row_count, country_ids, processes)
 
         ingest_data(engine, metadata, on_before_visible, batches, delete=pg_bulk_ingest.Delete.OFF)
 
@@ -317,6 +389,13 @@ class Command(BaseS3IngestionCommand, S3DownloadMixin):
             help='Unlink existing countries so that country data can be deleted',
         )
 
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.COMTRADE_INGEST_PROCESSES,
+            help='Number of processes to parse the Comtrade data with',
+        )
+
         parser.add_argument(
             '--test',
             action='store_true',
@@ -328,3 +407,9 @@ class Command(BaseS3IngestionCommand, S3DownloadMixin):
             action='store_true',
             help='Load data from s3 file',
         )
+
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue an interrupted --raw or --from_s3_file load of the same, unchanged file',
+        )
@@ -2,6 +2,7 @@ import tablib
 from django.core.management import BaseCommand
 from import_export import fields, resources
 
+from dataservices.helpers import bump_cache_generation
 from dataservices.models import Country
 
 
@@ -55,6 +56,7 @@ class Command(BaseCommand):
                     dataset.append((item[1], item[3], item[4], item[5], item[6]))
             country_resource = CountryResource()
             report = country_resource.import_data(dataset)
+            bump_cache_generation('Country')
             [
                 self.stdout.write(self.style.SUCCESS(f'Results:  {key} : {value}'))
                 for key, value in report.totals.items()
@@ -3,6 +3,7 @@ import json
 from django.core.management import BaseCommand
 from django.db import transaction
 
+from dataservices.helpers import bump_cache_generation
 from dataservices.models import CountryTerritoryRegion
 
 
@@ -69,3 +70,4 @@ class Command(BaseCommand):
             CountryTerritoryRegion.objects.all().delete()
             CountryTerritoryRegion.objects.bulk_create(market_list)
             self.stdout.write(self.style.SUCCESS('Finished importing countries, territories and regions!'))
+        bump_cache_generation('CountryTerritoryRegion')
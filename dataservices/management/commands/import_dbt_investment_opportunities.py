@@ -65,6 +65,7 @@ def get_investment_opportunities_batch(data, data_table):
 class Command(BaseS3IngestionCommand, S3DownloadMixin):
 
     help = 'Import DBT investment opportunities data from s3'
+    s3_prefix_settings = ['INVESTMENT_OPPORTUNITIES_S3_PREFIX']
 
     def load_data(self, delete_temp_tables=True, *args, **options):
         data = self.do_handle(prefix=settings.INVESTMENT_OPPORTUNITIES_S3_PREFIX)
@@ -54,6 +54,7 @@ def get_dbtsector_postgres_table(metadata):
 class Command(BaseS3IngestionCommand, S3DownloadMixin):
 
     help = 'Import DBT Sector list data from s3'
+    s3_prefix_settings = ['DBT_SECTOR_S3_PREFIX']
 
     def load_data(self, delete_temp_tables=True, *args, **options):
         data = self.do_handle(
@@ -6,7 +6,9 @@ import sqlalchemy as sa
 from django.conf import settings
 
 from dataservices.core.mixins import S3DownloadMixin
+from dataservices.helpers import bump_cache_generation
 from dataservices.management.commands.helpers import BaseS3IngestionCommand, ingest_data
+from dataservices.models import EYBBusinessClusterCube, EYBBusinessClusterInformation
 
 logger = logging.getLogger(__name__)
 
@@ -271,6 +273,11 @@ def save_sector_reference_dataset_data(data):
 class Command(BaseS3IngestionCommand, S3DownloadMixin):
 
     help = 'Import ONS total UK business and employee counts per region and section, 2 and 5 digit Standard Industrial Classification'  # noqa:E501
+    s3_prefix_settings = [
+        'NOMIS_UK_BUSINESS_EMPLOYEE_COUNTS_FROM_S3_PREFIX',
+        'REF_SIC_CODES_MAPPING_FROM_S3_PREFIX',
+        'SECTOR_REFERENCE_DATASET_FROM_S3_PREFIX',
+    ]
 
     def load_data(self, delete_temp_tables=True, *args, **options):
         try:
@@ -363,6 +370,8 @@ class Command(BaseS3IngestionCommand, S3DownloadMixin):
             yield get_uk_business_employee_counts_batch(data, data_table)
 
         ingest_data(engine, metadata, on_before_visible, batches)
+        EYBBusinessClusterCube.objects.refresh(EYBBusinessClusterInformation.objects.all())
+        bump_cache_generation(EYBBusinessClusterCube.__name__)
 
         self.delete_temp_tables(TEMP_TABLES)
 
@@ -69,6 +69,7 @@ def get_eyb_rent_table(metadata):
 class Command(BaseS3IngestionCommand, S3DownloadMixin):
 
     help = 'Import Statista commercial rent data from s3'
+    s3_prefix_settings = ['EYB_RENT_S3_PREFIX']
 
     def load_data(self, delete_temp_tables=True, *args, **options):
         data = self.do_handle(
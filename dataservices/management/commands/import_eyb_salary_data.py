@@ -5,7 +5,9 @@ import sqlalchemy as sa
 from django.conf import settings
 
 from dataservices.core.mixins import S3DownloadMixin
+from dataservices.helpers import bump_cache_generation
 from dataservices.management.commands.helpers import BaseS3IngestionCommand, align_vertical_names, ingest_data
+from dataservices.models import EYBLatestSalaryData, EYBSalaryData
 
 
 def read_jsonl_lines(text_lines):
@@ -65,6 +67,7 @@ def get_eyb_salary_table(metadata):
 class Command(BaseS3IngestionCommand, S3DownloadMixin):
 
     help = 'Import Statista salary data from s3'
+    s3_prefix_settings = ['EYB_SALARY_S3_PREFIX']
 
     def load_data(self, delete_temp_tables=True, *args, **options):
         data = self.do_handle(
@@ -87,5 +90,7 @@ class Command(BaseS3IngestionCommand, S3DownloadMixin):
             yield get_eyb_salary_batch(data, data_table)
 
         ingest_data(engine, metadata, on_before_visible, batches)
+        EYBLatestSalaryData.objects.refresh(EYBSalaryData.objects.latest_for_each_soc_code())
+        bump_cache_generation(EYBLatestSalaryData.__name__)
 
         return data
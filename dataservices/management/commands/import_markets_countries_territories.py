@@ -3,6 +3,7 @@ import json
 from django.core.management import BaseCommand
 from django.db import transaction
 
+from dataservices.helpers import bump_cache_generation
 from dataservices.models import Market
 
 
@@ -67,6 +68,7 @@ class Command(BaseCommand):
             Market.objects.all().delete()
             Market.objects.bulk_create(market_list)
             self.stdout.write(self.style.SUCCESS('Finished importing markets!'))
+        bump_cache_generation('Market')
 
     def check_non_default_enabled(self):
         self.stdout.write(
@@ -18,6 +18,7 @@ TEMP_TABLE = 'dataflow_metadata_tmp'
 
 class Command(BaseS3IngestionCommand, S3DownloadMixin):
     help = 'Import latest release data as metadata from Data Workspace'
+    s3_prefix_settings = ['DATASETS_METADATA_S3_PREFIX']
 
     def get_temp_batch(self, data, data_table):
         def get_table_data():
@@ -118,7 +119,7 @@ class Command(BaseS3IngestionCommand, S3DownloadMixin):
                     for view_name in table_names_view_names[row.table_name]:
                         try:
                             view = getattr(views, view_name)
-                            model = view.filterset_class.Meta.model
+                            model = view.metadata_source_model or view.filterset_class.Meta.model
                             instance, _created = Metadata.objects.get_or_create(view_name=view_name)
                             instance.data['source'] = {}
                             instance.data['source']['organisation'] = model.METADATA_SOURCE_ORGANISATION
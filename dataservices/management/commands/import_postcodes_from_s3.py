@@ -5,6 +5,7 @@ import sqlalchemy as sa
 from django.conf import settings
 
 from dataservices.core.mixins import S3DownloadMixin
+from dataservices.helpers import bump_cache_generation
 from dataservices.management.commands.helpers import BaseS3IngestionCommand, ingest_data
 
 
@@ -29,6 +30,28 @@ def map_eer_to_european_reqion(eer_code: str) -> str:
     return mapping[eer_code] if eer_code in mapping.keys() else eer_code
 
 
+def map_ctry_to_country_name(ctry_code: str) -> str:
+    mapping = {
+        'E92000001': 'England',
+        'L93000001': 'Channel Islands',
+        'M83000003': 'Isle of Man',
+        'N92000002': 'Northern Ireland',
+        'S92000003': 'Scotland',
+        'W92000004': 'Wales',
+    }
+
+    return mapping.get(ctry_code, ctry_code)
+
+
+def to_int_or_none(value):
+    return int(value) if value not in (None, '') else None
+
+
+def without_pseudo_code(code):
+    # ONS pseudo codes such as E99999999 mean the postcode has no area of that type
+    return None if not code or code.endswith('99999999') else code
+
+
 def get_postcode_table_batch(data, data_table):
 
     def get_table_data():
@@ -43,6 +66,14 @@ def get_postcode_table_batch(data, data_table):
                         (json_data['pcd'].replace(' ', '') if json_data['pcd'] else json_data['pcd']),
                         (json_data['region_name'].strip() if json_data['region_name'] else json_data['region_name']),
                         map_eer_to_european_reqion(json_data['eer']),
+                        to_int_or_none(json_data.get('oseast1m')),
+                        to_int_or_none(json_data.get('osnrth1m')),
+                        json_data.get('lat'),
+                        json_data.get('long'),
+                        map_ctry_to_country_name(json_data.get('ctry')),
+                        json_data.get('local_authority_district_name'),
+                        without_pseudo_code(json_data.get('oslaua')),
+                        without_pseudo_code(json_data.get('oscty')),
                         datetime.now(),
                         datetime.now(),
                     ),
@@ -65,6 +96,14 @@ def get_postcode_postgres_table(metadata):
         sa.Column("post_code", sa.TEXT, nullable=False),
         sa.Column("region", sa.TEXT, nullable=True),
         sa.Column("european_electoral_region", sa.TEXT, nullable=True),
+        sa.Column("eastings", sa.INTEGER, nullable=True),
+        sa.Column("northings", sa.INTEGER, nullable=True),
+        sa.Column("latitude", sa.FLOAT, nullable=True),
+        sa.Column("longitude", sa.FLOAT, nullable=True),
+        sa.Column("country", sa.TEXT, nullable=True),
+        sa.Column("admin_district", sa.TEXT, nullable=True),
+        sa.Column("admin_district_code", sa.TEXT, nullable=True),
+        sa.Column("admin_county_code", sa.TEXT, nullable=True),
         sa.Column("created", sa.TIMESTAMP, nullable=True),
         sa.Column("modified", sa.TIMESTAMP, nullable=True),
         sa.Index(None, "post_code"),
@@ -75,6 +114,7 @@ def get_postcode_postgres_table(metadata):
 class Command(BaseS3IngestionCommand, S3DownloadMixin):
 
     help = 'Import Postcode data from s3'
+    s3_prefix_settings = ['POSTCODE_FROM_S3_PREFIX']
 
     def load_data(self, delete_temp_tables=True, *args, **options):
         data = self.do_handle(
@@ -96,5 +136,6 @@ class Command(BaseS3IngestionCommand, S3DownloadMixin):
             yield get_postcode_table_batch(data, data_table)
 
         ingest_data(engine, metadata, on_before_visible, batches)
+        bump_cache_generation('Postcode')
 
         return data
@@ -61,6 +61,7 @@ def get_sectors_gva_value_bands_batch(data, data_table):
 class Command(BaseS3IngestionCommand, S3DownloadMixin):
 
     help = 'Import sector GVA value bands data from s3'
+    s3_prefix_settings = ['DBT_SECTORS_GVA_VALUE_BANDS_DATA_S3_PREFIX']
 
     def load_data(self, delete_temp_tables=True, *args, **options):
         data = self.do_handle(
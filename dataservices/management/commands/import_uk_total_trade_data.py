@@ -5,7 +5,9 @@ import sqlalchemy as sa
 from django.conf import settings
 
 from dataservices.core.mixins import S3DownloadMixin
+from dataservices.helpers import bump_cache_generation
 from dataservices.management.commands.helpers import BaseS3IngestionCommand, ingest_data
+from dataservices.models import UKTotalTradeByCountry, UKTradeHighlightsByCountry
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,7 @@ TEMP_TABLE = 'dataflow_trade_uk_totals_sa_tmp'
 
 class Command(BaseS3IngestionCommand, S3DownloadMixin):
     help = 'Import ONS UK total trade data by country from Data Workspace'
+    s3_prefix_settings = ['TRADE_UK_TOTALS_SA_FROM_S3_PREFIX']
 
     def get_temp_batch(self, data, data_table):
         def get_table_data():
@@ -102,12 +105,20 @@ class Command(BaseS3IngestionCommand, S3DownloadMixin):
             data = self.do_handle(prefix=settings.TRADE_UK_TOTALS_SA_FROM_S3_PREFIX)
             self.save_temp_data(data)
             self.save_import_data([])
+            self.refresh_highlights()
         except Exception:
             logger.exception("import_uk_total_trade_data failed to ingest data from s3")
         finally:
             if delete_temp_tables:
                 self.delete_temp_tables([TEMP_TABLE])
 
+    def refresh_highlights(self):
+        count = UKTradeHighlightsByCountry.objects.refresh(
+            UKTotalTradeByCountry.objects.highlights(), UKTotalTradeByCountry.objects.get_current_period()
+        )
+        bump_cache_generation(UKTradeHighlightsByCountry.__name__)
+        logger.info(f'Refreshed the trade highlights of {count} countries')
+
     def save_import_data(self, data):
         sql = f'''
             SELECT
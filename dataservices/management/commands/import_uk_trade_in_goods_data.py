@@ -5,7 +5,9 @@ import sqlalchemy as sa
 from django.conf import settings
 
 from dataservices.core.mixins import S3DownloadMixin
+from dataservices.helpers import bump_cache_generation
 from dataservices.management.commands.helpers import BaseS3IngestionCommand, ingest_data
+from dataservices.models import UKTopExportsByCountry, UKTradeInGoodsByCountry
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,7 @@ TEMP_TABLE = 'dataflow_trade_uk_goods_nsa_tmp'
 
 class Command(BaseS3IngestionCommand, S3DownloadMixin):
     help = 'Import ONS UK trade in goods data by country from s3'
+    s3_prefix_settings = ['TRADE_UK_GOODS_NSA_FROM_S3_PREFIX']
 
     def get_temp_batch(self, data, data_table):
         def get_table_data():
@@ -104,12 +107,21 @@ class Command(BaseS3IngestionCommand, S3DownloadMixin):
             data = self.do_handle(prefix=settings.TRADE_UK_GOODS_NSA_FROM_S3_PREFIX)
             self.save_temp_data(data)
             self.save_import_data([])
+            self.refresh_top_exports()
         except Exception:
             logger.exception("import_uk_trade_in_goods_data failed to ingest data from s3")
         finally:
             if delete_temp_tables:
                 self.delete_temp_tables([TEMP_TABLE])
 
+    def refresh_top_exports(self):
+        count = UKTopExportsByCountry.objects.refresh(
+            UKTopExportsByCountry.GOODS,
+            UKTradeInGoodsByCountry.objects.top_goods_exports_by_country(UKTopExportsByCountry.RANK_LIMIT),
+        )
+        bump_cache_generation(UKTopExportsByCountry.__name__)
+        logger.info(f'Refreshed {count} top goods exports')
+
     def save_import_data(self, data):
         BATCH_SIZE = 50000  # Process 50,000 records at a time
         sql = f'''
@@ -16,6 +16,7 @@ TEMP_TABLE = 'dataflow_world_economic_outlook_by_country_tmp'
 
 class Command(BaseS3IngestionCommand, S3DownloadMixin):
     help = 'Import IMF world economic outlook data by country from Data Workspace'
+    s3_prefix_settings = ['IMF_WORLD_ECONOMIC_OUTLOOK_S3_PREFIX']
 
     def get_temp_batch(self, data, data_table):
         def get_table_data():
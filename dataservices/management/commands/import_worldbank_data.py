@@ -2,6 +2,7 @@ from django.apps import apps
 from django.core.management import BaseCommand
 
 from conf import settings
+from dataservices.helpers import bump_cache_generation
 from dataservices.models import Country
 
 from .helpers import flatten_ordered_dict, from_url_get_xml
@@ -80,4 +81,5 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.WARNING(f'Country code not found: {iso3}'))
 
         model.objects.bulk_create(data_objects)
+        bump_cache_generation(model_name)
         self.stdout.write(self.style.SUCCESS(f'Added {model_name} Data total records: {len(data_objects)}'))
@@ -1,4 +1,6 @@
+import io
 import json
+import logging
 import re
 from datetime import date, datetime
 from itertools import cycle, islice
@@ -16,7 +18,12 @@ from sqlalchemy import TIMESTAMP, Column, MetaData, String, Table
 
 from conf import settings
 from dataservices import models
-from dataservices.management.commands.helpers import MarketGuidesDataIngestionCommand
+from dataservices.management.commands.helpers import (
+    BaseDataWorkspaceIngestionCommand,
+    MarketGuidesDataIngestionCommand,
+    capture_logged_errors,
+    copy_rows,
+)
 from dataservices.management.commands.import_markets_countries_territories import Command as command_imct
 from dataservices.management.commands.import_metadata_source_data import Command as command_imsd
 
@@ -115,15 +122,17 @@ def test_import_all(mock_get_s3_file_stream):
 
 
 @pytest.mark.django_db
-@mock.patch('dataservices.management.commands.import_comtrade_data.get_s3_file_stream')
-def test_import_raw_comtrade(mock_get_s3_file_stream):
-    # Mock the S3 file stream to return a mock CSV data
-    mock_csv_data = """id,year,classification,commodity_code,trade_value,uk_or_world,country_iso3
-1,2019,HS,390720,345434516,WLD,FRA
-2,2019,HS,390720,123456789,GBR,FRA
-"""
-    mock_get_s3_file_stream.return_value = mock_csv_data
+@mock.patch('dataservices.management.commands.import_all.call_command')
+def test_import_all_comtrade_period(mock_call_command):
+    management.call_command('import_all', '--comtrade-period', '2023', '--force')
 
+    assert mock_call_command.call_args == mock.call(
+        'import_comtrade_data', '--period', '2023', '--load_data', '--write', stdout=mock.ANY
+    )
+
+
+@pytest.mark.django_db
+def test_import_raw_comtrade():
     management.call_command('import_comtrade_data', '--raw', 'dataservices/resources/comtrade_sample.csv')
     data = models.ComtradeReport.objects.filter(country_iso3='FRA', commodity_code='390720')
     assert len(models.ComtradeReport.objects.all()) == 389
@@ -139,6 +148,111 @@ def test_import_raw_comtrade(mock_get_s3_file_stream):
     assert len(models.ComtradeReport.objects.all()) == 0
 
 
+@pytest.mark.django_db
+@mock.patch('dataservices.management.commands.import_all.call_command')
+def test_import_all_reports_process_peak_memory_once_in_process(mock_call_command):
+    out = io.StringIO()
+    management.call_command('import_all', '--force', '--workers', '1', stdout=out)
+
+    output = out.getvalue()
+    assert 'import_countries complete in' in output
+    assert 'MB' not in output.split('Peak memory of the import')[0]
+    assert output.count('Peak memory of the import') == 1
+
+
+@pytest.mark.django_db
+@mock.patch('dataservices.management.commands.import_all.call_command')
+def test_import_all_skips_dependents_of_failed_importer(mock_call_command):
+    mock_call_command.side_effect = lambda command, *args, **kwargs: command == 'import_countries' and 1 / 0
+
+    with pytest.raises(management.CommandError):
+        management.call_command('import_all', '--force')
+
+    assert [call.args[0] for call in mock_call_command.call_args_list] == ['import_countries', 'import_weo_data']
+
+
+@pytest.mark.django_db
+@mock.patch('dataservices.management.commands.import_all.call_command')
+def test_import_all_skips_unchanged_sources(mock_call_command):
+    models.WorldEconomicOutlook.objects.create(country_code='GBR', country_name='United Kingdom')
+    cache.delete('import-all:source:import_weo_data')
+
+    management.call_command('import_all')
+    management.call_command('import_all')
+
+    commands = [call.args[0] for call in mock_call_command.call_args_list]
+    assert commands.count('import_weo_data') == 1
+    assert commands.count('import_cia_factbook_data') == 2
+
+
+@pytest.mark.django_db
+@mock.patch('dataservices.management.commands.import_comtrade_data.get_file_from_s3')
+def test_import_comtrade_from_s3_file(mock_get_file_from_s3):
+    management.call_command('import_countries')
+    mock_body = mock.Mock()
+    mock_body.iter_lines.return_value = [
+        b'id,year,classification,commodity_code,trade_value,uk_or_world,country_iso3',
+        b'1,2019,HS,390720,345434516,WLD,FRA',
+        b'2,2019,HS,390720,123456789,GBR,FRA',
+    ]
+    mock_get_file_from_s3.return_value = {'Body': mock_body, 'ETag': '"abc"'}
+
+    management.call_command('import_comtrade_data', '--from_s3_file', 'comtrade.csv')
+
+    data = models.ComtradeReport.objects.order_by('id')
+    assert [(report.id, report.trade_value, report.uk_or_world) for report in data] == [
+        (1, 345434516, 'WLD'),
+        (2, 123456789, 'GBR'),
+    ]
+    assert data.first().country.iso3 == 'FRA'
+    assert not models.ImportCheckpoint.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('file_version, expected_ids', [('"abc"', [2]), ('"def"', [1, 2])])
+@mock.patch('dataservices.management.commands.import_comtrade_data.get_file_from_s3')
+def test_import_comtrade_from_s3_file_resumes_same_file_only(mock_get_file_from_s3, file_version, expected_ids):
+    mock_body = mock.Mock()
+    mock_body.iter_lines.return_value = [
+        b'id,year,classification,commodity_code,trade_value,uk_or_world,country_iso3',
+        b'1,2019,HS,390720,345434516,WLD,FRA',
+        b'2,2019,HS,390720,123456789,GBR,FRA',
+    ]
+    mock_get_file_from_s3.return_value = {'Body': mock_body, 'ETag': file_version}
+    models.ImportCheckpoint.objects.create(
+        command='import_comtrade_data', filename='comtrade.csv', file_version='"abc"', offset=1
+    )
+
+    management.call_command('import_comtrade_data', '--from_s3_file', 'comtrade.csv', '--resume')
+
+    assert list(models.ComtradeReport.objects.order_by('id').values_list('id', flat=True)) == expected_ids
+    assert not models.ImportCheckpoint.objects.exists()
+
+
+@pytest.mark.django_db
+def test_copy_rows_resumes_from_offset():
+    rows = [(2019, 'HS', 'FRA', 'WLD', str(code), 1, None) for code in range(5)]
+    on_batch = mock.Mock()
+
+    written = copy_rows(
+        'dataservices_comtradereport',
+        ['year', 'classification', 'country_iso3', 'uk_or_world', 'commodity_code', 'trade_value', 'country_id'],
+        iter(rows),
+        batch_size=2,
+        offset=1,
+        on_batch=on_batch,
+    )
+
+    assert written == 5
+    assert on_batch.call_args_list == [mock.call(3), mock.call(5)]
+    assert list(models.ComtradeReport.objects.order_by('id').values_list('commodity_code', flat=True)) == [
+        '1',
+        '2',
+        '3',
+        '4',
+    ]
+
+
 @pytest.mark.django_db
 def test_import_target_age_groups():
     management.call_command('import_countries')
@@ -457,6 +571,81 @@ def test_helper_get_view_metadata():
     assert result == '2022-07-27T00:00:00'
 
 
+class SwapInCommand(BaseDataWorkspaceIngestionCommand):
+    sql = 'SELECT code, name FROM source ORDER BY code'
+
+    def get_postgres_table(self, metadata):
+        return Table('dataservices_example', metadata, Column('code', String), Column('name', String))
+
+
+def get_swap_in_command():
+    command = SwapInCommand()
+    command.engine = sqlalchemy.create_engine('sqlite://')
+    command.engine.execute('CREATE TABLE source (code TEXT, name TEXT)')
+    command.engine.execute("INSERT INTO source VALUES ('b', 'Bee'), ('a', 'Ay')")
+    return command
+
+
+@mock.patch('dataservices.management.commands.helpers.ingest_data')
+def test_data_workspace_ingestion_streams_rows_into_one_batch(mock_ingest_data):
+    ingested = []
+
+    def ingest_data(engine, metadata, on_before_visible, batches):
+        for _, _, rows in batches(None):
+            ingested.append([(table.name, row) for table, row in rows])
+
+    mock_ingest_data.side_effect = ingest_data
+    command = get_swap_in_command()
+
+    management.call_command(command, '--write')
+
+    assert ingested == [[('dataservices_example', ('a', 'Ay')), ('dataservices_example', ('b', 'Bee'))]]
+
+
+@pytest.mark.django_db
+@mock.patch.object(SwapInCommand, 'get_source_watermark')
+@mock.patch('dataservices.management.commands.helpers.ingest_data')
+def test_data_workspace_ingestion_skips_unchanged_source(mock_ingest_data, mock_get_source_watermark):
+    command = get_swap_in_command()
+    command.source_table_names = ['source']
+    mock_get_source_watermark.return_value = '2024-03-01T00:00:00'
+
+    management.call_command(command, '--write')
+    stdout = io.StringIO()
+    management.call_command(command, '--write', stdout=stdout)
+
+    assert mock_ingest_data.call_count == 1
+    assert stdout.getvalue().strip() == 'Source unchanged since the last import, nothing to do.'
+    assert models.IngestedSource.objects.get(command=command.ingestion_name).version == '2024-03-01T00:00:00'
+
+    management.call_command(command, '--write', '--force')
+
+    assert mock_ingest_data.call_count == 2
+
+    mock_get_source_watermark.return_value = '2024-04-01T00:00:00'
+    management.call_command(command, '--write')
+
+    assert mock_ingest_data.call_count == 3
+    assert models.IngestedSource.objects.get(command=command.ingestion_name).version == '2024-04-01T00:00:00'
+
+
+def test_capture_logged_errors_includes_shared_helpers():
+    with capture_logged_errors('dataservices', 'core') as errors:
+        logging.getLogger('dataservices.management.commands.helpers').error('ingest failed')
+        logging.getLogger('core.helpers').error('request failed')
+        logging.getLogger('dataservices.management.commands.import_eyb_rent_data').warning('not an error')
+
+    assert [record.getMessage() for record in errors] == ['ingest failed', 'request failed']
+
+
+def test_data_workspace_ingestion_dry_run_counts_rows():
+    stdout = io.StringIO()
+
+    management.call_command(get_swap_in_command(), stdout=stdout)
+
+    assert stdout.getvalue().strip() == 'Would create 2 records.'
+
+
 @override_settings(DATA_WORKSPACE_DATASETS_URL='sqlite://')
 @pytest.mark.django_db
 def test_helper_get_dataflow_metadata():
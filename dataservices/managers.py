@@ -1,7 +1,7 @@
-from django.db import models
-from django.db.models import ExpressionWrapper, F, FloatField, Q, Sum
+from django.db import models, transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Max, Q, Sum
 from django.db.models.expressions import Window
-from django.db.models.functions import Rank
+from django.db.models.functions import Rank, RowNumber
 from django_cte import CTEManager, With
 
 
@@ -22,6 +22,33 @@ class PeriodDataMixin:
         }
 
 
+def get_manager(manager_class, model):
+    """
+    An instance of manager_class for the given model, so that data migrations can run its methods on the
+    historical models they are given.
+    """
+    manager = manager_class()
+    manager.model = model
+    return manager
+
+
+def rank_by_country(queryset, code_field, limit):
+    """
+    The first `limit` rows of each country in an aggregated queryset with a total_value, ranked and cut in SQL.
+    """
+    return (
+        queryset.exclude(country__isnull=True)
+        .annotate(
+            rank=Window(
+                expression=RowNumber(),
+                partition_by=F('country'),
+                order_by=[F('total_value').desc(), F(code_field).asc()],
+            )
+        )
+        .filter(rank__lte=limit)
+    )
+
+
 class UKTotalTradeDataManager(PeriodDataMixin, CTEManager):
     def market_trends(self):
         qs = self.exclude(ons_iso_alpha_2_code__regex=r'\d')  # We want individual records for countries only
@@ -54,6 +81,28 @@ class UKTotalTradeDataManager(PeriodDataMixin, CTEManager):
         return self.none()
 
 
+class UKTradeHighlightsByCountryManager(models.Manager):
+    def refresh(self, highlights, period):
+        """
+        Replace every row with the rows of UKTotalTradeDataManager.highlights for the given reference period.
+        """
+        rows = [
+            self.model(
+                iso2=row['ons_iso_alpha_2_code'],
+                total_uk_exports=row['total_uk_exports'],
+                trading_position=row['trading_position'],
+                percentage_of_uk_trade=row['percentage_of_uk_trade'],
+                year=period['year'],
+                quarter=period['quarter'],
+            )
+            for row in highlights
+        ]
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(rows)
+        return len(rows)
+
+
 class UKTtradeInServicesDataManager(models.Manager):
     def _last_four_quarters(self):
         current_year, current_quarter = self.get_current_period().values()
@@ -98,6 +147,16 @@ class UKTtradeInServicesDataManager(models.Manager):
             .order_by('-total_value')
         )
 
+    def top_services_exports_by_country(self, limit):
+        return rank_by_country(
+            self._last_four_quarters()
+            .values('country', 'service_code')
+            .exclude(Q(exports__isnull=True) | Q(exports=0))
+            .annotate(label=F('service_name'), total_value=Sum('exports')),
+            'service_code',
+            limit,
+        )
+
 
 class UKTtradeInGoodsDataManager(PeriodDataMixin, models.Manager):
     def top_goods_exports(self):
@@ -110,6 +169,37 @@ class UKTtradeInGoodsDataManager(PeriodDataMixin, models.Manager):
             .order_by('-total_value')
         )
 
+    def top_goods_exports_by_country(self, limit):
+        return rank_by_country(
+            self._last_four_quarters()
+            .values('country', 'commodity_code')
+            .exclude(exports__isnull=True)
+            .annotate(label=F('commodity_name'), total_value=Sum('exports')),
+            'commodity_code',
+            limit,
+        )
+
+
+class UKTopExportsByCountryManager(models.Manager):
+    def refresh(self, trade_type, top_exports):
+        """
+        Replace the rows of the trade type with the ranked rows of top_exports_by_country.
+        """
+        rows = [
+            self.model(
+                country_id=row['country'],
+                trade_type=trade_type,
+                rank=row['rank'],
+                label=row['label'],
+                total_value=row['total_value'],
+            )
+            for row in top_exports
+        ]
+        with transaction.atomic():
+            self.filter(trade_type=trade_type).delete()
+            self.bulk_create(rows)
+        return len(rows)
+
 
 class WorldEconomicOutlookDataManager(CTEManager):
     GDP_MARKET_POSITION_CODE = 'MKT_POS'
@@ -148,3 +238,65 @@ class WorldEconomicOutlookDataManager(CTEManager):
             queryset = self._last_year()
 
         return queryset
+
+
+class EYBSalaryDataManager(models.Manager):
+    def latest_for_each_soc_code(self):
+        """
+        The latest row with a salary for each geo_description, vertical and soc_code, taken to be the one with
+        the highest id.
+        """
+        latest_ids = (
+            self.filter(median_salary__gt=0)
+            .values('geo_description', 'vertical', 'soc_code')
+            .annotate(latest_id=Max('id'))
+            .order_by()
+            .values('latest_id')
+        )
+        return self.filter(id__in=latest_ids)
+
+
+class EYBLatestSalaryDataManager(models.Manager):
+    def refresh(self, latest_salaries):
+        """
+        Replace every row with the rows of EYBSalaryDataManager.latest_for_each_soc_code.
+        """
+        fields = ['geo_description', 'vertical', 'professional_level', 'soc_code', 'median_salary', 'dataset_year']
+        rows = [self.model(**row) for row in latest_salaries.values(*fields)]
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+
+class EYBBusinessClusterCubeManager(models.Manager):
+    def refresh(self, business_clusters):
+        """
+        Replace every row with the business and employee counts of business_clusters summed per SIC code and per
+        DBT sector in each geography and release year.
+        """
+        counts = {
+            'total_business_count': Sum('total_business_count'),
+            'total_employee_count': Sum('total_employee_count'),
+        }
+        fields = ['geo_code', 'geo_description', 'business_count_release_year', 'employee_count_release_year']
+        by_sic_code = (
+            business_clusters.values(*fields, 'sic_code', 'sic_description', 'dbt_full_sector_name', 'dbt_sector_name')
+            .annotate(**counts)
+            .order_by()
+        )
+        by_dbt_sector = (
+            business_clusters.exclude(dbt_sector_name__isnull=True)
+            .values(*fields, 'dbt_sector_name')
+            .annotate(**counts)
+            .order_by()
+        )
+        rows = [self.model(dimension=self.model.SIC_CODE, key=row['sic_code'].lower(), **row) for row in by_sic_code]
+        rows += [
+            self.model(dimension=self.model.DBT_SECTOR, key=row['dbt_sector_name'].lower(), **row)
+            for row in by_dbt_sector
+        ]
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(rows, batch_size=1000)
+        return len(rows)
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.20 on 2026-10-18 12:20
+
+from django.db import migrations, models
+import django_extensions.db.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataservices', '0007_alter_place_address_alter_place_latitude_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestedSource',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'created',
+                    django_extensions.db.fields.CreationDateTimeField(
+                        auto_now_add=True, null=True, verbose_name='created'
+                    ),
+                ),
+                (
+                    'modified',
+                    django_extensions.db.fields.ModificationDateTimeField(
+                        auto_now=True, null=True, verbose_name='modified'
+                    ),
+                ),
+                ('command', models.CharField(max_length=100)),
+                ('source', models.CharField(max_length=255)),
+                ('version', models.CharField(max_length=255)),
+            ],
+            options={
+                'unique_together': {('command', 'source')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.20 on 2026-10-18 12:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataservices', '0008_ingestedsource'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UKTopExportsByCountry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trade_type', models.CharField(choices=[('goods', 'Goods'), ('services', 'Services')], max_length=10)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('label', models.CharField(max_length=250, null=True)),
+                ('total_value', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('country', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='dataservices.country')),
+            ],
+            options={
+                'verbose_name': 'UK top exports by country',
+                'verbose_name_plural': 'UK top exports by country',
+                'unique_together': {('trade_type', 'country', 'rank')},
+            },
+        ),
+    ]
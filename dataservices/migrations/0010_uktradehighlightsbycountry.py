@@ -0,0 +1,28 @@
+# Generated by Django 4.2.20 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataservices', '0009_uktopexportsbycountry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UKTradeHighlightsByCountry',
+            fields=[
+                ('iso2', models.CharField(max_length=2, primary_key=True, serialize=False)),
+                ('total_uk_exports', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('trading_position', models.PositiveIntegerField()),
+                ('percentage_of_uk_trade', models.FloatField()),
+                ('year', models.PositiveSmallIntegerField(null=True)),
+                ('quarter', models.PositiveSmallIntegerField(null=True)),
+            ],
+            options={
+                'verbose_name': 'UK trade highlights by country',
+                'verbose_name_plural': 'UK trade highlights by country',
+            },
+        ),
+    ]
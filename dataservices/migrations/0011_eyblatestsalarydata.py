@@ -0,0 +1,36 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:00
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataservices', '0010_uktradehighlightsbycountry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EYBLatestSalaryData',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('geo_description', models.CharField()),
+                ('vertical', models.CharField()),
+                ('professional_level', models.CharField()),
+                ('soc_code', models.IntegerField(blank=True, null=True)),
+                ('median_salary', models.IntegerField(blank=True, null=True)),
+                ('dataset_year', models.SmallIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(
+                        django.db.models.functions.text.Upper('vertical'),
+                        django.db.models.functions.text.Upper('professional_level'),
+                        django.db.models.functions.text.Upper('geo_description'),
+                        name='eyb_latest_salary_filter_idx',
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataservices', '0011_eyblatestsalarydata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EYBBusinessClusterCube',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'dimension',
+                    models.CharField(choices=[('sic_code', 'SIC code'), ('dbt_sector', 'DBT sector')], max_length=10),
+                ),
+                ('key', models.CharField()),
+                ('geo_description', models.CharField()),
+                ('geo_code', models.CharField()),
+                ('sic_code', models.CharField(blank=True, null=True)),
+                ('sic_description', models.CharField(blank=True, null=True)),
+                ('total_business_count', models.IntegerField(blank=True, null=True)),
+                ('business_count_release_year', models.SmallIntegerField(blank=True, null=True)),
+                ('total_employee_count', models.IntegerField(blank=True, null=True)),
+                ('employee_count_release_year', models.SmallIntegerField(blank=True, null=True)),
+                ('dbt_full_sector_name', models.CharField(blank=True, null=True)),
+                ('dbt_sector_name', models.CharField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(
+                        fields=['dimension', 'key', 'geo_code'],
+                        include=(
+                            'id',
+                            'geo_description',
+                            'sic_code',
+                            'sic_description',
+                            'total_business_count',
+                            'business_count_release_year',
+                            'total_employee_count',
+                            'employee_count_release_year',
+                            'dbt_full_sector_name',
+                            'dbt_sector_name',
+                        ),
+                        name='eyb_business_cluster_cube_idx',
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:26
+
+from django.db import migrations, models
+import django_extensions.db.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataservices', '0012_eybbusinessclustercube'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                (
+                    'created',
+                    django_extensions.db.fields.CreationDateTimeField(
+                        auto_now_add=True, null=True, verbose_name='created'
+                    ),
+                ),
+                (
+                    'modified',
+                    django_extensions.db.fields.ModificationDateTimeField(
+                        auto_now=True, null=True, verbose_name='modified'
+                    ),
+                ),
+                ('command', models.CharField(max_length=100)),
+                ('filename', models.CharField(max_length=255)),
+                ('file_version', models.CharField(max_length=255)),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('command', 'filename', 'file_version')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from dataservices import managers
+
+RANK_LIMIT = 5
+
+
+def backfill_top_exports(apps, schema_editor):
+    # the import commands only refresh the summary when their source changes, so it is filled here at deploy
+    top_exports = managers.get_manager(
+        managers.UKTopExportsByCountryManager, apps.get_model('dataservices', 'UKTopExportsByCountry')
+    )
+    goods = managers.get_manager(
+        managers.UKTtradeInGoodsDataManager, apps.get_model('dataservices', 'UKTradeInGoodsByCountry')
+    )
+    services = managers.get_manager(
+        managers.UKTtradeInServicesDataManager, apps.get_model('dataservices', 'UKTradeInServicesByCountry')
+    )
+    top_exports.refresh('goods', goods.top_goods_exports_by_country(RANK_LIMIT))
+    top_exports.refresh('services', services.top_services_exports_by_country(RANK_LIMIT))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataservices', '0013_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_top_exports, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from dataservices import managers
+
+
+def backfill_highlights(apps, schema_editor):
+    # import_uk_total_trade_data only rebuilds the table when its source changes, so it is filled here at deploy
+    highlights = managers.get_manager(
+        managers.UKTradeHighlightsByCountryManager, apps.get_model('dataservices', 'UKTradeHighlightsByCountry')
+    )
+    total_trade = managers.get_manager(
+        managers.UKTotalTradeDataManager, apps.get_model('dataservices', 'UKTotalTradeByCountry')
+    )
+    highlights.refresh(total_trade.highlights(), total_trade.get_current_period())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataservices', '0014_backfill_uktopexportsbycountry'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_highlights, reverse_code=migrations.RunPython.noop),
+    ]
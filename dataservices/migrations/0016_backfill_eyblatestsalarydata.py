@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from dataservices import managers
+
+
+def backfill_latest_salaries(apps, schema_editor):
+    # import_eyb_salary_data only refreshes the snapshot when its source changes, so it is filled here at deploy
+    latest_salaries = managers.get_manager(
+        managers.EYBLatestSalaryDataManager, apps.get_model('dataservices', 'EYBLatestSalaryData')
+    )
+    salaries = managers.get_manager(managers.EYBSalaryDataManager, apps.get_model('dataservices', 'EYBSalaryData'))
+    latest_salaries.refresh(salaries.latest_for_each_soc_code())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataservices', '0015_backfill_uktradehighlightsbycountry'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_latest_salaries, reverse_code=migrations.RunPython.noop),
+    ]
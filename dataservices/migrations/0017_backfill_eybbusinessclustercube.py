@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from dataservices import managers
+
+
+def backfill_business_cluster_cube(apps, schema_editor):
+    # import_eyb_business_cluster_information only rebuilds the cube when its source changes, so it is filled here
+    # at deploy
+    cube = managers.get_manager(
+        managers.EYBBusinessClusterCubeManager, apps.get_model('dataservices', 'EYBBusinessClusterCube')
+    )
+    cube.refresh(apps.get_model('dataservices', 'EYBBusinessClusterInformation').objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataservices', '0016_backfill_eyblatestsalarydata'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_business_cluster_cube, reverse_code=migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils.translation import gettext as _
 
 from core.helpers import TimeStampedModel
@@ -407,6 +408,31 @@ class UKTradeInServicesByCountry(models.Model):
         verbose_name = 'UK trade in services by country'
 
 
+class UKTopExportsByCountry(models.Model):
+    """
+    The largest goods and services exports to each country over the last four quarters, refreshed from
+    UKTradeInGoodsByCountry and UKTradeInServicesByCountry by their import commands.
+    """
+
+    GOODS = 'goods'
+    SERVICES = 'services'
+    # the most exports kept per country and trade type
+    RANK_LIMIT = 5
+
+    country = models.ForeignKey('dataservices.Country', on_delete=models.CASCADE)
+    trade_type = models.CharField(max_length=10, choices=[(GOODS, 'Goods'), (SERVICES, 'Services')])
+    rank = models.PositiveSmallIntegerField()
+    label = models.CharField(max_length=250, null=True)
+    total_value = models.DecimalField(max_digits=14, decimal_places=2)
+
+    objects = managers.UKTopExportsByCountryManager()
+
+    class Meta:
+        verbose_name = 'UK top exports by country'
+        verbose_name_plural = 'UK top exports by country'
+        unique_together = ('trade_type', 'country', 'rank')
+
+
 class UKTotalTradeByCountry(models.Model):
     METADATA_SOURCE_ORGANISATION = 'ONS'
     METADATA_SOURCE_LABEL = 'UK total trade: all countries, seasonally adjusted'
@@ -430,6 +456,26 @@ class UKTotalTradeByCountry(models.Model):
         verbose_name = "UK total trade by country"
 
 
+class UKTradeHighlightsByCountry(models.Model):
+    """
+    The UK trade highlights of each country over the last four quarters, rebuilt from UKTotalTradeByCountry by
+    import_uk_total_trade_data.
+    """
+
+    iso2 = models.CharField(max_length=2, primary_key=True)
+    total_uk_exports = models.DecimalField(max_digits=14, decimal_places=2)
+    trading_position = models.PositiveIntegerField()
+    percentage_of_uk_trade = models.FloatField()
+    year = models.PositiveSmallIntegerField(null=True)
+    quarter = models.PositiveSmallIntegerField(null=True)
+
+    objects = managers.UKTradeHighlightsByCountryManager()
+
+    class Meta:
+        verbose_name = 'UK trade highlights by country'
+        verbose_name_plural = 'UK trade highlights by country'
+
+
 class WorldEconomicOutlookByCountry(models.Model):
     METADATA_SOURCE_ORGANISATION = 'IMF'
     METADATA_SOURCE_LABEL = 'World Economic Outlook Database'
@@ -510,6 +556,52 @@ class EYBBusinessClusterInformation(models.Model):
         )
 
 
+class EYBBusinessClusterCube(models.Model):
+    """
+    The counts of EYBBusinessClusterInformation summed per SIC code and per DBT sector in each geography, rebuilt
+    by import_eyb_business_cluster_information. Rows are looked up by their dimension and lowercased key.
+    """
+
+    SIC_CODE = 'sic_code'
+    DBT_SECTOR = 'dbt_sector'
+
+    dimension = models.CharField(max_length=10, choices=[(SIC_CODE, 'SIC code'), (DBT_SECTOR, 'DBT sector')])
+    key = models.CharField()
+    geo_description = models.CharField()
+    geo_code = models.CharField()
+    sic_code = models.CharField(null=True, blank=True)
+    sic_description = models.CharField(null=True, blank=True)
+    total_business_count = models.IntegerField(null=True, blank=True)
+    business_count_release_year = models.SmallIntegerField(null=True, blank=True)
+    total_employee_count = models.IntegerField(null=True, blank=True)
+    employee_count_release_year = models.SmallIntegerField(null=True, blank=True)
+    dbt_full_sector_name = models.CharField(null=True, blank=True)
+    dbt_sector_name = models.CharField(null=True, blank=True)
+
+    objects = managers.EYBBusinessClusterCubeManager()
+
+    class Meta:
+        indexes = [
+            # covers every column the views return, so that lookups can be answered from the index alone
+            models.Index(
+                fields=['dimension', 'key', 'geo_code'],
+                include=[
+                    'id',
+                    'geo_description',
+                    'sic_code',
+                    'sic_description',
+                    'total_business_count',
+                    'business_count_release_year',
+                    'total_employee_count',
+                    'employee_count_release_year',
+                    'dbt_full_sector_name',
+                    'dbt_sector_name',
+                ],
+                name='eyb_business_cluster_cube_idx',
+            ),
+        ]
+
+
 class EYBCommercialPropertyRent(models.Model):
     geo_description = models.CharField()
     vertical = models.CharField()
@@ -530,6 +622,35 @@ class EYBSalaryData(models.Model):
     mean_salary = models.IntegerField(null=True, blank=True)
     dataset_year = models.SmallIntegerField(null=True, blank=True)
 
+    objects = managers.EYBSalaryDataManager()
+
+
+class EYBLatestSalaryData(models.Model):
+    """
+    The latest salary of each geo_description, vertical and soc_code in EYBSalaryData, rebuilt by
+    import_eyb_salary_data.
+    """
+
+    geo_description = models.CharField()
+    vertical = models.CharField()
+    professional_level = models.CharField()
+    soc_code = models.IntegerField(null=True, blank=True)
+    median_salary = models.IntegerField(null=True, blank=True)
+    dataset_year = models.SmallIntegerField(null=True, blank=True)
+
+    objects = managers.EYBLatestSalaryDataManager()
+
+    class Meta:
+        indexes = [
+            # EYBSalaryFilter matches case insensitively
+            models.Index(
+                Upper('vertical'),
+                Upper('professional_level'),
+                Upper('geo_description'),
+                name='eyb_latest_salary_filter_idx',
+            ),
+        ]
+
 
 class DBTSector(models.Model):
     sector_id = models.CharField()
@@ -614,3 +735,38 @@ class ChamberOfCommerce(models.Model):
     contacts = models.ForeignKey(ContactCard, on_delete=models.CASCADE, null=True, blank=True)
     place = models.ForeignKey(Place, on_delete=models.CASCADE)
     boundary = models.ForeignKey(Boundary, on_delete=models.CASCADE, null=True, blank=True)
+
+
+class IngestedSource(TimeStampedModel):
+    """
+    The version of a source that an importer last ingested in full, so that an unchanged source can be skipped
+    """
+
+    command = models.CharField(max_length=100)
+    source = models.CharField(max_length=255)
+    version = models.CharField(max_length=255)
+
+    def __str__(self):
+        return f'{self.command}:{self.source}'
+
+    class Meta:
+        unique_together = ('command', 'source')
+
+
+class ImportCheckpoint(TimeStampedModel):
+    """
+    The rows of a file that a resumable import has loaded so far. It is saved in the transaction of each batch, so
+    it never disagrees with the rows committed.
+    """
+
+    command = models.CharField(max_length=100)
+    filename = models.CharField(max_length=255)
+    # identifies the file's content, so that a different file uploaded under the same name starts from the beginning
+    file_version = models.CharField(max_length=255)
+    offset = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.command}:{self.filename}'
+
+    class Meta:
+        unique_together = ('command', 'filename', 'file_version')
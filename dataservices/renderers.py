@@ -7,9 +7,6 @@ class CustomDataMetadataJSONRenderer(JSONRenderer):
         metadata = view.get_serializer().get_metadata()
         response_data = {}
 
-        if isinstance(data, list):
-            data = data[: view.limit]
-
         if metadata:
             response_data['metadata'] = metadata
 
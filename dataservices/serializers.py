@@ -18,12 +18,16 @@ class EaseOfDoingBusinessSerializer(serializers.ModelSerializer):
         exclude = ['created', 'id', 'modified', 'country']
 
     def get_max_rank(self, obj):
-        agg = models.EaseOfDoingBusiness.objects.aggregate(Max('value'))
-        for key in agg:
-            return agg[key]
+        # Shared context is reused across every instance of a many=True serialization
+        if 'max_rank' not in self.context:
+            self.context['max_rank'] = models.EaseOfDoingBusiness.objects.aggregate(Max('value'))['value__max']
+        return self.context['max_rank']
 
     def get_total(self, obj):
-        return models.EaseOfDoingBusiness.objects.filter(year=obj.year).count()
+        totals = self.context.setdefault('totals_by_year', {})
+        if obj.year not in totals:
+            totals[obj.year] = models.EaseOfDoingBusiness.objects.filter(year=obj.year).count()
+        return totals[obj.year]
 
     def get_rank(self, obj):
         return obj.value
@@ -37,7 +41,10 @@ class CorruptionPerceptionsIndexSerializer(serializers.ModelSerializer):
         exclude = ['created', 'id', 'modified', 'country', 'country_name', 'country_code']
 
     def get_total(self, obj):
-        return models.CorruptionPerceptionsIndex.objects.filter(year=obj.year).count()
+        totals = self.context.setdefault('totals_by_year', {})
+        if obj.year not in totals:
+            totals[obj.year] = models.CorruptionPerceptionsIndex.objects.filter(year=obj.year).count()
+        return totals[obj.year]
 
 
 class WorldEconomicOutlookSerializer(serializers.ModelSerializer):
@@ -198,7 +205,8 @@ class UKTopFiveServicesExportSerializer(BaseDataMetadataSerializer):
         return obj['label']
 
     def get_value(self, obj):
-        return millions_to_currency_unit(obj['total_value'])
+        # services totals are sums of whole numbers, stored as decimals alongside the goods totals
+        return millions_to_currency_unit(int(obj['total_value']))
 
 
 class UKMarketTrendsSerializer(BaseDataMetadataSerializer):
@@ -254,8 +262,19 @@ class UKFreeTradeAgreementSerializer(serializers.Serializer):
 
 class BusinessClusterInformationSerializer(serializers.ModelSerializer):
     class Meta:
-        model = models.EYBBusinessClusterInformation
-        fields = '__all__'
+        model = models.EYBBusinessClusterCube
+        fields = [
+            'geo_description',
+            'geo_code',
+            'sic_code',
+            'sic_description',
+            'total_business_count',
+            'business_count_release_year',
+            'total_employee_count',
+            'employee_count_release_year',
+            'dbt_full_sector_name',
+            'dbt_sector_name',
+        ]
 
 
 class BusinessClusterInformationAggregatedDataSerializer(serializers.ModelSerializer):
@@ -265,7 +284,7 @@ class BusinessClusterInformationAggregatedDataSerializer(serializers.ModelSerial
     """
 
     class Meta:
-        model = models.EYBBusinessClusterInformation
+        model = models.EYBBusinessClusterCube
         fields = [
             'geo_code',
             'geo_description',
@@ -279,7 +298,7 @@ class BusinessClusterInformationAggregatedDataSerializer(serializers.ModelSerial
 
 class EYBSalaryDataSerializer(serializers.ModelSerializer):
     class Meta:
-        model = models.EYBSalaryData
+        model = models.EYBLatestSalaryData
         fields = ['geo_description', 'vertical', 'professional_level', 'median_salary', 'dataset_year']
 
 
@@ -307,6 +326,23 @@ class DBTInvestmentOpportunitySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class MarketSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Market
+        fields = [
+            'reference_id',
+            'name',
+            'type',
+            'iso1_code',
+            'iso2_code',
+            'iso3_code',
+            'overseas_region_overseas_region_name',
+            'start_date',
+            'end_date',
+            'enabled',
+        ]
+
+
 class CountriesTerritoriesRegionsSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -0,0 +1,6 @@
+from dataservices.helpers import bump_cache_generation
+
+
+def bump_model_generation(sender, *args, **kwargs):
+    # m2m_changed is sent by the auto-created through model, e.g. SupportHub_boundaries
+    bump_cache_generation(sender.__name__.split('_')[0])
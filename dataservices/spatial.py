@@ -0,0 +1,151 @@
+import threading
+import time
+
+import numpy
+from django.core.cache import cache
+
+from dataservices import models
+from dataservices.helpers import CACHE_GENERATION_KEY
+
+LOCAL_SUPPORT_MODELS = ['Boundary', 'ChamberOfCommerce', 'ContactCard', 'Place', 'SupportHub']
+
+
+def serialize_contact_card(contact_card):
+    if contact_card is None:
+        contact_card = models.ContactCard()
+    return {
+        'website': contact_card.website,
+        'website_label': contact_card.website_label,
+        'phone': contact_card.phone,
+        'email': contact_card.email,
+        'contact_form': contact_card.contact_form_url,
+        'contact_form_label': contact_card.contact_form_label,
+    }
+
+
+class PlaceIndex:
+    """
+    In-process nearest neighbour index over the eastings/northings of the Place linked to each instance of a model.
+
+    Places and contact cards are loaded once per build and kept alongside a coordinate array, so a lookup is a
+    single vectorised distance computation. The index is rebuilt on the next lookup after any of the local support
+    tables change (see dataservices.signals), checking for changes at most every ``check_interval`` seconds.
+    """
+
+    check_interval = 5
+
+    def __init__(self):
+        self.generation_keys = [
+            CACHE_GENERATION_KEY.format(model_name=model_name) for model_name in LOCAL_SUPPORT_MODELS
+        ]
+        self.generation = None
+        self.checked_at = None
+        self.entries = []
+        self.groups = numpy.empty(0)
+        self.coordinates = numpy.empty((0, 2))
+        self.lock = threading.Lock()
+
+    def get_queryset(self):
+        """
+        The instances to index. Subclasses must implement this method.
+        """
+        raise NotImplementedError('subclasses of PlaceIndex must provide a get_queryset() method')
+
+    def to_entry(self, instance):
+        """
+        The data kept for each indexed instance. Subclasses must implement this method.
+        """
+        raise NotImplementedError('subclasses of PlaceIndex must provide a to_entry() method')
+
+    def get_group(self, instance):
+        """
+        The key that lookups can be restricted to, e.g. the boundary an instance belongs to.
+        """
+        return None
+
+    def build(self):
+        entries = []
+        groups = []
+        coordinates = []
+        for instance in self.get_queryset():
+            entries.append(self.to_entry(instance))
+            groups.append(self.get_group(instance))
+            coordinates.append((float(instance.place.eastings), float(instance.place.northings)))
+        self.entries, self.groups, self.coordinates = (
+            entries,
+            numpy.array(groups),
+            numpy.array(coordinates, dtype=float).reshape(-1, 2),
+        )
+
+    def refresh_if_stale(self):
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < self.check_interval:
+            return
+        self.checked_at = now
+        values = cache.get_many(self.generation_keys)
+        generation = [values.get(key, 0) for key in self.generation_keys]
+        if generation != self.generation:
+            with self.lock:
+                if generation != self.generation:
+                    self.build()
+                    self.generation = generation
+
+    def nearest(self, eastings, northings, k=1, group=None):
+        """
+        Return up to k (entry, distance) pairs ordered by distance from the given point, optionally restricted to
+        one group. Entries at the same distance keep their build order.
+        """
+        self.refresh_if_stale()
+        entries, groups, coordinates = self.entries, self.groups, self.coordinates
+        positions = numpy.arange(len(entries))
+        if group is not None:
+            positions = positions[groups == group]
+        if not len(positions):
+            return []
+
+        distances = numpy.hypot(
+            coordinates[positions, 0] - float(eastings), coordinates[positions, 1] - float(northings)
+        )
+        order = numpy.argsort(distances, kind='stable')[:k]
+        return [(entries[positions[i]], float(distances[i])) for i in order]
+
+
+class SupportHubIndex(PlaceIndex):
+    def get_queryset(self):
+        return (
+            models.SupportHub.objects.filter(place__isnull=False)
+            .select_related('place', 'contacts')
+            .prefetch_related('boundaries')
+            .order_by('id')
+        )
+
+    def to_entry(self, instance):
+        largest_boundary = max(instance.boundaries.all(), key=lambda boundary: boundary.type, default=None)
+        return {
+            'name': instance.name,
+            'digest': instance.digest,
+            'contacts': serialize_contact_card(instance.contacts),
+            'boundary_name': largest_boundary.name if largest_boundary else None,
+            'boundary_type': models.BoundaryType(largest_boundary.type).label if largest_boundary else None,
+            'boundary_level': largest_boundary.type if largest_boundary else None,
+        }
+
+
+class ChamberOfCommerceIndex(PlaceIndex):
+    def get_queryset(self):
+        return models.ChamberOfCommerce.objects.select_related('place', 'contacts').order_by('id')
+
+    def get_group(self, instance):
+        return instance.boundary_id
+
+    def to_entry(self, instance):
+        return {
+            'name': instance.name,
+            'digest': instance.digest,
+            'contacts': serialize_contact_card(instance.contacts),
+            'place': {field.attname: getattr(instance.place, field.attname) for field in models.Place._meta.fields},
+        }
+
+
+support_hub_index = SupportHubIndex()
+chamber_of_commerce_index = ChamberOfCommerceIndex()
@@ -6,7 +6,15 @@ from datetime import datetime
 import pytest
 from botocore.response import StreamingBody
 
-from dataservices import models
+from dataservices import helpers, models
+
+
+@pytest.fixture(autouse=True)
+def fresh_response_versions():
+    # cached responses outlive the test database, so start every test from a new dataset version
+    helpers.bump_cache_generation(*helpers.VERSIONED_RESPONSE_MODELS)
+    # test data is created without bumping generations, and rolled back without any signal
+    helpers.metadata_registry.clear()
 
 
 @pytest.fixture(autouse=True)
@@ -320,8 +328,10 @@ def business_cluster_information_data():
 
     for record in records:
         models.EYBBusinessClusterInformation.objects.create(**record)
+    models.EYBBusinessClusterCube.objects.refresh(models.EYBBusinessClusterInformation.objects.all())
     yield
     models.EYBBusinessClusterInformation.objects.all().delete()
+    models.EYBBusinessClusterCube.objects.all().delete()
 
 
 @pytest.fixture
@@ -1194,8 +1204,10 @@ def eyb_salary_data():
 
     for record in records:
         models.EYBSalaryData.objects.create(**record)
+    models.EYBLatestSalaryData.objects.refresh(models.EYBSalaryData.objects.latest_for_each_soc_code())
     yield records
     models.EYBSalaryData.objects.all().delete()
+    models.EYBLatestSalaryData.objects.all().delete()
 
 
 @pytest.fixture
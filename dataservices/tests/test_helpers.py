@@ -7,6 +7,7 @@ from django.conf import settings
 from dataservices import helpers, models
 from dataservices.management.commands import helpers as dmch
 from dataservices.tests import factories, utils
+from exporting.models import Postcode
 
 
 @pytest.fixture()
@@ -170,6 +171,32 @@ def test_get_internet_usage_with_no_country():
     assert data == {}
 
 
+@pytest.mark.django_db
+def test_get_serialized_data_by_country_latest_only_per_country(countries, django_assert_num_queries):
+    models.ConsumerPriceIndex.objects.create(country=countries['FR'], year=2019, value=101.5)
+    models.ConsumerPriceIndex.objects.create(country=countries['FR'], year=2020, value=102.5)
+    models.ConsumerPriceIndex.objects.create(country=countries['NL'], year=2018, value=99.5)
+    models.InternetUsage.objects.create(country=countries['FR'], year=2020, value=80.1)
+    models.InternetUsage.objects.create(country=countries['NL'], year=2020, value=81.1)
+
+    with django_assert_num_queries(2):
+        data = helpers.get_serialized_data_by_country(
+            ['FR', 'NL'],
+            [{'model': 'ConsumerPriceIndex', 'latest_only': True}, 'InternetUsage', 'NotAModelName'],
+        )
+
+    assert data == {
+        'FR': {
+            'ConsumerPriceIndex': [{'value': '102.500', 'year': 2020}],
+            'InternetUsage': [{'value': '80.100', 'year': 2020}],
+        },
+        'NL': {
+            'ConsumerPriceIndex': [{'value': '99.500', 'year': 2018}],
+            'InternetUsage': [{'value': '81.100', 'year': 2020}],
+        },
+    }
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     "o1,o2,result",
@@ -215,3 +242,109 @@ def test_notify_error_message(mock_notify):
 )
 def test_align_vertical_names(statista_vertical_name, expected_vertical_name):
     assert dmch.align_vertical_names(statista_vertical_name) == expected_vertical_name
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    yield
+    helpers.cache.clear()
+
+
+@pytest.mark.django_db
+def test_ttl_cache_caches_empty_results(locmem_cache):
+    func = mock.Mock(return_value={}, __name__='func')
+    cached_func = helpers.TTLCache(models=['CIAFactbook'])(func)
+
+    assert cached_func('France') == {}
+    assert cached_func('France') == {}
+    assert func.call_count == 1
+    assert cached_func.ttl_cache.stats() == {'hits': 1, 'misses': 1, 'recomputes': 1}
+
+
+@pytest.mark.django_db
+def test_ttl_cache_invalidated_by_generation_bump(locmem_cache):
+    func = mock.Mock(side_effect=[{'a': 1}, {'a': 2}], __name__='func')
+    cached_func = helpers.TTLCache(models=['CIAFactbook'])(func)
+
+    assert cached_func('France') == {'a': 1}
+    helpers.bump_cache_generation('InternetUsage')
+    assert cached_func('France') == {'a': 1}
+    helpers.bump_cache_generation('CIAFactbook')
+    assert cached_func('France') == {'a': 2}
+    assert func.call_count == 2
+
+
+@pytest.mark.django_db
+def test_ttl_cache_waits_for_worker_holding_lock(locmem_cache):
+    func = mock.Mock(return_value={'a': 1}, __name__='func')
+    ttl_cache = helpers.TTLCache()
+    cached_func = ttl_cache(func)
+    key = ttl_cache.get_cache_key(('France',), {})
+    helpers.cache.add(f'{key}:lock', 'acquired')
+
+    def other_worker_sets_value(seconds):
+        helpers.cache.set(key, {'value': {'a': 0}, 'generation': [], 'delta': 0, 'expiry': float('inf')})
+
+    with mock.patch.object(helpers.time, 'sleep', side_effect=other_worker_sets_value):
+        assert cached_func('France') == {'a': 0}
+    assert func.call_count == 0
+
+
+@pytest.mark.django_db
+def test_ttl_cache_refreshes_early_near_expiry(locmem_cache):
+    func = mock.Mock(side_effect=[{'a': 1}, {'a': 2}], __name__='func')
+    cached_func = helpers.TTLCache()(func)
+
+    assert cached_func('France') == {'a': 1}
+    with mock.patch.object(cached_func.ttl_cache, 'should_refresh_early', return_value=True):
+        assert cached_func('France') == {'a': 2}
+    assert func.call_count == 2
+
+
+@pytest.mark.django_db
+def test_get_postcode_data_from_local_store(requests_mocker):
+    Postcode.objects.create(
+        post_code='AB101AA',
+        region='Scotland',
+        european_electoral_region='Scotland',
+        eastings=394251,
+        northings=806376,
+        country='Scotland',
+        admin_district='Aberdeen City',
+        admin_district_code='S12000033',
+    )
+
+    data = helpers.get_postcode_data('ab10 1aa')
+
+    assert requests_mocker.call_count == 0
+    assert data['result']['postcode'] == 'AB10 1AA'
+    assert data['result']['eastings'] == 394251
+    assert data['result']['northings'] == 806376
+    assert data['result']['country'] == 'Scotland'
+    assert data['result']['codes'] == {'admin_district': 'S12000033', 'admin_county': None}
+
+
+@pytest.mark.django_db
+def test_get_postcode_data_falls_back_to_cached_api_lookup(locmem_cache, requests_mocker):
+    api_data = {'status': 200, 'result': {'quality': 1, 'eastings': 1, 'northings': 2}}
+    requests_mocker.get('https://api.postcodes.io/postcodes/SW1A1AA', json=api_data)
+
+    assert helpers.get_postcode_data('SW1A 1AA') == api_data
+    assert helpers.get_postcode_data('SW1A 1AA') == api_data
+    assert requests_mocker.call_count == 1
+
+
+@pytest.mark.django_db
+def test_metadata_registry_reads_countries_once_per_generation(locmem_cache, django_assert_num_queries):
+    registry = helpers.MetadataRegistry()
+
+    with django_assert_num_queries(1):
+        assert registry.get_country('gb') == {'name': 'United Kingdom', 'iso2': 'GB'}
+        assert registry.get_country('CN') == {'name': 'China', 'iso2': 'CN'}
+        assert registry.get_country('XX') is None
+
+    models.Country.objects.filter(iso2='GB').update(name='Great Britain')
+    helpers.bump_cache_generation('Country')
+
+    assert registry.get_country('GB') == {'name': 'Great Britain', 'iso2': 'GB'}
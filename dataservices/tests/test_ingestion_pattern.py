@@ -1,3 +1,4 @@
+import datetime
 import gzip
 import io
 import json
@@ -17,6 +18,7 @@ from django.core import management
 from django.test import override_settings
 from sqlalchemy.future.engine import Engine
 
+from dataservices import models
 from dataservices.core.mixins import get_s3_file, get_s3_paginator, unzip_s3_gzip_file
 from dataservices.management.commands.import_comtrade_data import Command as comtrade_command
 from dataservices.management.commands.import_comtrade_data import get_comtrade_batch, get_comtrade_table
@@ -223,6 +225,35 @@ def test_import_eyb_salary_data_set_from_s3(
     assert mock_import_data.call_count == 1
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize("get_s3_file_data", [eyb_salaries[0]], indirect=True)
+@mock.patch.object(salary_command, 'save_import_data')
+@mock.patch('dataservices.core.mixins.get_s3_file')
+@mock.patch('dataservices.core.mixins.get_s3_paginator')
+def test_import_eyb_salary_data_skips_unchanged_source(
+    mock_get_s3_paginator,
+    mock_get_s3_file,
+    mock_import_data,
+    get_s3_file_data,
+    get_s3_data_transfer_data,
+):
+    mock_get_s3_file.return_value = get_s3_file_data
+    mock_get_s3_paginator.return_value = get_s3_data_transfer_data
+
+    management.call_command('import_eyb_salary_data', '--write')
+    assert mock_import_data.call_count == 1
+    assert models.IngestedSource.objects.get(command='import_eyb_salary_data').version.startswith(
+        '20240818T000000.jsonl.gz:'
+    )
+
+    management.call_command('import_eyb_salary_data', '--write')
+    assert mock_import_data.call_count == 1
+    assert mock_get_s3_file.call_count == 1
+
+    management.call_command('import_eyb_salary_data', '--write', '--force')
+    assert mock_import_data.call_count == 2
+
+
 eyb_rents = [
     {
         'id': 1,
@@ -679,6 +710,35 @@ def test_import_metadata_data(mock_connection, mock_ingest, metadata_str_tmp_dat
     assert next(ret[2]) is not None
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'table_name,view_name,source_model',
+    [
+        ('trade__uk_goods_nsa', 'TopFiveGoodsExportsByCountryView', models.UKTradeInGoodsByCountry),
+        ('trade__uk_services_nsa', 'TopFiveServicesExportsByCountryView', models.UKTradeInServicesByCountry),
+        ('trade__uk_totals_sa', 'UKTradeHighlightsView', models.UKTotalTradeByCountry),
+    ],
+)
+@override_settings(DATABASE_URL='postgresql://')
+@mock.patch('dataservices.management.commands.import_metadata_source_data.send_ingest_error_notify_email')
+@mock.patch.object(Engine, 'connect')
+def test_import_metadata_data_for_summary_table_view(mock_connection, mock_notify, table_name, view_name, source_model):
+    last_release = datetime.datetime(2024, 3, 1)
+    mock_connection.return_value.__enter__.return_value.execute.return_value = [
+        mock.Mock(table_name=table_name, last_release=last_release)
+    ]
+
+    metadata_data_command().save_import_data([])
+
+    assert mock_notify.call_count == 0
+    assert models.Metadata.objects.get(view_name=view_name).data['source'] == {
+        'organisation': source_model.METADATA_SOURCE_ORGANISATION,
+        'label': source_model.METADATA_SOURCE_LABEL,
+        'url': source_model.METADATA_SOURCE_URL,
+        'last_release': last_release.isoformat(),
+    }
+
+
 comtrade_data = [
     {
         'year': settings.COMTRADE_FIRST_PERIOD,
@@ -762,3 +822,23 @@ def test_get_comtrade_batch(comtrade_str_data):
     table = get_comtrade_table(metadata)
     ret = get_comtrade_batch(comtrade_str_data, table, '2023', 0)
     assert next(ret[2]) is not None
+
+
+@pytest.mark.django_db
+def test_get_comtrade_batch_classifies_rows(comtrade_str_data):
+    metadata = sa.MetaData()
+    table = get_comtrade_table(metadata)
+    lines = comtrade_str_data + [
+        '{"year": 2023, "period": 2023, "classification": "H6", "commodity_code": "010690", "trade_flow_code": "X", "fob_trade_value_in_usd": null, "reporter_country_iso3": "GBR", "partner_country_iso3": "FRA"}\n',  # noqa: E501
+        '{"year": 2022, "period": 2022, "classification": "H6", "commodity_code": "010690", "trade_flow_code": "X", "fob_trade_value_in_usd": 10.0, "reporter_country_iso3": "GBR", "partner_country_iso3": "FRA"}\n',  # noqa: E501
+        '{"year": 2023, "period": 2023, "classification": "H6", "commodity_code": "010690", "trade_flow_code": "M", "fob_trade_value_in_usd": 10.0, "reporter_country_iso3": "GBR", "partner_country_iso3": "FRA"}\n',  # noqa: E501
+    ]
+
+    ret = get_comtrade_batch(lines, table, '2023', 10, country_ids={'FRA': 7, 'ROU': 8})
+
+    assert [row for _, row in ret[2]] == [
+        (2023, 'H6', 'MOZ', 'WLD', '283539', 98000.0, None, 11),
+        (2023, 'H6', 'ROU', 'WLD', '293369', 2820.69, 8, 12),
+        (2023, 'H6', 'SRB', 'WLD', '85', 280159980.0, None, 13),
+        (2023, 'H6', 'FRA', 'GBR', '010690', 0.0, 7, 14),
+    ]
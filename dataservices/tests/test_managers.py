@@ -68,6 +68,23 @@ def test_uk_total_trade_manager_highlights_no_data(countries, total_trade_record
     assert len(highlights_queryset) == 0
 
 
+@pytest.mark.django_db
+def test_uk_trade_highlights_refresh(total_trade_records):
+    models.UKTradeHighlightsByCountry.objects.create(
+        iso2='XX', total_uk_exports=1, trading_position=1, percentage_of_uk_trade=100
+    )
+
+    count = models.UKTradeHighlightsByCountry.objects.refresh(
+        models.UKTotalTradeByCountry.objects.highlights(), {'year': 2021, 'quarter': 4}
+    )
+
+    assert count == 3
+    assert not models.UKTradeHighlightsByCountry.objects.filter(iso2='XX').exists()
+    highlights = models.UKTradeHighlightsByCountry.objects.get(iso2='CN')
+    assert highlights.trading_position == 1
+    assert (highlights.year, highlights.quarter) == (2021, 4)
+
+
 @pytest.mark.django_db
 def test_uk_top_services_yearly_totals(countries, trade_in_services_records):
     top_services_exports = models.UKTradeInServicesByCountry.objects.top_services_exports()
@@ -103,6 +120,36 @@ def test_uk_top_goods(countries, trade_in_goods_records):
     assert top_services_exports[0]['total_value'] == 24
 
 
+@pytest.mark.django_db
+def test_uk_top_goods_exports_by_country(countries, trade_in_goods_records):
+    top_goods_exports = models.UKTradeInGoodsByCountry.objects.top_goods_exports_by_country(limit=3)
+
+    assert sorted((row['country'], row['rank'], row['label']) for row in top_goods_exports) == [
+        (countries[iso2].pk, rank, label)
+        for iso2 in sorted(['DE', 'FR', 'CN'], key=lambda iso2: countries[iso2].pk)
+        for rank, label in enumerate(['first', 'second', 'third'], 1)
+    ]
+
+
+@pytest.mark.django_db
+def test_uk_top_exports_refresh(countries, trade_in_services_records):
+    models.UKTopExportsByCountry.objects.create(
+        country=countries['DE'], trade_type=models.UKTopExportsByCountry.SERVICES, rank=1, label='stale', total_value=1
+    )
+
+    count = models.UKTopExportsByCountry.objects.refresh(
+        models.UKTopExportsByCountry.SERVICES,
+        models.UKTradeInServicesByCountry.objects.top_services_exports_by_country(limit=5),
+    )
+
+    assert count == 15
+    assert list(
+        models.UKTopExportsByCountry.objects.filter(country=countries['DE'])
+        .order_by('rank')
+        .values_list('label', flat=True)
+    ) == ['first', 'second', 'third', 'fourth', 'fifth']
+
+
 @pytest.mark.django_db
 def test_uk_top_goods_with_no_records(countries):
     top_goods_exports = models.UKTradeInGoodsByCountry.objects.top_goods_exports()
@@ -139,3 +186,31 @@ def test_world_economic_outlook_manager_stats_specific_year(world_economic_outlo
 
     for economic_growth_stat in economic_growth_stats:
         assert economic_growth_stat.year == 2020
+
+
+@pytest.mark.django_db
+def test_eyb_latest_salary_data_refresh(eyb_salary_data):
+    latest_salaries = {}
+    for record in sorted(eyb_salary_data, key=lambda record: record['id']):
+        latest_salaries[(record['geo_description'], record['vertical'], record['soc_code'])] = record['median_salary']
+
+    assert sorted(
+        models.EYBLatestSalaryData.objects.values_list('geo_description', 'vertical', 'soc_code', 'median_salary')
+    ) == sorted((*combination, salary) for combination, salary in latest_salaries.items())
+
+
+@pytest.mark.django_db
+def test_eyb_business_cluster_cube_refresh(business_cluster_information_data):
+    cube = models.EYBBusinessClusterCube.objects
+
+    assert cube.filter(dimension=models.EYBBusinessClusterCube.SIC_CODE).count() == 5
+    assert sorted(
+        cube.filter(dimension=models.EYBBusinessClusterCube.DBT_SECTOR).values_list(
+            'key', 'geo_code', 'total_business_count', 'total_employee_count'
+        )
+    ) == [
+        ('financial and professional services', 'E92000001', 5700, 99000),
+        ('technology and smart cities', 'E92000001', 4020, 31000),
+        ('technology and smart cities', 'N92000002', 55, None),
+    ]
+    assert cube.get(dimension=models.EYBBusinessClusterCube.SIC_CODE, key='l').geo_code == 'E12000003'
@@ -0,0 +1,113 @@
+import pytest
+
+
+@pytest.mark.django_db
+def test_backfill_uktopexportsbycountry(migration, countries):
+    old_apps = migration.before([('dataservices', '0013_importcheckpoint')])
+    UKTradeInGoodsByCountry = old_apps.get_model('dataservices', 'UKTradeInGoodsByCountry')
+    UKTradeInServicesByCountry = old_apps.get_model('dataservices', 'UKTradeInServicesByCountry')
+    for code, exports in [('01', 10), ('02', 30), ('03', 20)]:
+        UKTradeInGoodsByCountry.objects.create(
+            country_id=countries['DE'].id,
+            year=2023,
+            quarter=4,
+            commodity_code=code,
+            commodity_name=f'goods {code}',
+            exports=exports,
+        )
+    UKTradeInServicesByCountry.objects.create(
+        country_id=countries['DE'].id,
+        period='year/2023',
+        period_type='year',
+        service_code='1',
+        service_name='services',
+        exports=50,
+    )
+    UKTradeInServicesByCountry.objects.create(
+        country_id=countries['DE'].id, period='quarter/2023-Q4', period_type='quarter', service_code='1', exports=1
+    )
+
+    new_apps = migration.apply('dataservices', '0014_backfill_uktopexportsbycountry')
+    UKTopExportsByCountry = new_apps.get_model('dataservices', 'UKTopExportsByCountry')
+
+    assert list(
+        UKTopExportsByCountry.objects.filter(country_id=countries['DE'].id)
+        .order_by('trade_type', 'rank')
+        .values_list('trade_type', 'rank', 'label', 'total_value')
+    ) == [
+        ('goods', 1, 'goods 02', 30),
+        ('goods', 2, 'goods 03', 20),
+        ('goods', 3, 'goods 01', 10),
+        ('services', 1, 'services', 50),
+    ]
+
+
+@pytest.mark.django_db
+def test_backfill_uktradehighlightsbycountry(migration, countries):
+    old_apps = migration.before([('dataservices', '0014_backfill_uktopexportsbycountry')])
+    UKTotalTradeByCountry = old_apps.get_model('dataservices', 'UKTotalTradeByCountry')
+    for iso2, exports in [('DE', 30), ('FR', 10), ('W1', 100)]:
+        UKTotalTradeByCountry.objects.create(
+            country_id=countries[iso2].id if iso2 in countries else None,
+            ons_iso_alpha_2_code=iso2,
+            year=2023,
+            quarter=4,
+            exports=exports,
+        )
+
+    new_apps = migration.apply('dataservices', '0015_backfill_uktradehighlightsbycountry')
+    UKTradeHighlightsByCountry = new_apps.get_model('dataservices', 'UKTradeHighlightsByCountry')
+
+    assert list(
+        UKTradeHighlightsByCountry.objects.order_by('iso2').values_list(
+            'iso2', 'total_uk_exports', 'trading_position', 'percentage_of_uk_trade', 'year', 'quarter'
+        )
+    ) == [('DE', 30, 1, 30.0, 2023, 4), ('FR', 10, 2, 10.0, 2023, 4)]
+
+
+@pytest.mark.django_db
+def test_backfill_eyblatestsalarydata(migration):
+    old_apps = migration.before([('dataservices', '0015_backfill_uktradehighlightsbycountry')])
+    EYBSalaryData = old_apps.get_model('dataservices', 'EYBSalaryData')
+    for median_salary in [30000, 35000, 0]:
+        EYBSalaryData.objects.create(
+            geo_description='London',
+            vertical='Technology and smart cities',
+            professional_level='Entry-level',
+            soc_code=2134,
+            median_salary=median_salary,
+            dataset_year=2023,
+        )
+
+    new_apps = migration.apply('dataservices', '0016_backfill_eyblatestsalarydata')
+    EYBLatestSalaryData = new_apps.get_model('dataservices', 'EYBLatestSalaryData')
+
+    assert list(EYBLatestSalaryData.objects.values_list('geo_description', 'soc_code', 'median_salary')) == [
+        ('London', 2134, 35000)
+    ]
+
+
+@pytest.mark.django_db
+def test_backfill_eybbusinessclustercube(migration):
+    old_apps = migration.before([('dataservices', '0016_backfill_eyblatestsalarydata')])
+    EYBBusinessClusterInformation = old_apps.get_model('dataservices', 'EYBBusinessClusterInformation')
+    for sic_code, total_business_count in [('95110', 40), ('62012', 60)]:
+        EYBBusinessClusterInformation.objects.create(
+            geo_description='England',
+            geo_code='E92000001',
+            sic_code=sic_code,
+            sic_description=f'SIC {sic_code}',
+            total_business_count=total_business_count,
+            business_count_release_year=2023,
+            dbt_full_sector_name='Technology and smart cities : Hardware',
+            dbt_sector_name='Technology and smart cities',
+        )
+
+    new_apps = migration.apply('dataservices', '0017_backfill_eybbusinessclustercube')
+    EYBBusinessClusterCube = new_apps.get_model('dataservices', 'EYBBusinessClusterCube')
+
+    assert sorted(EYBBusinessClusterCube.objects.values_list('dimension', 'key', 'total_business_count')) == [
+        ('dbt_sector', 'technology and smart cities', 100),
+        ('sic_code', '62012', 60),
+        ('sic_code', '95110', 40),
+    ]
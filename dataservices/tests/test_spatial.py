@@ -0,0 +1,94 @@
+import pytest
+
+from dataservices import helpers, models
+from dataservices.spatial import chamber_of_commerce_index, support_hub_index
+
+
+@pytest.fixture(autouse=True)
+def stale_indexes(monkeypatch):
+    for index in [support_hub_index, chamber_of_commerce_index]:
+        monkeypatch.setattr(index, 'generation', None)
+        monkeypatch.setattr(index, 'check_interval', 0)
+
+
+@pytest.fixture
+def local_support_data():
+    england = models.Boundary.objects.create(code='E92000001', name='England', type='5')
+    london = models.Boundary.objects.create(code='E12000007', name='London', type='4')
+    scotland = models.Boundary.objects.create(code='S92000003', name='Scotland', type='5')
+    contacts = models.ContactCard.objects.create(website='https://example.com', phone='0123')
+
+    for name, eastings, northings in [('Near', 100, 100), ('Far', 900, 900)]:
+        hub = models.SupportHub.objects.create(
+            name=f'{name} hub',
+            contacts=contacts,
+            place=models.Place.objects.create(eastings=eastings, northings=northings),
+        )
+        hub.boundaries.add(london, england)
+
+    for index, (eastings, northings, boundary) in enumerate(
+        [(110, 110, england), (500, 500, england), (105, 105, scotland)] + [(800 + i, 800, england) for i in range(5)]
+    ):
+        models.ChamberOfCommerce.objects.create(
+            name=f'Chamber {index}',
+            contacts=contacts,
+            boundary=boundary,
+            place=models.Place.objects.create(eastings=eastings, northings=northings),
+        )
+
+
+@pytest.mark.django_db
+def test_support_hub_by_postcode_falls_back_to_nearest_hub(local_support_data, django_assert_num_queries):
+    postcode_data = {
+        'eastings': 0,
+        'northings': 0,
+        'codes': {'admin_district': 'X', 'admin_county': 'Y'},
+        'region': 'Nowhere',
+        'country': 'Nowhere',
+    }
+
+    support_hub_index.refresh_if_stale()
+    with django_assert_num_queries(1):
+        support_hubs = helpers.get_support_hub_by_postcode(postcode_data)
+
+    assert support_hubs == [
+        {
+            'name': 'Near hub',
+            'digest': None,
+            'contacts': {
+                'website': 'https://example.com',
+                'website_label': None,
+                'phone': '0123',
+                'email': None,
+                'contact_form': None,
+                'contact_form_label': None,
+            },
+            'boundary_name': 'England',
+            'boundary_type': 'country',
+            'boundary_level': '5',
+        }
+    ]
+
+
+@pytest.mark.django_db
+def test_chamber_by_postcode_returns_five_nearest_in_country(local_support_data):
+    chambers = helpers.get_chamber_by_postcode({'eastings': 100, 'northings': 100, 'country': 'England'})
+
+    assert [chamber['name'] for chamber in chambers] == [
+        'Chamber 0',
+        'Chamber 1',
+        'Chamber 3',
+        'Chamber 4',
+        'Chamber 5',
+    ]
+    assert chambers[0]['distance'] == pytest.approx(14.142, rel=1e-3)
+    assert chambers[0]['place']['eastings'] == '110'
+
+
+@pytest.mark.django_db
+def test_place_index_rebuilt_when_places_change(local_support_data):
+    assert support_hub_index.nearest(900, 900)[0][0]['name'] == 'Far hub'
+
+    models.SupportHub.objects.get(name='Far hub').delete()
+
+    assert support_hub_index.nearest(900, 900)[0][0]['name'] == 'Near hub'
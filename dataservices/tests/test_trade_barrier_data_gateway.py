@@ -39,7 +39,7 @@ def test_s3_filters_location_request(mock_trade_barrer_request, locations, secto
 @pytest.mark.django_db
 def test_request_raises_error():
     filter = {'locations': {'cn': 'China'}, 'sectors': ['Automotive']}
-    with mock.patch('dataservices.core.client_api.requests.get') as mock_trade_barrier_request:
+    with mock.patch('dataservices.core.client_api.outbound_request') as mock_trade_barrier_request:
         mock_trade_barrier_request.side_effect = HTTPError
         with pytest.raises(HTTPError):
             trade_barrier_data_gateway.barriers_list(filters=filter)
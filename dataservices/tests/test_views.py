@@ -393,6 +393,10 @@ def test_trading_trade_barrier_with_sectors(mock_api_client, client):
 
 @pytest.mark.django_db
 def test_dataservices_top_five_goods_by_country_api(client, trade_in_goods_records, metadata_source_records):
+    models.UKTopExportsByCountry.objects.refresh(
+        models.UKTopExportsByCountry.GOODS,
+        models.UKTradeInGoodsByCountry.objects.top_goods_exports_by_country(models.UKTopExportsByCountry.RANK_LIMIT),
+    )
     response = client.get(reverse('dataservices-top-five-goods-by-country'), data={'iso2': 'DE'})
 
     assert response.status_code == 200
@@ -417,6 +421,12 @@ def test_dataservices_top_five_goods_by_country_api_for_no_iso2(client, trade_in
 
 @pytest.mark.django_db
 def test_dataservices_trade_in_services_by_country_api(client, trade_in_services_records, metadata_source_records):
+    models.UKTopExportsByCountry.objects.refresh(
+        models.UKTopExportsByCountry.SERVICES,
+        models.UKTradeInServicesByCountry.objects.top_services_exports_by_country(
+            models.UKTopExportsByCountry.RANK_LIMIT
+        ),
+    )
     response = client.get(reverse('dataservices-top-five-services-by-country'), data={'iso2': 'DE'})
 
     assert response.status_code == 200
@@ -430,6 +440,7 @@ def test_dataservices_trade_in_services_by_country_api(client, trade_in_services
     }
     assert len(api_data['data']) == 5
     assert api_data['data'][0] == {'label': 'first', 'value': 6000000}
+    assert isinstance(api_data['data'][0]['value'], int)
 
 
 @pytest.mark.django_db
@@ -510,8 +521,11 @@ def test_dataservices_trade_highlights_api(client, metadata_source_records):
                 factories.UKTotalTradeByCountryFactory.create(
                     country=country, ons_iso_alpha_2_code=ons_iso_alpha_2_code, year=year, quarter=quarter, exports=1
                 )
+    models.UKTradeHighlightsByCountry.objects.refresh(
+        models.UKTotalTradeByCountry.objects.highlights(), models.UKTotalTradeByCountry.objects.get_current_period()
+    )
 
-    response = client.get(reverse('dataservices-trade-highlights'), data={'iso2': 'XY'})
+    response = client.get(reverse('dataservices-trade-highlights'), data={'iso2': 'xy'})
 
     assert response.status_code == 200
 
@@ -520,7 +534,7 @@ def test_dataservices_trade_highlights_api(client, metadata_source_records):
     assert api_data['metadata'] == {
         'country': {'iso2': 'XY', 'name': mock.ANY},
         'source': {'organisation': 'ONS', 'label': 'total exports', 'last_release': mock.ANY},
-        'reference_period': {'period': mock.ANY, 'resolution': 'quarter', 'year': mock.ANY},
+        'reference_period': {'period': 4, 'resolution': 'quarter', 'year': 2021},
     }
     assert len(api_data['data']) == 3
     assert api_data['data']['total_uk_exports'] == 4000000
@@ -881,6 +895,61 @@ def test_dataservices_countries_territories_regions(countries_territories_region
     assert api_data[2]['id'] == 3
 
 
+@pytest.mark.django_db
+def test_dataservices_countries_territories_regions_conditional_get(
+    countries_territories_regions, client, django_assert_num_queries
+):
+    url = reverse('dataservices-countries-territories-regions')
+    response = client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'].startswith('"')
+    assert 'Last-Modified' in response
+
+    with django_assert_num_queries(0):
+        cached = client.get(url)
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    assert cached.content == response.content
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified['ETag'] == response['ETag']
+
+    models.CountryTerritoryRegion.objects.filter(id=1).first().delete()
+    changed = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    assert changed.status_code == status.HTTP_200_OK
+    assert changed['ETag'] != response['ETag']
+    assert len(json.loads(changed.content)) == 2
+
+
+@pytest.mark.django_db
+def test_dataservices_markets_conditional_get(client, django_assert_num_queries):
+    for reference_id, name, iso2_code in [('CTHMTC00260', 'France', 'FR'), ('CTHMTC00261', 'Germany', 'DE')]:
+        models.Market.objects.create(reference_id=reference_id, name=name, type='Country', iso2_code=iso2_code)
+    url = reverse('dataservices-markets')
+    response = client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'].startswith('"')
+    assert 'Last-Modified' in response
+    assert len(json.loads(response.content)) == 2
+
+    with django_assert_num_queries(0):
+        cached = client.get(url)
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    assert cached.content == response.content
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified['ETag'] == response['ETag']
+
+    models.Market.objects.filter(iso2_code='DE').delete()
+    changed = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    assert changed.status_code == status.HTTP_200_OK
+    assert changed['ETag'] != response['ETag']
+    assert len(json.loads(changed.content)) == 1
+
+
 @pytest.mark.parametrize(
     "iso2_code, expected_id",
     [
@@ -901,7 +970,7 @@ def test_dataservices_country_territory_region(iso2_code, expected_id, countries
 
 
 @mock.patch(
-    'dataservices.views.requests.get',
+    'dataservices.views.outbound_request',
     return_value=create_response(
         {
             'details': {
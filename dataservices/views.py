@@ -1,26 +1,29 @@
+import hashlib
 import json
+import time
 
-import requests
 import sentry_sdk
-from django.apps import apps
-from django.db.models import Avg, Max, Sum
-from django.shortcuts import get_object_or_404
+from django.core.cache import cache
+from django.db.models import Avg, Max
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
 from django.utils.decorators import method_decorator
 from django.utils.html import strip_tags
+from django.utils.http import http_date
 from django.views.decorators.cache import cache_page
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema, inline_serializer
 from rest_framework import generics, status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.serializers import CharField
 from rest_framework.views import APIView
 
+from core.helpers import outbound_request
 from dataservices import filters, helpers, models, renderers, serializers
 from dataservices.core import client_api
 from dataservices.helpers import (
-    deep_extend,
     get_chamber_by_postcode,
-    get_multiple_serialized_instance_from_model,
     get_postcode_data,
     get_serialized_instance_from_model,
     get_support_hub_by_postcode,
@@ -29,6 +32,47 @@ from dataservices.models import Country, RuleOfLaw
 from dataservices.serializers import RuleOfLawSerializer
 
 
+class VersionedResponseMixin:
+    """
+    Serve a pre-rendered JSON body for endpoints whose data only changes when their dataset is reimported.
+
+    Responses carry a strong ETag derived from the generation of each model in dataset_models, so a client
+    revalidating with If-None-Match gets a 304 without the tables being read. The rendered body is cached against
+    the same version, and the import commands and admin saves bump the generation to invalidate both.
+    """
+
+    dataset_models = []
+    response_cache_timeout = 60 * 60 * 24
+
+    def get(self, request, *args, **kwargs):
+        version = helpers.get_dataset_version(self.dataset_models)
+        digest = hashlib.sha1(f'{self.__class__.__name__}:{version}:{request.get_full_path()}'.encode()).hexdigest()
+        etag = f'"{digest}"'
+
+        if request.headers.get('If-None-Match'):
+            # the ETag alone decides, so a matching client is answered before the cache or tables are read
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                not_modified['ETag'] = etag
+                return not_modified
+
+        cache_key = f'dataservices:response:{digest}'
+        cached = cache.get(cache_key)
+        if cached is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cached = {'body': JSONRenderer().render(response.data), 'last_modified': int(time.time())}
+            cache.set(cache_key, cached, self.response_cache_timeout)
+
+        response = get_conditional_response(request, etag=etag, last_modified=cached['last_modified'])
+        if response is None:
+            response = HttpResponse(cached['body'], content_type='application/json')
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(cached['last_modified'])
+        return response
+
+
 @extend_schema(
     responses=OpenApiTypes.OBJECT,
     examples=[
@@ -132,28 +176,7 @@ class RetrieveDataByCountryView(generics.GenericAPIView):
         model_names = self.request.GET.getlist('fields', '')
         if len(model_names) == 1 and model_names[0][0] == '[':
             model_names = json.loads(model_names[0])
-        out = {}
-        for field_spec in model_names:
-            filter_args = {'country__iso2__in': countries_list, 'country__is_active': True}
-            if isinstance(field_spec, str):
-                field_spec = {'model': field_spec}
-            filter_args.update(field_spec.get('filter', {}))
-            try:
-                model = apps.get_model('dataservices', field_spec['model'])
-                serializer = serializers.__dict__.get(field_spec['model'] + 'Serializer')
-                if model and serializer:
-                    deep_extend(
-                        out,
-                        get_multiple_serialized_instance_from_model(
-                            model_class=model,
-                            serializer_class=serializer,
-                            filter_args=filter_args,
-                            section_key=field_spec['model'],
-                            latest_only=field_spec.get('latest_only', False),
-                        ),
-                    )
-            except LookupError:
-                pass
+        out = helpers.get_serialized_data_by_country(countries_list, model_names)
 
         return Response(status=status.HTTP_200_OK, data=out)
 
@@ -185,24 +208,11 @@ class RetrieveDataByCountryView(generics.GenericAPIView):
     ],
     description='Markets',
 )
-class RetrieveMarketsView(generics.GenericAPIView):
+class RetrieveMarketsView(VersionedResponseMixin, generics.ListAPIView):
     permission_classes = []
-
-    def get(self, *args, **kwargs):
-        markets_data = models.Market.objects.values(
-            'reference_id',
-            'name',
-            'type',
-            'iso1_code',
-            'iso2_code',
-            'iso3_code',
-            'overseas_region_overseas_region_name',
-            'start_date',
-            'end_date',
-            'enabled',
-        )
-
-        return Response(status=status.HTTP_200_OK, data=markets_data)
+    dataset_models = ['Market']
+    serializer_class = serializers.MarketSerializer
+    queryset = models.Market.objects.all()
 
 
 @extend_schema(
@@ -454,21 +464,26 @@ class MetadataMixin:
 
     limit = None
     reference_period = False
+    # the model whose METADATA_SOURCE_* attributes describe the view's data, when it is not the filterset's model
+    metadata_source_model = None
+    response_metadata = None
 
     def get_country(self):
         iso2 = self.request.query_params.get('iso2', '')
         if not iso2:
             return {}
 
-        country = get_object_or_404(models.Country, iso2__iexact=iso2)
+        country = helpers.metadata_registry.get_country(iso2)
+        if country is None:
+            raise Http404('No Country matches the given query.')
 
-        return {'country': {'name': country.name, 'iso2': country.iso2}}
+        return {'country': country}
 
     def get_reference_period(self):
         if not self.reference_period:
             return {}
 
-        year, period = self.queryset.get_current_period().values()
+        year, period = self.get_current_period().values()
 
         return {
             'reference_period': {
@@ -478,16 +493,22 @@ class MetadataMixin:
             }
         }
 
+    def get_current_period(self):
+        return helpers.metadata_registry.get_current_period(self.queryset)
+
     def get_metadata(self):
-        country = self.get_country()
-        reference_period = self.get_reference_period()
+        # the renderer asks for the metadata again after the serializer, so it is only assembled once per request
+        if self.response_metadata is None:
+            metadata = helpers.metadata_registry.get_metadata(self.__class__.__name__) or {}
+            self.response_metadata = metadata | self.get_country() | self.get_reference_period()
 
-        try:
-            metadata = models.Metadata.objects.get(view_name=self.__class__.__name__)
-        except models.Metadata.DoesNotExist:
-            return country | reference_period
+        return self.response_metadata
 
-        return metadata.data | country | reference_period
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.limit:
+            return queryset[: self.limit]
+        return queryset
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -533,11 +554,16 @@ class TopFiveGoodsExportsByCountryView(MetadataMixin, generics.ListAPIView):
     serializer_class = serializers.UKTopFiveGoodsExportsSerializer
     filterset_class = filters.UKTopFiveGoodsExportsFilter
     renderer_classes = (renderers.CustomDataMetadataJSONRenderer,)
-    limit = 5
+    limit = models.UKTopExportsByCountry.RANK_LIMIT
+    metadata_source_model = models.UKTradeInGoodsByCountry
     reference_period = True
 
     def get_queryset(self):
-        return self.queryset.top_goods_exports()
+        return (
+            models.UKTopExportsByCountry.objects.filter(trade_type=models.UKTopExportsByCountry.GOODS)
+            .order_by('rank')
+            .values('label', 'total_value')
+        )
 
 
 @extend_schema(
@@ -577,11 +603,16 @@ class TopFiveServicesExportsByCountryView(MetadataMixin, generics.ListAPIView):
     serializer_class = serializers.UKTopFiveServicesExportSerializer
     filterset_class = filters.UKTopFiveServicesExportsFilter
     renderer_classes = (renderers.CustomDataMetadataJSONRenderer,)
-    limit = 5
+    limit = models.UKTopExportsByCountry.RANK_LIMIT
+    metadata_source_model = models.UKTradeInServicesByCountry
     reference_period = True
 
     def get_queryset(self):
-        return self.queryset.top_services_exports()
+        return (
+            models.UKTopExportsByCountry.objects.filter(trade_type=models.UKTopExportsByCountry.SERVICES)
+            .order_by('rank')
+            .values('label', 'total_value')
+        )
 
 
 @extend_schema(
@@ -667,12 +698,14 @@ class UKMarketTrendsView(MetadataMixin, generics.ListAPIView):
 )
 class UKTradeHighlightsView(MetadataMixin, generics.RetrieveAPIView):
     permission_classes = []
-    queryset = models.UKTotalTradeByCountry.objects
+    queryset = models.UKTradeHighlightsByCountry.objects
     serializer_class = serializers.UKTradeHighlightsSerializer
     filterset_class = filters.UKTradeHighlightsFilter
     renderer_classes = (renderers.CustomDataMetadataJSONRenderer,)
-    lookup_field = 'country__iso2'
+    lookup_field = 'iso2'
+    metadata_source_model = models.UKTotalTradeByCountry
     reference_period = True
+    highlights = None
 
     def dispatch(self, *args, **kwargs):
         kwargs[self.lookup_field] = self.request.GET.get('iso2', '').upper()
@@ -680,7 +713,17 @@ class UKTradeHighlightsView(MetadataMixin, generics.RetrieveAPIView):
         return super().dispatch(*args, **kwargs)
 
     def get_queryset(self):
-        return super().get_queryset().highlights()
+        return super().get_queryset().values()
+
+    def get_object(self):
+        self.highlights = super().get_object()
+        return self.highlights
+
+    def get_current_period(self):
+        # the highlights were computed for the reference period they were stored with
+        if not self.highlights:
+            return {'year': None, 'quarter': None}
+        return {'year': self.highlights['year'], 'quarter': self.highlights['quarter']}
 
 
 @extend_schema(
@@ -794,8 +837,9 @@ class EconomicHighlightsView(MetadataMixin, generics.RetrieveAPIView):
     ],
     description='UK Free Trade Agreements',
 )
-class UKFreeTradeAgreementsView(generics.ListAPIView):
+class UKFreeTradeAgreementsView(VersionedResponseMixin, generics.ListAPIView):
     permission_classes = []
+    dataset_models = ['UKFreeTradeAgreement']
     queryset = models.UKFreeTradeAgreement.objects
     serializer_class = serializers.UKFreeTradeAgreementSerializer
 
@@ -838,7 +882,9 @@ class UKFreeTradeAgreementsView(generics.ListAPIView):
 class BusinessClusterInformationBySicView(generics.ListAPIView):
     permission_classes = []
     serializer_class = serializers.BusinessClusterInformationSerializer
-    queryset = models.EYBBusinessClusterInformation.objects
+    queryset = models.EYBBusinessClusterCube.objects.filter(dimension=models.EYBBusinessClusterCube.SIC_CODE).order_by(
+        '-business_count_release_year', '-employee_count_release_year'
+    )
     filterset_class = filters.BusinessClusterInformationBySicFilter
 
 
@@ -869,24 +915,10 @@ class BusinessClusterInformationBySicView(generics.ListAPIView):
     ],
 )
 class BusinessClusterInformationByDBTSectorView(generics.ListAPIView):
-    # view that aggregates data across a geographic region / DBT Sector (which spans multiple sic codes)
+    # view of the data aggregated across a geographic region / DBT Sector (which spans multiple sic codes)
     permission_classes = []
     serializer_class = serializers.BusinessClusterInformationAggregatedDataSerializer
-    queryset = (
-        models.EYBBusinessClusterInformation.objects.values(
-            'geo_code',
-            'geo_description',
-            'dbt_sector_name',
-            'business_count_release_year',
-            'employee_count_release_year',
-            'dbt_sector_name',
-        )
-        .annotate(
-            total_business_count=Sum('total_business_count'),
-            total_employee_count=Sum('total_employee_count'),
-        )
-        .order_by()
-    )
+    queryset = models.EYBBusinessClusterCube.objects.filter(dimension=models.EYBBusinessClusterCube.DBT_SECTOR)
     filterset_class = filters.BusinessClusterInformationByDBTSectorFilter
 
 
@@ -956,32 +988,16 @@ class EYBSalaryDataView(generics.ListAPIView):
         """
         The salary data for geo_description/vertical/soc_code combinations contains different dataset years. Each
         combination should only be considered once when taking the average median value for a set of data at a given
-        professional level, e.g. Entry-level. The below approach accomodates this by only selecting the latest data
-        for each combination and is in line with the performance consideraions mentioned here
-        https://docs.djangoproject.com/en/5.0/ref/models/querysets/#in
+        professional level, e.g. Entry-level, so the average is taken over the latest data for each combination,
+        which import_eyb_salary_data stores in EYBLatestSalaryData.
         """
 
-        latest_data_for_each_soc_code_ids = (
-            models.EYBSalaryData.objects.values('geo_description', 'vertical', 'soc_code')
-            .filter(median_salary__gt=0)
-            .annotate(dataset_year=Max('dataset_year'), id=Max('id'))
-            .order_by()
-            .values_list('id', flat=True)
-        )
-
-        queryset = (
-            models.EYBSalaryData.objects.values(
-                'geo_description',
-                'vertical',
-                'professional_level',
-            )
-            .filter(id__in=list(latest_data_for_each_soc_code_ids))
+        return (
+            models.EYBLatestSalaryData.objects.values('geo_description', 'vertical', 'professional_level')
             .annotate(median_salary=Avg('median_salary'), dataset_year=Max('dataset_year'))
             .order_by()
         )
 
-        return queryset
-
 
 @extend_schema(
     responses=OpenApiTypes.OBJECT,
@@ -1071,8 +1087,9 @@ class EYBRentDataView(generics.ListAPIView):
     queryset = models.EYBCommercialPropertyRent.objects.all()
 
 
-class DBTSectorsView(generics.ListAPIView):
+class DBTSectorsView(VersionedResponseMixin, generics.ListAPIView):
     permission_classes = []
+    dataset_models = ['DBTSector']
     serializer_class = serializers.DBTSectorSerializer
     queryset = models.DBTSector.objects.all()
 
@@ -1163,8 +1180,9 @@ class SectorGVAValueBandView(generics.ListAPIView):
     ],
     description='Gross Value Add classifications for all sectors',
 )
-class AllSectorsGVAValueBandsView(generics.ListAPIView):
+class AllSectorsGVAValueBandsView(VersionedResponseMixin, generics.ListAPIView):
     permission_classes = []
+    dataset_models = ['SectorGVAValueBand']
     serializer_class = serializers.SectorGVAValueBandSerializer
     # each full sector name may have multiple rows with different start dates, choose the latest
     queryset = (
@@ -1226,8 +1244,9 @@ class DBTInvestmentOpportunityView(generics.ListAPIView):
     ],
     description='Countries, territories and regions',
 )
-class CountriesTerritoriesRegionsView(generics.ListAPIView):
+class CountriesTerritoriesRegionsView(VersionedResponseMixin, generics.ListAPIView):
     permission_classes = []
+    dataset_models = ['CountryTerritoryRegion']
     serializer_class = serializers.CountriesTerritoriesRegionsSerializer
     queryset = models.CountryTerritoryRegion.objects.all()
 
@@ -1331,7 +1350,7 @@ class NewsContent(APIView):
         news_articles = []
 
         try:
-            r = requests.get(dbt_news_articles_url, headers=headers)
+            r = outbound_request('get', dbt_news_articles_url, headers=headers)
             r.raise_for_status()
             page_content = r.json()
             news_articles = page_content['details']['ordered_featured_documents']
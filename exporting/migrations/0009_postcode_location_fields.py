@@ -0,0 +1,53 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exporting', '0008_postcode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postcode',
+            name='admin_county_code',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='postcode',
+            name='admin_district',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='postcode',
+            name='admin_district_code',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='postcode',
+            name='country',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='postcode',
+            name='eastings',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='postcode',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='postcode',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='postcode',
+            name='northings',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
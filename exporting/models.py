@@ -46,3 +46,11 @@ class Postcode(TimeStampedModel):
     post_code = models.TextField(blank=False, null=False)
     region = models.TextField(blank=True, null=True)
     european_electoral_region = models.TextField(blank=True, null=True)
+    eastings = models.IntegerField(blank=True, null=True)
+    northings = models.IntegerField(blank=True, null=True)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    country = models.TextField(blank=True, null=True)
+    admin_district = models.TextField(blank=True, null=True)
+    admin_district_code = models.TextField(blank=True, null=True)
+    admin_county_code = models.TextField(blank=True, null=True)
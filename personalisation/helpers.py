@@ -6,6 +6,7 @@ import requests
 from django.conf import settings
 from mohawk import Sender
 
+from core.helpers import outbound_request
 from personalisation import serializers
 
 
@@ -61,8 +62,6 @@ def search_with_activitystream(query):
     Note that this must be at root level in SearchView class to
     enable it to be mocked in tests.
     """
-    request = requests.Request(method="GET", url=settings.ACTIVITY_STREAM_OUTGOING_URL, data=query).prepare()
-
     auth = Sender(
         {
             'id': settings.ACTIVITY_STREAM_OUTGOING_ACCESS_KEY,
@@ -79,15 +78,13 @@ def search_with_activitystream(query):
     # in production, and thus the value of ACTIVITY_STREAM_API_IP_WHITELIST
     # in production is irrelivant. It is included here to allow the app to
     # run locally or outside of Gov PaaS.
-    request.headers.update(
-        {
-            'X-Forwarded-Proto': 'https',
-            'X-Forwarded-For': settings.ACTIVITY_STREAM_OUTGOING_IP_WHITELIST,
-            'Authorization': auth,
-            'Content-Type': 'application/json',
-        }
-    )
-    return requests.Session().send(request)
+    headers = {
+        'X-Forwarded-Proto': 'https',
+        'X-Forwarded-For': settings.ACTIVITY_STREAM_OUTGOING_IP_WHITELIST,
+        'Authorization': auth,
+        'Content-Type': 'application/json',
+    }
+    return outbound_request('get', settings.ACTIVITY_STREAM_OUTGOING_URL, data=query, headers=headers)
 
 
 def get_opportunities(hashed_sso_id, search_term):